@@ -43,7 +43,8 @@ class Dubbing {
             target_language: settings.targetLanguage,
             translator: settings.translatorEngine,
             tts_voice: settings.speakerVoice,
-            need_translator: need_translator
+            need_translator: need_translator,
+            response_mode: "binary"
         };
         console.log("🛠️ Payload đã tạo:", payload);
         return payload;
@@ -60,26 +61,15 @@ class Dubbing {
             if (!response.ok) {
                 throw new Error(`Lỗi server: ${response.status}`);
             }
-            const jsonResponse = await response.json();
-            console.log("✅ [Background] Nhận được phản hồi JSON:", jsonResponse);
+            const buffer = await response.arrayBuffer();
+            console.log(`✅ [Background] Nhận được ${buffer.byteLength} bytes audio nhị phân`);
 
-            // Xử lý danh sách chunks từ JSON
-            const audioChunks = jsonResponse.chunks.map(chunk => {
-                if (!chunk.audio_base64 || !chunk.chunk_id) {
-                    console.error(`❌ [Chunk ${chunk.chunk_id || 'unknown'}] Thiếu audio_base64 hoặc chunk_id`);
-                    throw new Error("Dữ liệu chunk không hợp lệ");
-                }
-                // Giải mã base64 thành Uint8Array
-                const binaryString = atob(chunk.audio_base64);
-                const len = binaryString.length;
-                const bytes = new Uint8Array(len);
-                for (let i = 0; i < len; i++) {
-                    bytes[i] = binaryString.charCodeAt(i);
-                }
-                console.log(`[Background] Kích thước audioData cho chunk ${chunk.chunk_id}: ${bytes.length}`);
+            // Tách các frame nhị phân: [4 byte độ dài chunk_id][chunk_id][4 byte độ dài audio][audio]
+            const audioChunks = this.parseBinaryFrames(buffer).map(chunk => {
+                console.log(`[Background] Kích thước audioData cho chunk ${chunk.chunk_id}: ${chunk.bytes.length}`);
                 return {
                     chunk_id: chunk.chunk_id,
-                    audioData: Array.from(bytes), // Chuyển thành mảng số để tương thích với content_script.js
+                    audioData: Array.from(chunk.bytes), // Chuyển thành mảng số để tương thích với content_script.js
                 };
             });
 
@@ -96,6 +86,28 @@ class Dubbing {
         }
     }
 
+    parseBinaryFrames(buffer) {
+        const view = new DataView(buffer);
+        const decoder = new TextDecoder("utf-8");
+        const frames = [];
+        let offset = 0;
+        while (offset + 4 <= buffer.byteLength) {
+            const idLength = view.getUint32(offset);
+            offset += 4;
+            const chunkId = decoder.decode(new Uint8Array(buffer, offset, idLength));
+            offset += idLength;
+            const audioLength = view.getUint32(offset);
+            offset += 4;
+            if (offset + audioLength > buffer.byteLength) {
+                console.error(`❌ [Chunk ${chunkId}] Frame audio bị cắt ngang`);
+                throw new Error("Dữ liệu chunk không hợp lệ");
+            }
+            frames.push({ chunk_id: chunkId, bytes: new Uint8Array(buffer, offset, audioLength) });
+            offset += audioLength;
+        }
+        return frames;
+    }
+
     setStatus(text) {
         if (this.statusElement) {
             this.statusElement.textContent = text;
@@ -4,33 +4,48 @@ from fastapi import HTTPException
 from pydub import AudioSegment
 from pydub.utils import which
 from io import BytesIO
+from functools import lru_cache
+from Handler_Transcript.audio_probe import probe_duration
+
+# Tìm ffmpeg một lần cho cả tiến trình thay vì mỗi lần đo thời lượng
+@lru_cache(maxsize=1)
+def resolve_ffmpeg():
+    ffmpeg_path = which("ffmpeg")
+    if ffmpeg_path is not None:
+        AudioSegment.converter = ffmpeg_path
+    return ffmpeg_path
 
 class Handler:   
     def get_audio_duration_from_bytesio(self, audio_bytes_io: BytesIO, format: str = "webm") -> float:
         """
         Trả về thời lượng của dữ liệu audio (tính bằng giây) từ BytesIO.
-        
+
+        Đọc thẳng header container (WebM / Ogg / RIFF / MP3) trong bộ nhớ, chỉ giải mã
+        bằng ffmpeg khi không đọc được thời lượng từ header.
+
         Args:
             audio_bytes_io (BytesIO): Dữ liệu audio đầu vào.
             format (str): Định dạng file (ví dụ: "webm", "mp3", "wav"). Mặc định là "webm".
-        
+
         Returns:
             float: Thời lượng của audio (tính bằng giây).
-        
+
         Raises:
-            RuntimeError: Nếu không tìm thấy ffmpeg.
+            RuntimeError: Nếu cần ffmpeg nhưng không tìm thấy.
             Exception: Nếu dữ liệu không hợp lệ hoặc không thể đọc được.
         """
+        duration_seconds = probe_duration(audio_bytes_io.getvalue())
+        if duration_seconds is not None:
+            return duration_seconds
 
         # Đảm bảo ffmpeg được cấu hình
-        ffmpeg_path = which("ffmpeg")
+        ffmpeg_path = resolve_ffmpeg()
         if ffmpeg_path is None:
             raise RuntimeError("❌ Không tìm thấy ffmpeg. Hãy cài đặt ffmpeg và thêm vào PATH.")
 
-        AudioSegment.converter = ffmpeg_path
-
         try:
             # Đọc dữ liệu âm thanh từ BytesIO với định dạng chỉ định
+            audio_bytes_io.seek(0)
             audio_segment = AudioSegment.from_file(audio_bytes_io, format=format)
 
             # Trả về thời lượng tính bằng giây
@@ -124,6 +139,46 @@ class Handler:
             merged.append(new_entry)
 
         return merged
+    def extract_translations(self, translated_result: List[Union[Dict, str]], target_language: str = "vi") -> List[str]:
+        """
+        Lấy danh sách text dịch từ kết quả translator (mỗi phần tử ứng với một text đầu vào).
+
+        Args:
+            translated_result: List[Union[Dict, str]] - ví dụ [{"vi": "Xin chào"}, ...] hoặc ["Xin chào", ...]
+            target_language: str - mã ngôn ngữ đích
+
+        Returns:
+            List[str] - text dịch theo đúng thứ tự đầu vào
+        """
+        translations = []
+        for item in translated_result or []:
+            if isinstance(item, dict):
+                translations.append(item.get(target_language, ""))
+            else:
+                translations.append(str(item))
+        return translations
+    def merge_segment_translation(self, chunk: List[Dict], translated_texts: List[str]) -> List[Dict]:
+        """
+        Merge chunk gốc với bản dịch đã có sẵn cho từng segment (không cần phân bổ theo số từ).
+
+        Args:
+            chunk: List[Dict] - danh sách transcript gốc [{text, start, duration, ...}]
+            translated_texts: List[str] - bản dịch tương ứng 1:1 với từng entry của chunk
+
+        Returns:
+            List[Dict] - danh sách entry [{text_translated, start, duration}]
+        """
+        if len(chunk) != len(translated_texts):
+            raise ValueError("⚠️ Số lượng entry gốc và entry đã dịch không khớp.")
+
+        return [
+            {
+                "text_translated": translated,
+                "start": entry.get("start"),
+                "duration": entry.get("duration")
+            }
+            for entry, translated in zip(chunk, translated_texts)
+        ]
     def mergeTranslatedTextToTranscript(self, transcript: List[Dict], merged_chunks: List[List[Dict]]) -> List[Dict]:
         """
         Cập nhật transcript gốc với trường text_translated từ danh sách các kết quả merge_chunk_translation.
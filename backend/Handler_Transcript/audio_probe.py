@@ -0,0 +1,299 @@
+import struct
+from typing import Optional, Tuple
+
+# Đọc thời lượng audio thẳng từ header container trong bộ nhớ (RIFF / Ogg / WebM / MP3),
+# không gọi ffmpeg và không giải mã PCM. Trả None khi không nhận ra định dạng để caller dùng ffmpeg.
+
+OPUS_SAMPLE_RATE = 48000
+
+# ---------------- RIFF / WAV ----------------
+
+def _riff_duration(data: bytes) -> Optional[float]:
+    if len(data) < 12 or data[8:12] != b"WAVE":
+        return None
+    byte_rate = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id, size = data[pos:pos + 4], struct.unpack_from("<I", data, pos + 4)[0]
+        body = pos + 8
+        if chunk_id == b"fmt " and body + 12 <= len(data):
+            byte_rate = struct.unpack_from("<I", data, body + 8)[0]
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            # Audio stream ghi size 0 / 0xFFFFFFFF khi chưa biết độ dài: lấy phần còn lại của buffer
+            available = len(data) - body
+            data_size = size if 0 < size <= available else available
+            return data_size / byte_rate
+        pos = body + size + (size & 1)
+    return None
+
+# ---------------- Ogg (Opus / Vorbis) ----------------
+
+def _ogg_first_packet(data: bytes) -> bytes:
+    segment_count = data[26]
+    body = 27 + segment_count
+    return data[body:body + sum(data[27:body])]
+
+def _ogg_duration(data: bytes) -> Optional[float]:
+    if len(data) < 28:
+        return None
+    head = _ogg_first_packet(data)
+    if head.startswith(b"OpusHead") and len(head) >= 12:
+        rate, pre_skip = OPUS_SAMPLE_RATE, struct.unpack_from("<H", head, 10)[0]
+    elif head.startswith(b"\x01vorbis") and len(head) >= 16:
+        rate, pre_skip = struct.unpack_from("<I", head, 12)[0], 0
+    else:
+        return None
+
+    # Granule position của trang cuối = tổng số sample; bỏ qua trang không kết thúc packet (-1)
+    pos = len(data)
+    while True:
+        pos = data.rfind(b"OggS", 0, pos)
+        if pos < 0:
+            return None
+        if pos + 14 <= len(data) and data[pos + 4] == 0:
+            granule = struct.unpack_from("<q", data, pos + 6)[0]
+            if granule >= 0:
+                return max(granule - pre_skip, 0) / rate if rate else None
+
+# ---------------- WebM / Matroska (EBML) ----------------
+
+EBML_HEADER = 0x1A45DFA3
+SEGMENT = 0x18538067
+INFO = 0x1549A966
+TIMECODE_SCALE = 0x2AD7B1
+DURATION = 0x4489
+TRACKS = 0x1654AE6B
+TRACK_ENTRY = 0xAE
+CODEC_ID = 0x86
+CLUSTER = 0x1F43B675
+CLUSTER_ID = CLUSTER.to_bytes(4, "big")
+CLUSTER_TIMECODE = 0xE7
+SIMPLE_BLOCK = 0xA3
+SIMPLE_BLOCK_ID = bytes([SIMPLE_BLOCK])
+BLOCK_GROUP = 0xA0
+BLOCK = 0xA1
+BLOCK_DURATION = 0x9B
+# Master element được đi vào bên trong (nên không cần biết kích thước, kể cả "unknown size" của live stream)
+WEBM_DESCEND = {SEGMENT, INFO, TRACKS, TRACK_ENTRY, CLUSTER, BLOCK_GROUP}
+
+# Thời lượng frame Opus (ms) theo config trong byte TOC (RFC 6716, mục 3.1)
+OPUS_FRAME_MS = [10, 20, 40, 60] * 3 + [10, 20] * 2 + [2.5, 5, 10, 20] * 4
+
+def _read_vint(data: bytes, pos: int, keep_marker: bool) -> Tuple[Optional[int], int]:
+    first = data[pos]
+    if first & 0x80 and first != 0xFF:
+        # Trường hợp phổ biến nhất (ID / kích thước 1 byte) đọc thẳng
+        return (first if keep_marker else first & 0x7F), pos + 1
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8 or pos + length > len(data):
+        raise ValueError("EBML vint không hợp lệ")
+    value = first if keep_marker else first & (0xFF >> length)
+    for byte in data[pos + 1:pos + length]:
+        value = (value << 8) | byte
+    # Kích thước toàn bit 1 = unknown size
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        value = None
+    return value, pos + length
+
+def _read_uint(data: bytes, pos: int, size: int) -> int:
+    return int.from_bytes(data[pos:pos + size], "big")
+
+def _opus_packet_ms(packet: bytes) -> float:
+    # Byte TOC: config (5 bit) cho thời lượng frame, code (2 bit) cho số frame trong packet
+    if not packet:
+        return 0.0
+    toc = packet[0]
+    code = toc & 0x03
+    frames = 1 if code == 0 else 2 if code in (1, 2) else (packet[1] & 0x3F if len(packet) > 1 else 1)
+    return OPUS_FRAME_MS[toc >> 3] * frames
+
+def _webm_walk(data: bytes, pos: int, state: dict, stop_at_cluster: bool = False) -> int:
+    """
+    Duyệt tuần tự element từ `pos`, cập nhật `state`. Với `stop_at_cluster` dừng ở Cluster
+    đầu tiên (header đã đọc xong) và trả về vị trí của nó.
+    """
+    try:
+        while pos < len(data):
+            element_start = pos
+            element_id, pos = _read_vint(data, pos, keep_marker=True)
+            size, pos = _read_vint(data, pos, keep_marker=False)
+            if element_id == CLUSTER and stop_at_cluster:
+                return element_start
+            if element_id in WEBM_DESCEND:
+                continue
+            if size is None or pos + size > len(data):
+                break
+            if element_id == TIMECODE_SCALE:
+                state["timecode_scale"] = _read_uint(data, pos, size)
+            elif element_id == DURATION and size in (4, 8):
+                state["duration"] = struct.unpack_from(">f" if size == 4 else ">d", data, pos)[0]
+            elif element_id == CODEC_ID:
+                state["is_opus"] = data[pos:pos + size].startswith(b"A_OPUS")
+            elif element_id == CLUSTER_TIMECODE:
+                state["cluster_timecode"] = _read_uint(data, pos, size)
+            elif element_id in (SIMPLE_BLOCK, BLOCK):
+                # Block audio theo thứ tự thời gian: chỉ cần giải mã block cuối sau khi duyệt xong
+                state["last_block"] = (pos, size, state["cluster_timecode"], None)
+            elif element_id == BLOCK_DURATION and state["last_block"] is not None:
+                state["last_block"] = state["last_block"][:3] + (_read_uint(data, pos, size),)
+            pos += size
+    except (ValueError, IndexError, struct.error):
+        pass
+    return len(data)
+
+def _last_cluster(data: bytes, first_cluster: int) -> int:
+    # ID Cluster có thể trùng ngẫu nhiên trong dữ liệu audio: chỉ nhận khi con đầu tiên là Timecode
+    pos = len(data)
+    while True:
+        pos = data.rfind(CLUSTER_ID, first_cluster + 1, pos)
+        if pos < 0:
+            return first_cluster
+        try:
+            _, child = _read_vint(data, pos + len(CLUSTER_ID), keep_marker=False)
+            if data[child] == CLUSTER_TIMECODE:
+                return pos
+        except (ValueError, IndexError):
+            pass
+
+def _trailing_block(data: bytes, cluster: int) -> Optional[Tuple[int, int, int]]:
+    """
+    SimpleBlock kết thúc đúng cuối buffer (audio stream không có Cues phía sau), tìm ngược từ cuối
+    để khỏi duyệt cả Cluster. Returns: (vị trí dữ liệu block, kích thước, timecode Cluster) hoặc None.
+    """
+    try:
+        _, pos = _read_vint(data, cluster, keep_marker=True)
+        _, pos = _read_vint(data, pos, keep_marker=False)
+        child_id, pos = _read_vint(data, pos, keep_marker=True)
+        child_size, pos = _read_vint(data, pos, keep_marker=False)
+        if child_id != CLUSTER_TIMECODE or child_size is None:
+            return None
+        cluster_timecode = _read_uint(data, pos, child_size)
+    except (ValueError, IndexError):
+        return None
+
+    pos = len(data)
+    while True:
+        pos = data.rfind(SIMPLE_BLOCK_ID, cluster, pos)
+        if pos < 0:
+            return None
+        try:
+            size, body = _read_vint(data, pos + 1, keep_marker=False)
+        except (ValueError, IndexError):
+            continue
+        # Track number 1 byte + cờ keyframe (mọi block audio WebM đều là keyframe)
+        if size is not None and body + size == len(data) and size > 4 and data[body] & 0x80 and data[body + 3] & 0x80:
+            return body, size, cluster_timecode
+
+def _webm_duration(data: bytes) -> Optional[float]:
+    state = {
+        "timecode_scale": 1_000_000,    # ns mỗi đơn vị timecode (mặc định Matroska)
+        "is_opus": False,
+        "duration": None,
+        "cluster_timecode": 0,
+        "last_block": None,             # (vị trí, kích thước, timecode Cluster, BlockDuration) của block cuối
+    }
+    first_cluster = _webm_walk(data, 0, state, stop_at_cluster=True)
+    if state["duration"]:
+        return state["duration"] * state["timecode_scale"] / 1e9
+    # Audio stream (Azure) không ghi Duration: chỉ cần duyệt Cluster cuối để lấy block kết thúc muộn nhất
+    if first_cluster < len(data):
+        last_cluster = _last_cluster(data, first_cluster)
+        trailing = _trailing_block(data, last_cluster)
+        if trailing is not None:
+            state["last_block"] = trailing + (None,)
+        else:
+            _webm_walk(data, last_cluster, state)
+    if state["last_block"] is None:
+        return None
+
+    pos, size, cluster_timecode, block_duration = state["last_block"]
+    try:
+        _, frame = _read_vint(data, pos, keep_marker=False)
+        timestamp = cluster_timecode + struct.unpack_from(">h", data, frame)[0]
+        laced = data[frame + 2] & 0x06
+    except (ValueError, IndexError, struct.error):
+        return None
+    if block_duration is not None:
+        end = timestamp + block_duration
+    elif state["is_opus"] and not laced:
+        end = timestamp + _opus_packet_ms(data[frame + 3:pos + size]) * 1e6 / state["timecode_scale"]
+    else:
+        end = timestamp
+    return end * state["timecode_scale"] / 1e9
+
+# ---------------- MP3 ----------------
+
+MP3_BITRATES_KBPS = {
+    # (MPEG1?, layer) -> bảng bitrate theo index
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+def _mp3_duration(data: bytes) -> Optional[float]:
+    pos = 0
+    if data.startswith(b"ID3") and len(data) >= 10:
+        # Kích thước tag ID3v2 là số syncsafe (7 bit mỗi byte)
+        tag_size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        pos = 10 + tag_size + (10 if data[5] & 0x10 else 0)
+
+    # Tìm frame header hợp lệ đầu tiên
+    while pos + 4 <= len(data):
+        if data[pos] == 0xFF and data[pos + 1] & 0xE0 == 0xE0:
+            header = struct.unpack_from(">I", data, pos)[0]
+            version, layer = (header >> 19) & 0x03, 4 - ((header >> 17) & 0x03)
+            bitrate_index, rate_index = (header >> 12) & 0x0F, (header >> 10) & 0x03
+            if version != 1 and layer != 4 and 0 < bitrate_index < 15 and rate_index != 3:
+                break
+        pos += 1
+    else:
+        return None
+
+    mpeg1 = version == 3
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    bitrate = MP3_BITRATES_KBPS[(mpeg1, layer)][bitrate_index] * 1000
+    samples_per_frame = 384 if layer == 1 else 1152 if layer == 2 or mpeg1 else 576
+
+    # VBR: header Xing / Info (sau side info) hoặc VBRI ghi sẵn số frame
+    mono = (header >> 6) & 0x03 == 3
+    side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+    xing = pos + 4 + side_info
+    try:
+        if data[xing:xing + 4] in (b"Xing", b"Info") and struct.unpack_from(">I", data, xing + 4)[0] & 0x01:
+            return struct.unpack_from(">I", data, xing + 8)[0] * samples_per_frame / sample_rate
+        if data[pos + 36:pos + 40] == b"VBRI":
+            return struct.unpack_from(">I", data, pos + 50)[0] * samples_per_frame / sample_rate
+    except struct.error:
+        # Header VBR bị cắt cụt: không đủ thông tin, để bên gọi giải mã bằng ffmpeg
+        return None
+
+    # CBR: số byte audio / bitrate
+    end = len(data) - 128 if data[-128:-125] == b"TAG" else len(data)
+    return (end - pos) * 8 / bitrate
+
+# ---------------- API ----------------
+
+def probe_duration(data: bytes) -> Optional[float]:
+    """
+    Thời lượng (giây) của audio trong buffer, đọc từ header container theo magic bytes.
+
+    Returns:
+        Optional[float]: None nếu không nhận ra định dạng hoặc header không đủ thông tin.
+    """
+    if data.startswith(b"RIFF"):
+        return _riff_duration(data)
+    if data.startswith(b"OggS"):
+        return _ogg_duration(data)
+    if data.startswith(b"\x1a\x45\xdf\xa3"):
+        return _webm_duration(data)
+    if data.startswith(b"ID3") or (len(data) > 1 and data[0] == 0xFF and data[1] & 0xE0 == 0xE0):
+        return _mp3_duration(data)
+    return None
@@ -0,0 +1,109 @@
+import struct
+import numpy as np
+from typing import List, Dict, Tuple, Union
+
+# Định dạng nhị phân: [magic][số entry] + start (float64) + duration (float64) + offset (int64, n+1) + text UTF-8
+COMPACT_MAGIC = b"CTR1"
+_HEADER = struct.Struct("<4sI")
+
+
+class CompactTranscript:
+    """
+    Transcript dạng cột cho video dài: start / duration là mảng float64, toàn bộ text nằm
+    chung một buffer UTF-8 và được định vị bằng mảng offset.
+
+    `view()` / `split()` chỉ cắt view trên cùng mảng và buffer (không sao chép), `to_bytes()` /
+    `from_bytes()` ghi / đọc định dạng nhị phân gọn để lưu Redis thay cho JSON.
+    """
+
+    __slots__ = ("starts", "durations", "offsets", "buffer")
+
+    def __init__(self, starts: np.ndarray, durations: np.ndarray, offsets: np.ndarray, buffer: Union[bytes, memoryview]):
+        self.starts = starts
+        self.durations = durations
+        self.offsets = offsets    # n + 1 vị trí byte trong buffer, entry i là buffer[offsets[i]:offsets[i + 1]]
+        self.buffer = buffer
+
+    @classmethod
+    def from_entries(cls, entries: List[Dict], text_key: str = "text") -> "CompactTranscript":
+        """
+        Tạo từ danh sách entry [{text, start, duration}, ...]; start / duration thiếu hoặc None được ghi NaN.
+        """
+        encoded = [(entry.get(text_key) or "").encode("utf-8") for entry in entries]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in encoded], out=offsets[1:])
+        return cls(
+            starts=np.array([entry.get("start") for entry in entries], dtype=np.float64),
+            durations=np.array([entry.get("duration") for entry in entries], dtype=np.float64),
+            offsets=offsets,
+            buffer=b"".join(encoded),
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def text(self, index: int) -> str:
+        return bytes(self.buffer[self.offsets[index]:self.offsets[index + 1]]).decode("utf-8")
+
+    def texts(self) -> List[str]:
+        # Copy phần buffer của view một lần rồi cắt theo offset
+        base = int(self.offsets[0])
+        data = bytes(self.buffer[base:int(self.offsets[-1])])
+        bounds = (self.offsets - base).tolist()
+        return [data[begin:end].decode("utf-8") for begin, end in zip(bounds, bounds[1:])]
+
+    def view(self, start: int, stop: int) -> "CompactTranscript":
+        return CompactTranscript(self.starts[start:stop], self.durations[start:stop], self.offsets[start:stop + 1], self.buffer)
+
+    def to_entries(self, text_key: str = "text") -> List[Dict]:
+        return [
+            {text_key: text, "start": start, "duration": duration}
+            for text, start, duration in zip(self.texts(), self.starts.tolist(), self.durations.tolist())
+        ]
+
+    def split(self, video_id: str, max_chars: int = 400, max_items: int = 10) -> List[Tuple[str, "CompactTranscript"]]:
+        """
+        Chia thành các chunk giống `Handler.split_transcript` nhưng trả về view thay vì list entry.
+
+        Returns:
+            List[Tuple[str, CompactTranscript]]: (chunk_id dạng {video_id}_{start}, view của chunk).
+        """
+        lengths = [len(text.strip()) for text in self.texts()]
+        starts = self.starts.tolist()
+        chunks = []
+        chunk_begin, chunk_len = 0, 0
+        for i, sentence_len in enumerate(lengths):
+            if i > chunk_begin and (chunk_len + sentence_len > max_chars or i - chunk_begin >= max_items):
+                chunks.append((f"{video_id}_{starts[chunk_begin]}", self.view(chunk_begin, i)))
+                chunk_begin, chunk_len = i, 0
+            chunk_len += sentence_len + 1
+        if len(self) > chunk_begin:
+            chunks.append((f"{video_id}_{starts[chunk_begin]}", self.view(chunk_begin, len(self))))
+        return chunks
+
+    def to_bytes(self) -> bytes:
+        base = int(self.offsets[0])
+        return b"".join([
+            _HEADER.pack(COMPACT_MAGIC, len(self)),
+            self.starts.astype("<f8").tobytes(),
+            self.durations.astype("<f8").tobytes(),
+            (self.offsets - base).astype("<i8").tobytes(),
+            bytes(self.buffer[base:int(self.offsets[-1])]),
+        ])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CompactTranscript":
+        # Mảng đọc thẳng trên buffer (np.frombuffer), không sao chép
+        magic, count = _HEADER.unpack_from(data)
+        if magic != COMPACT_MAGIC:
+            raise ValueError("Dữ liệu không phải CompactTranscript.")
+        view = memoryview(data)
+        position = _HEADER.size
+        starts = np.frombuffer(view, dtype="<f8", count=count, offset=position)
+        position += 8 * count
+        durations = np.frombuffer(view, dtype="<f8", count=count, offset=position)
+        position += 8 * count
+        offsets = np.frombuffer(view, dtype="<i8", count=count + 1, offset=position)
+        position += 8 * (count + 1)
+        return cls(starts, durations, offsets, view[position:])
+
@@ -1,12 +1,42 @@
 import os
+import threading
+import numpy as np
 import azure.cognitiveservices.speech as speechsdk
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, Union
 from io import BytesIO
 from dotenv import load_dotenv
+from Handler_Transcript.compact_transcript import CompactTranscript
+from fake_backends.config import fake_enabled
+from Text_To_Speech.synthesizer_pool import SynthesizerPool
 import logging
 
 load_dotenv()
 
+# Nhãn prosody rate cho mọi % có thể có sau khi giới hạn trong [-30, 50]
+RATE_LABELS = {rate: f"{'+' if rate > 0 else ''}{rate}%" for rate in range(-30, 51)}
+# Bookmark SSML đánh dấu đầu / cuối segment i, dùng để đo thời lượng đọc thực tế
+BOOKMARK_START = "s"
+BOOKMARK_END = "e"
+# Azure tính audio_offset theo đơn vị 100 ns
+TICKS_PER_SECOND = 10_000_000
+# Azure cắt thẻ <break> dài hơn 5 giây về 5 giây
+MAX_BREAK_MS = 5000
+
+OUTPUT_FORMATS = {
+    "mp3": speechsdk.SpeechSynthesisOutputFormat.Audio16Khz32KBitRateMonoMp3,
+    "wav": speechsdk.SpeechSynthesisOutputFormat.Riff16Khz16BitMonoPcm,
+    "webm": speechsdk.SpeechSynthesisOutputFormat.Webm16Khz16BitMonoOpus,
+    "ogg": speechsdk.SpeechSynthesisOutputFormat.Ogg16Khz16BitMonoOpus
+}
+
+
+def rate_label(rate_percent: int) -> str:
+    return RATE_LABELS.get(rate_percent) or f"{'+' if rate_percent > 0 else ''}{rate_percent}%"
+
+
+def parse_rate(label: str) -> int:
+    return int(label.rstrip("%"))
+
 class TextToSpeechModule:
     """
     Module TTS được tối ưu cho lồng tiếng video YouTube
@@ -30,6 +60,27 @@ class TextToSpeechModule:
         self.output_format = output_format
         self._set_output_format(output_format)
         self.logger = logging.getLogger(__name__)
+        self._init_shared_state()
+
+    def _init_shared_state(self):
+        # Module giả (fake_backends) cũng gọi hàm này để for_format / warm_up chạy cùng một đường
+        self._format_modules: Dict[str, "TextToSpeechModule"] = {}
+        # Pool SpeechSynthesizer theo định dạng audio (mặc định chỉ có định dạng của module)
+        self._synthesizer_pools: Dict[speechsdk.SpeechSynthesisOutputFormat, SynthesizerPool] = {}
+        self._synthesizer_pools_lock = threading.Lock()
+
+    def for_format(self, output_format: str) -> "TextToSpeechModule":
+        # Module cùng key / region / giọng đọc nhưng khác định dạng đầu ra (vd. PCM để ghép audio)
+        if output_format == self.output_format:
+            return self
+        # Các luồng TTS gọi đồng thời: kiểm tra và tạo trong cùng một lock để không tạo trùng module / pool
+        with self._synthesizer_pools_lock:
+            module = self._format_modules.get(output_format)
+            if module is None:
+                module = type(self)(region=self.region, text_to_speech_key=self.key,
+                                    output_format=output_format, voice=self.voice)
+                self._format_modules[output_format] = module
+            return module
 
     def _safe_strip(self, value: Optional[str]) -> str:
         return value.strip() if isinstance(value, str) else ""
@@ -37,83 +88,147 @@ class TextToSpeechModule:
     def _set_output_format(self, output_format: str):
         if self.current_format == output_format:
             return
-        
-        format_map = {
-            "mp3": speechsdk.SpeechSynthesisOutputFormat.Audio16Khz32KBitRateMonoMp3,
-            "wav": speechsdk.SpeechSynthesisOutputFormat.Riff16Khz16BitMonoPcm,
-            "webm": speechsdk.SpeechSynthesisOutputFormat.Webm16Khz16BitMonoOpus,
-            "ogg": speechsdk.SpeechSynthesisOutputFormat.Ogg16Khz16BitMonoOpus
-        }
 
-        if output_format not in format_map:
-            raise ValueError(f"Unsupported output format: {output_format}. Supported: {list(format_map.keys())}")
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}. Supported: {list(OUTPUT_FORMATS.keys())}")
 
-        self.speech_config.set_speech_synthesis_output_format(format_map[output_format])
+        self.speech_config.set_speech_synthesis_output_format(OUTPUT_FORMATS[output_format])
         self.current_format = output_format
 
-    def calculate_rate_global(self, segments: List[Dict]) -> List[str]:
-        if not segments:
+    def _synthesizer_pool(self, audio_format: Optional[speechsdk.SpeechSynthesisOutputFormat] = None) -> SynthesizerPool:
+        audio_format = audio_format or OUTPUT_FORMATS[self.output_format]
+        with self._synthesizer_pools_lock:
+            pool = self._synthesizer_pools.get(audio_format)
+            if pool is None:
+                speech_config = self.speech_config
+                if audio_format != OUTPUT_FORMATS[self.output_format]:
+                    # SpeechConfig riêng để không đổi định dạng của các synthesizer đang dùng chung
+                    speech_config = speechsdk.SpeechConfig(subscription=self.key, region=self.region)
+                    speech_config.set_speech_synthesis_output_format(audio_format)
+                pool = SynthesizerPool(speech_config)
+                self._synthesizer_pools[audio_format] = pool
+            return pool
+
+    def warm_up(self, count: int) -> int:
+        # Mở trước `count` kết nối tới Azure (gọi khi worker khởi động), trả về số synthesizer sẵn sàng
+        return self._synthesizer_pool().warm_up(count)
+
+    def segment_columns(self, segments: Union[List[Dict], CompactTranscript]) -> Tuple[List[str], np.ndarray, np.ndarray, float]:
+        """
+        Duyệt segment một lần: kiểm tra, strip text và tách start / duration thành mảng.
+        CompactTranscript (text là bản dịch) đã ở dạng cột nên dùng thẳng các mảng của nó.
+
+        Returns:
+            (texts, starts, durations, total_duration): start thiếu được ghi NaN.
+        """
+        if not len(segments):
             raise ValueError("Segments list cannot be empty")
 
+        if isinstance(segments, CompactTranscript):
+            invalid = np.flatnonzero(~(segments.durations > 0))
+            if invalid.size:
+                raise ValueError(f"Segment {invalid[0]} has invalid duration: {segments.durations[invalid[0]]}")
+            durations = segments.durations.astype(np.float64)
+            return ([text.strip() for text in segments.texts()], segments.starts.astype(np.float64),
+                    durations, sum(durations.tolist()))
+
+        texts, starts, durations = [], [], []
         for i, seg in enumerate(segments):
-            if not all(key in seg for key in ['text_translated', 'duration']):
+            if 'text_translated' not in seg or 'duration' not in seg:
                 raise ValueError(f"Segment {i} missing keys: 'text_translated', 'duration'")
             if seg['duration'] <= 0:
                 raise ValueError(f"Segment {i} has invalid duration: {seg['duration']}")
-
-        total_chars = sum(len(self._safe_strip(seg.get('text_translated'))) for seg in segments)
-        total_duration = sum(seg['duration'] for seg in segments)
+            texts.append(self._safe_strip(seg['text_translated']))
+            starts.append(seg.get('start', np.nan))
+            durations.append(seg['duration'])
+        # sum() tuần tự như bản cũ để avg_cps (và % làm tròn) giống hệt từng bit
+        total_duration = sum(durations)
+        return texts, np.asarray(starts, dtype=np.float64), np.asarray(durations, dtype=np.float64), total_duration
+
+    def compute_rates(self, texts: List[str], durations: np.ndarray, total_duration: float) -> List[str]:
+        # Mọi segment được tính cùng lúc bằng phép toán mảng, biểu thức giữ đúng thứ tự phép tính của bản vòng lặp
+        text_lens = np.fromiter(map(len, texts), dtype=np.float64, count=len(texts))
+        total_chars = int(text_lens.sum())
 
         if total_duration == 0 or total_chars == 0:
             self.logger.warning("Zero total duration or character count, using default rates")
-            return ["0%"] * len(segments)
+            return ["0%"] * len(texts)
 
         avg_cps = total_chars / total_duration
         self.default_cps = avg_cps
-        rates = []
-
-        for seg in segments:
-            text_len = len(self._safe_strip(seg.get('text_translated')))
-            if text_len == 0:
-                rates.append("0%")
-                continue
 
-            seg_cps = text_len / seg['duration']
-            smooth_cps = seg_cps * 0.7 + avg_cps * 0.3
-            rate_factor = seg['duration'] / (text_len / smooth_cps)
-            rate_percent = round((rate_factor - 1) * 100)
-            rate_percent = max(-30, min(50, rate_percent))
-            rates.append(f"{'+' if rate_percent > 0 else ''}{rate_percent}%")
-
-        return rates
-
-    def generate_ssml(self, segments: List[Dict]) -> str:
-        if not segments:
+        has_text = text_lens > 0
+        safe_lens = np.where(has_text, text_lens, 1.0)
+        seg_cps = safe_lens / durations
+        smooth_cps = seg_cps * 0.7 + avg_cps * 0.3
+        rate_factor = durations / (safe_lens / smooth_cps)
+        rate_percent = np.clip(np.round((rate_factor - 1) * 100), -30, 50).astype(np.int64)
+        rate_percent = np.where(has_text, rate_percent, 0)
+        return [RATE_LABELS[rate] for rate in rate_percent.tolist()]
+
+    def calculate_rate_global(self, segments: Union[List[Dict], CompactTranscript]) -> List[str]:
+        texts, _, durations, total_duration = self.segment_columns(segments)
+        return self.compute_rates(texts, durations, total_duration)
+
+    @staticmethod
+    def _compute_gaps_ms(starts: np.ndarray, durations: np.ndarray) -> List[int]:
+        # Khoảng lặng (ms) giữa segment i và i+1, 0 nếu ngoài khoảng (0.3s, 5s)
+        current_ends = (np.nan_to_num(starts, nan=0.0) + durations)[:-1]
+        next_starts = starts[1:]
+        gaps = np.where(np.isnan(next_starts), current_ends, next_starts) - current_ends
+        return np.where((gaps > 0.3) & (gaps < 5.0), gaps * 1000, 0).astype(np.int64).tolist()
+
+    def generate_ssml(self, segments: Union[List[Dict], CompactTranscript],
+                      rate_overrides: Optional[Dict[int, str]] = None, bookmarks: bool = False) -> str:
+        """
+        Args:
+            rate_overrides: {index segment: nhãn rate} thay cho rate ước lượng (dùng khi căn lại thời lượng).
+            bookmarks: chèn bookmark s{i} / e{i} quanh segment i để đo thời điểm đọc thực tế.
+        """
+        return self.generate_ssml_with_rates(segments, rate_overrides, bookmarks)[0]
+
+    def generate_ssml_with_rates(self, segments: Union[List[Dict], CompactTranscript],
+                                 rate_overrides: Optional[Dict[int, str]] = None,
+                                 bookmarks: bool = False) -> Tuple[str, List[str]]:
+        if not len(segments):
             raise ValueError("Segments cannot be empty")
 
-        rates = self.calculate_rate_global(segments)
-        ssml_parts = [
-            f'<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" '
-            f'xmlns:mstts="http://www.w3.org/2001/mstts" xml:lang="vi-VN">',
-            f'<voice name="{self.voice}">'
-        ]
+        # Strip text và đo độ dài một lần, dùng chung cho tính tốc độ, khoảng lặng và dựng SSML
+        texts, starts, durations, total_duration = self.segment_columns(segments)
+        rates = self.compute_rates(texts, durations, total_duration)
+        for index, rate in (rate_overrides or {}).items():
+            rates[index] = rate
+        gaps_ms = self._compute_gaps_ms(starts, durations)
+
+        ssml_parts = self._ssml_head()
 
-        first_start = segments[0].get('start', 0.0)
+        first_start = 0.0 if np.isnan(starts[0]) else starts[0]
         if first_start > 0.1:
             ssml_parts.append(f'<break time="{int(first_start * 1000)}ms"/>')
 
-        for i, (seg, rate) in enumerate(zip(segments, rates)):
-            text = self._escape_xml(self._safe_strip(seg.get('text_translated')))
+        for i, (text, rate, gap_ms) in enumerate(zip(texts, rates, gaps_ms + [0])):
             if text:
-                ssml_parts.append(f'<prosody rate="{rate}">{text}</prosody>')
+                prosody = f'<prosody rate="{rate}">{self._escape_xml(text)}</prosody>'
+                if bookmarks:
+                    prosody = f'<bookmark mark="{BOOKMARK_START}{i}"/>{prosody}<bookmark mark="{BOOKMARK_END}{i}"/>'
+                ssml_parts.append(prosody)
+            if gap_ms:
+                ssml_parts.append(f'<break time="{gap_ms}ms"/>')
 
-            if i < len(segments) - 1:
-                current_end = seg.get('start', 0) + seg.get('duration', 0)
-                next_start = segments[i+1].get('start', current_end)
-                gap = next_start - current_end
-                if 0.3 < gap < 5.0:
-                    ssml_parts.append(f'<break time="{int(gap * 1000)}ms"/>')
+        ssml_parts.extend(['</voice>', '</speak>'])
+        return "\n".join(ssml_parts), rates
 
+    def _ssml_head(self) -> List[str]:
+        return [
+            f'<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" '
+            f'xmlns:mstts="http://www.w3.org/2001/mstts" xml:lang="vi-VN">',
+            f'<voice name="{self.voice}">'
+        ]
+
+    def segment_ssml(self, text: str, rate: str) -> str:
+        # SSML cho một segment riêng lẻ, không có khoảng lặng (do bước ghép audio chèn)
+        ssml_parts = self._ssml_head()
+        ssml_parts.append(f'<prosody rate="{rate}">{self._escape_xml(text)}</prosody>')
         ssml_parts.extend(['</voice>', '</speak>'])
         return "\n".join(ssml_parts)
 
@@ -126,36 +241,51 @@ class TextToSpeechModule:
 
     def ssml_to_bytesio(self, ssml_text: str,
                         audio_format: Optional[speechsdk.SpeechSynthesisOutputFormat] = None) -> Optional[BytesIO]:
+        synthesized = self.synthesize_with_timing(ssml_text, audio_format)
+        return synthesized[0] if synthesized else None
+
+    def synthesize_with_timing(self, ssml_text: str,
+                               audio_format: Optional[speechsdk.SpeechSynthesisOutputFormat] = None
+                               ) -> Optional[Tuple[BytesIO, Dict[str, float], Optional[float]]]:
+        """
+        Tổng hợp SSML và ghi lại thời điểm (giây, tính từ đầu audio) của mọi bookmark trong SSML.
+
+        Returns:
+            Optional[Tuple[BytesIO, Dict[str, float], Optional[float]]]: (audio, {mark: offset}, thời lượng
+            audio do Azure báo - None nếu SDK không có), None nếu TTS thất bại.
+        """
         if not ssml_text.strip():
             raise ValueError("SSML text cannot be empty")
+        marks = {}
 
         try:
-            if audio_format and audio_format != getattr(self.speech_config, '_output_format', None):
-                self.speech_config.set_speech_synthesis_output_format(audio_format)
-
-            synthesizer = speechsdk.SpeechSynthesizer(
-                speech_config=self.speech_config, audio_config=None
-            )
-
-            result = synthesizer.speak_ssml_async(ssml_text).get()
-
-            if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-                if not result.audio_data:
-                    self.logger.error("Audio data is empty")
+            with self._synthesizer_pool(audio_format).acquire() as pooled:
+                pooled.synthesizer.bookmark_reached.connect(
+                    lambda evt: marks.__setitem__(evt.text, evt.audio_offset / TICKS_PER_SECOND)
+                )
+
+                result = pooled.synthesizer.speak_ssml_async(ssml_text).get()
+
+                if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
+                    if not result.audio_data:
+                        self.logger.error("Audio data is empty")
+                        return None
+                    audio_bytes = BytesIO(result.audio_data)
+                    audio_bytes.seek(0)
+                    self.logger.info(f"TTS completed successfully, audio size: {len(result.audio_data)} bytes")
+                    audio_duration = getattr(result, "audio_duration", None)
+                    return audio_bytes, marks, audio_duration.total_seconds() if audio_duration else None
+
+                # Kết nối của synthesizer bị hủy / lỗi có thể đã hỏng: không trả lại pool
+                pooled.broken = True
+                if result.reason == speechsdk.ResultReason.Canceled:
+                    details = result.cancellation_details
+                    msg = f"TTS canceled: {details.reason}, Details: {details.error_details}"
+                    self.logger.error(msg)
                     return None
-                audio_bytes = BytesIO(result.audio_data)
-                audio_bytes.seek(0)
-                self.logger.info(f"TTS completed successfully, audio size: {len(result.audio_data)} bytes")
-                return audio_bytes
-
-            elif result.reason == speechsdk.ResultReason.Canceled:
-                details = result.cancellation_details
-                msg = f"TTS canceled: {details.reason}, Details: {details.error_details}"
-                self.logger.error(msg)
-                return None
 
-            self.logger.error(f"Unexpected TTS result: {result.reason}")
-            return None
+                self.logger.error(f"Unexpected TTS result: {result.reason}")
+                return None
 
         except Exception as e:
             self.logger.error(f"TTS synthesis failed: {str(e)}", exc_info=True)
@@ -224,3 +354,25 @@ class TextToSpeechModule:
         rate_factor = 1 + (rate_percent / 100)
         return base_duration / rate_factor if rate_factor > 0 else base_duration
 
+
+_tts_modules: Dict[Tuple[str, str], TextToSpeechModule] = {}
+_tts_modules_lock = threading.Lock()
+
+
+def create_tts_module(voice: str = "vi-VN-HoaiMyNeural", output_format: str = "mp3") -> TextToSpeechModule:
+    """
+    Module TTS dùng chung trong tiến trình theo (giọng đọc, định dạng), để pool synthesizer
+    và kết nối tới Azure được giữ lại giữa các request.
+    """
+    key = (voice, output_format)
+    with _tts_modules_lock:
+        module = _tts_modules.get(key)
+        if module is None:
+            # FAKE_BACKENDS có "tts": dùng module giả, không cần key Azure
+            if fake_enabled("tts"):
+                from fake_backends.tts import FakeTextToSpeechModule
+                module = FakeTextToSpeechModule(voice=voice, output_format=output_format)
+            else:
+                module = TextToSpeechModule(voice=voice, output_format=output_format)
+            _tts_modules[key] = module
+        return module
@@ -0,0 +1,160 @@
+import os
+import math
+from io import BytesIO
+from typing import List, Dict, Optional, Tuple, Union
+from loguru import logger
+from Handler_Transcript.Handler_Transcript import Handler
+from Handler_Transcript.compact_transcript import CompactTranscript
+from Text_To_Speech.TextToSpeech import BOOKMARK_START, BOOKMARK_END, rate_label, parse_rate
+from Text_To_Speech.pcm import PCM_FORMAT, decode_to_pcm, encode_pcm, pcm_seconds, synthesize_segment
+from monitoring.metrics import span
+
+# Cấu hình căn thời lượng audio (có thể ghi đè bằng biến môi trường)
+ALIGN_TOLERANCE = float(os.getenv("ALIGN_TOLERANCE", 0.15))    # giây được phép đọc quá slot của segment
+ALIGN_MAX_RATE = int(os.getenv("ALIGN_MAX_RATE", 100))          # % tốc độ tối đa khi đọc nhanh lại
+ALIGN_MAX_PASSES = int(os.getenv("ALIGN_MAX_PASSES", 1))        # số lần tổng hợp lại tối đa
+
+
+def measure_segments(marks: Dict[str, float], count: int) -> List[Optional[Tuple[float, float]]]:
+    """
+    (offset, thời lượng đọc) thực tế của từng segment, đo từ bookmark s{i} / e{i};
+    None với segment không có text hoặc Azure không báo bookmark.
+    """
+    timings = []
+    for i in range(count):
+        start, end = marks.get(f"{BOOKMARK_START}{i}"), marks.get(f"{BOOKMARK_END}{i}")
+        timings.append((start, end - start) if start is not None and end is not None else None)
+    return timings
+
+
+def is_overrun(timing: Optional[Tuple[float, float]], duration: float) -> bool:
+    return timing is not None and timing[1] > duration + ALIGN_TOLERANCE
+
+
+def overrun_corrections(timings: List[Optional[Tuple[float, float]]], durations: List[float],
+                        rates: List[str]) -> Dict[int, str]:
+    # Segment đọc quá slot: tăng rate theo tỉ lệ thời lượng đo được / slot, các segment khác giữ nguyên
+    corrections = {}
+    for i, timing in enumerate(timings):
+        if not is_overrun(timing, durations[i]):
+            continue
+        current = parse_rate(rates[i])
+        factor = (1 + current / 100) * timing[1] / durations[i]
+        corrected = min(ALIGN_MAX_RATE, math.ceil((factor - 1) * 100))
+        if corrected > current:
+            corrections[i] = rate_label(corrected)
+    return corrections
+
+
+def measure_audio_duration(audio: BytesIO, output_format: str) -> Optional[float]:
+    try:
+        return Handler().get_audio_duration_from_bytesio(BytesIO(audio.getvalue()), format=output_format)
+    except Exception as e:
+        logger.warning(f"⚠️ [Align] Không đo được thời lượng audio: {e}")
+        return None
+
+
+def splice_corrections(tts, audio_cache, audio: BytesIO, texts: List[str], timings: List[Optional[Tuple[float, float]]],
+                       durations: List[float], rates: List[str], corrections: Dict[int, str], max_passes: int
+                       ) -> Optional[Tuple[BytesIO, List[Optional[Tuple[float, float]]], float, int]]:
+    """
+    Tổng hợp lại riêng các segment đọc quá slot (ra PCM) rồi ghép đè lên đúng đoạn của segment đó trong
+    audio của chunk; phần phía sau dịch lên theo độ chênh thời lượng, giống như khi đọc lại cả SSML với rate mới.
+    `rates` được cập nhật theo rate đã dùng.
+
+    Returns:
+        (audio, timings, thời lượng audio, số lần tổng hợp), None nếu không giải mã được audio của chunk
+        hoặc không segment nào tổng hợp lại được.
+    """
+    pcm_tts = tts.for_format(PCM_FORMAT)
+    timings = list(timings)
+    pcm, params, passes = None, None, 1
+    while corrections and passes <= max_passes:
+        segment_audio = {i: synthesize_segment(pcm_tts, audio_cache, texts[i], rate) for i, rate in corrections.items()}
+        segment_audio = {i: output for i, output in segment_audio.items() if output is not None}
+        if not segment_audio:
+            break
+        if pcm is None:
+            params = next(iter(segment_audio.values()))[1:]
+            try:
+                pcm = decode_to_pcm(audio.getvalue(), tts.output_format, *params)
+            except Exception as e:
+                logger.warning(f"⚠️ [Align] Không giải mã được audio của chunk để ghép segment: {e}")
+                return None
+        sample_rate, sample_width, channels = params
+        frame_size = sample_width * channels
+        passes += 1
+        # Ghép từ segment cuối lên để offset đo được của các segment phía trước vẫn đúng
+        for i in sorted(segment_audio, reverse=True):
+            if tuple(segment_audio[i][1:]) != params:
+                continue
+            offset, spoken = timings[i]
+            start_byte = round(offset * sample_rate) * frame_size
+            end_byte = round((offset + spoken) * sample_rate) * frame_size
+            pcm = pcm[:start_byte] + segment_audio[i][0] + pcm[end_byte:]
+            new_spoken = pcm_seconds(segment_audio[i])
+            timings[i] = (offset, new_spoken)
+            timings[i + 1:] = [(t[0] + new_spoken - spoken, t[1]) if t else None for t in timings[i + 1:]]
+            rates[i] = corrections[i]
+        corrections = overrun_corrections(timings, durations, rates)
+
+    if pcm is None:
+        return None
+    sample_rate, sample_width, channels = params
+    with span("tts.encode", segments=len(texts)):
+        audio_bytes = encode_pcm(pcm, sample_rate, sample_width, channels, tts.output_format)
+    return BytesIO(audio_bytes), timings, len(pcm) / (sample_rate * sample_width * channels), passes
+
+
+def synthesize_aligned(tts, audio_cache, segments: Union[List[Dict], CompactTranscript],
+                       max_passes: int = ALIGN_MAX_PASSES) -> Optional[Tuple[BytesIO, Dict]]:
+    """
+    Tổng hợp cả chunk bằng một SSML rồi đo thời lượng đọc thực tế của từng segment (bookmark SSML).
+    Segment nào đọc quá slot thì chỉ segment đó được tính lại rate từ số đo, tổng hợp lại riêng và
+    ghép vào audio của chunk, tối đa `max_passes` lần.
+
+    Returns:
+        Optional[Tuple[BytesIO, Dict]]: (audio, timing) với timing gồm thời lượng audio và offset
+        (giây, tính từ đầu audio) / thời lượng đọc của từng segment; None nếu TTS thất bại.
+    """
+    texts, starts, durations, _ = tts.segment_columns(segments)
+    durations = durations.tolist()
+    with span("tts.ssml", segments=len(durations)):
+        ssml, rates = tts.generate_ssml_with_rates(segments, bookmarks=True)
+    synthesized = audio_cache.get_or_synthesize_timed(tts, ssml)
+    if synthesized is None:
+        return None
+    audio, marks, audio_duration = synthesized
+    timings = measure_segments(marks, len(durations))
+    passes = 1
+
+    corrections = overrun_corrections(timings, durations, rates)
+    if corrections and max_passes:
+        logger.info(f"⏱️ [Align] {len(corrections)} segment đọc quá slot, tổng hợp lại riêng: {corrections}")
+        spliced = splice_corrections(tts, audio_cache, audio, texts, timings, durations, rates, corrections, max_passes)
+        if spliced is not None:
+            audio, timings, audio_duration, passes = spliced
+
+    overruns = [i for i, (measured, duration) in enumerate(zip(timings, durations)) if is_overrun(measured, duration)]
+    if overruns:
+        logger.warning(f"⚠️ [Align] Còn {len(overruns)} segment vượt slot sau {passes} lần tổng hợp: {overruns}")
+    if audio_duration is None:
+        audio_duration = measure_audio_duration(audio, tts.output_format)
+
+    timing = {
+        "mode": "chunk",
+        "duration": audio_duration,
+        "passes": passes,
+        "segments": [
+            {
+                "start": None if math.isnan(start) else start,
+                "duration": duration,
+                "offset": measured[0] if measured else None,
+                "spoken": measured[1] if measured else None,
+                "rate": rate,
+                "overrun": i in overruns,
+            }
+            for i, (start, duration, measured, rate) in enumerate(zip(starts.tolist(), durations, timings, rates))
+        ],
+    }
+    return audio, timing
@@ -0,0 +1,88 @@
+import io
+import os
+import wave
+from typing import Optional, Tuple
+from loguru import logger
+from pydub import AudioSegment
+from Handler_Transcript.Handler_Transcript import resolve_ffmpeg
+
+# Số lần thử lại một segment lỗi khi tổng hợp riêng từng segment
+TTS_SEGMENT_RETRIES = int(os.getenv("TTS_SEGMENT_RETRIES", 1))
+# Segment được tổng hợp ra PCM (RIFF) để ghép và chèn khoảng lặng chính xác tới từng sample
+PCM_FORMAT = "wav"
+# Tham số PCM mà Azure trả cho PCM_FORMAT (Riff16Khz16BitMonoPcm)
+PCM_SAMPLE_RATE = 16000
+PCM_SAMPLE_WIDTH = 2
+PCM_CHANNELS = 1
+EXPORT_OPTIONS = {
+    "webm": {"format": "webm", "codec": "libopus"},
+    "ogg": {"format": "ogg", "codec": "libopus"},
+    "mp3": {"format": "mp3", "bitrate": "32k"},
+}
+
+# (pcm, sample_rate, sample_width, channels)
+PcmAudio = Tuple[bytes, int, int, int]
+
+
+def read_pcm(riff_bytes: bytes) -> PcmAudio:
+    with wave.open(io.BytesIO(riff_bytes)) as reader:
+        params = reader.getparams()
+        return reader.readframes(params.nframes), params.framerate, params.sampwidth, params.nchannels
+
+
+def pcm_to_riff(pcm: bytes, sample_rate: int, sample_width: int, channels: int) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(sample_width)
+        writer.setframerate(sample_rate)
+        writer.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def pcm_seconds(audio: PcmAudio) -> float:
+    # Thời lượng = số byte PCM / byte mỗi giây
+    return len(audio[0]) / (audio[1] * audio[2] * audio[3])
+
+
+def encode_pcm(pcm: bytes, sample_rate: int, sample_width: int, channels: int, output_format: str) -> bytes:
+    # Mã hóa PCM đã ghép sang định dạng đầu ra của module TTS; không có ffmpeg thì trả về WAV
+    riff_bytes = pcm_to_riff(pcm, sample_rate, sample_width, channels)
+    if output_format not in EXPORT_OPTIONS:
+        return riff_bytes
+    if resolve_ffmpeg() is None:
+        logger.warning(f"⚠️ [TTS] Không có ffmpeg để mã hóa {output_format}, trả về audio WAV")
+        return riff_bytes
+    buffer = io.BytesIO()
+    AudioSegment(data=pcm, sample_width=sample_width, frame_rate=sample_rate, channels=channels).export(
+        buffer, **EXPORT_OPTIONS[output_format]
+    )
+    return buffer.getvalue()
+
+
+def decode_to_pcm(audio_bytes: bytes, input_format: str, sample_rate: int, sample_width: int, channels: int) -> bytes:
+    """
+    Giải mã audio (định dạng đầu ra của module TTS) ra PCM đúng tham số cho trước.
+
+    Raises:
+        RuntimeError: Nếu cần ffmpeg (định dạng nén) nhưng không tìm thấy.
+    """
+    if input_format == PCM_FORMAT:
+        pcm, *params = read_pcm(audio_bytes)
+        if tuple(params) == (sample_rate, sample_width, channels):
+            return pcm
+    elif resolve_ffmpeg() is None:
+        raise RuntimeError(f"Không có ffmpeg để giải mã audio {input_format}")
+    segment = AudioSegment.from_file(io.BytesIO(audio_bytes), format=input_format)
+    return segment.set_frame_rate(sample_rate).set_sample_width(sample_width).set_channels(channels).raw_data
+
+
+def synthesize_segment(pcm_tts, audio_cache, text: str, rate: str) -> Optional[PcmAudio]:
+    # Mỗi segment là một mục riêng trong AudioCache nên dùng lại được giữa các chunk / video; lỗi thì thử lại riêng segment đó
+    ssml = pcm_tts.segment_ssml(text, rate)
+    for attempt in range(TTS_SEGMENT_RETRIES + 1):
+        synthesized = audio_cache.get_or_synthesize_timed(pcm_tts, ssml)
+        if synthesized is not None:
+            return read_pcm(synthesized[0].getvalue())
+        logger.warning(f"⚠️ [TTS] Segment lỗi (lần {attempt + 1}): {text[:40]}")
+    return None
@@ -0,0 +1,114 @@
+import os
+import math
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple, Union
+from loguru import logger
+from Handler_Transcript.compact_transcript import CompactTranscript
+from Text_To_Speech.TextToSpeech import MAX_BREAK_MS
+from Text_To_Speech.alignment import ALIGN_MAX_PASSES, is_overrun, overrun_corrections
+from Text_To_Speech.pcm import (
+    PCM_FORMAT, PCM_SAMPLE_RATE, PCM_SAMPLE_WIDTH, PCM_CHANNELS, PcmAudio, encode_pcm, pcm_seconds, synthesize_segment
+)
+from monitoring.metrics import span
+
+# Cấu hình tổng hợp theo segment (có thể ghi đè bằng biến môi trường)
+TTS_SEGMENT_CONCURRENCY = int(os.getenv("TTS_SEGMENT_CONCURRENCY", 4))
+# Khoảng lặng đầu chunk giống thẻ <break> đầu SSML ở chế độ chunk (Azure giới hạn break 5 giây)
+MAX_LEADING_SILENCE = MAX_BREAK_MS / 1000
+
+
+def synthesize_segments(tts, audio_cache, segments: Union[List[Dict], CompactTranscript],
+                        max_passes: int = ALIGN_MAX_PASSES) -> Optional[Tuple[BytesIO, Dict]]:
+    """
+    Tổng hợp từng segment riêng (song song, cache theo segment), rồi ghép PCM theo `start` của
+    segment, chèn khoảng lặng vào chỗ trống và mã hóa sang `tts.output_format`.
+
+    Segment đọc quá slot chỉ tổng hợp lại chính segment đó với rate tính từ thời lượng đo được;
+    segment lỗi sau khi thử lại được thay bằng khoảng lặng thay vì làm hỏng cả chunk.
+
+    Returns:
+        Optional[Tuple[BytesIO, Dict]]: (audio, timing) cùng dạng với `synthesize_aligned`; khoảng lặng
+        dài bằng chunk nếu mọi segment đều không có text; None nếu không segment nào tổng hợp được.
+    """
+    texts, starts, durations, total_duration = tts.segment_columns(segments)
+    rates = tts.compute_rates(texts, durations, total_duration)
+    starts, durations = starts.tolist(), durations.tolist()
+    pcm_tts = tts.for_format(PCM_FORMAT)
+
+    results: Dict[int, Optional[PcmAudio]] = {}
+    # Segment cần tổng hợp -> rate dùng cho lần này
+    pending = {i: rates[i] for i, text in enumerate(texts) if text}
+    with ThreadPoolExecutor(max_workers=max(1, min(TTS_SEGMENT_CONCURRENCY, len(pending)))) as pool:
+        for attempt in range(max_passes + 1):
+            outputs = pool.map(lambda i: synthesize_segment(pcm_tts, audio_cache, texts[i], pending[i]), pending)
+            for i, audio in zip(pending, outputs):
+                if audio is not None:
+                    results[i], rates[i] = audio, pending[i]
+                else:
+                    # Lần tổng hợp lại lỗi: giữ audio và rate của lần trước, không thay bằng khoảng lặng
+                    results.setdefault(i, None)
+            spoken = {i: pcm_seconds(audio) for i, audio in results.items() if audio is not None}
+            timings = [(0.0, spoken[i]) if i in spoken else None for i in range(len(texts))]
+            corrections = overrun_corrections(timings, durations, rates)
+            if not corrections or attempt == max_passes:
+                break
+            logger.info(f"⏱️ [Align] {len(corrections)} segment đọc quá slot, tổng hợp lại riêng: {corrections}")
+            pending = corrections
+
+    synthesized = [audio for audio in results.values() if audio is not None]
+    if synthesized:
+        _, sample_rate, sample_width, channels = synthesized[0]
+    elif any(texts):
+        return None
+    else:
+        sample_rate, sample_width, channels = PCM_SAMPLE_RATE, PCM_SAMPLE_WIDTH, PCM_CHANNELS
+    frame_size = sample_width * channels
+
+    # Gốc thời gian của audio: segment đầu nằm sau khoảng lặng đầu, các segment sau đặt đúng theo start
+    first_start = 0.0 if math.isnan(starts[0]) else starts[0]
+    origin = first_start - (min(first_start, MAX_LEADING_SILENCE) if first_start > 0.1 else 0.0)
+    parts, cursor, placed = [], 0, {}
+    for i, start in enumerate(starts):
+        audio = results.get(i)
+        if audio is None:
+            continue
+        slot_frame = cursor if math.isnan(start) else round((start - origin) * sample_rate)
+        # Segment trước còn đọc chưa xong thì nối ngay sau, không chồng tiếng
+        frame = max(slot_frame, cursor)
+        parts.append(b"\x00" * ((frame - cursor) * frame_size))
+        parts.append(audio[0])
+        cursor = frame + len(audio[0]) // frame_size
+        placed[i] = frame / sample_rate
+    if not synthesized:
+        # Chunk chỉ có segment rỗng: khoảng lặng dài bằng chunk, không tính là chunk lỗi
+        chunk_end = max((start + duration for start, duration in zip(starts, durations) if not math.isnan(start)),
+                        default=first_start + sum(durations))
+        cursor = round((chunk_end - origin) * sample_rate)
+        parts.append(b"\x00" * (cursor * frame_size))
+
+    failed = [i for i, text in enumerate(texts) if text and results.get(i) is None]
+    if failed:
+        logger.warning(f"⚠️ [TTS] {len(failed)} segment không tổng hợp được, thay bằng khoảng lặng: {failed}")
+    overruns = [i for i, timing in enumerate(timings) if is_overrun(timing, durations[i])]
+
+    with span("tts.encode", segments=len(placed)):
+        audio_bytes = encode_pcm(b"".join(parts), sample_rate, sample_width, channels, tts.output_format)
+    timing = {
+        "mode": "segment",
+        "duration": cursor / sample_rate,
+        "passes": attempt + 1,
+        "segments": [
+            {
+                "start": None if math.isnan(start) else start,
+                "duration": duration,
+                "offset": placed.get(i),
+                "spoken": spoken.get(i),
+                "rate": rate,
+                "overrun": i in overruns,
+                "failed": i in failed,
+            }
+            for i, (start, duration, rate) in enumerate(zip(starts, durations, rates))
+        ],
+    }
+    return BytesIO(audio_bytes), timing
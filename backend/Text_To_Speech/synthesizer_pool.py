@@ -0,0 +1,80 @@
+import os
+import queue
+from contextlib import contextmanager
+from typing import Iterator
+import azure.cognitiveservices.speech as speechsdk
+from loguru import logger
+
+# Số synthesizer rảnh (kèm kết nối đã mở tới Azure) giữ lại cho mỗi giọng đọc / định dạng
+TTS_SYNTHESIZER_POOL_SIZE = int(os.getenv("TTS_SYNTHESIZER_POOL_SIZE", 4))
+
+
+class PooledSynthesizer:
+    __slots__ = ("synthesizer", "connection", "broken")
+
+    def __init__(self, speech_config: speechsdk.SpeechConfig):
+        self.synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=None)
+        # Giữ Connection cùng synthesizer: open() bắt tay TLS / websocket trước lần speak đầu tiên
+        self.connection = speechsdk.Connection.from_speech_synthesizer(self.synthesizer)
+        self.broken = False
+
+    def close(self):
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+
+
+class SynthesizerPool:
+    """
+    SpeechSynthesizer dùng lại giữa các lần tổng hợp cùng SpeechConfig (giọng đọc / định dạng),
+    thay vì tạo mới và kết nối lại tới Azure cho mỗi chunk.
+
+    Mỗi synthesizer chỉ được một luồng dùng tại một thời điểm (acquire); hết synthesizer rảnh thì tạo thêm,
+    khi trả về chỉ giữ lại tối đa `max_idle`. Synthesizer bị lỗi / hủy được bỏ đi thay vì trả lại pool.
+    """
+
+    def __init__(self, speech_config: speechsdk.SpeechConfig, max_idle: int = TTS_SYNTHESIZER_POOL_SIZE):
+        self.speech_config = speech_config
+        self.max_idle = max_idle
+        # LIFO: synthesizer vừa dùng xong là cái có kết nối còn mở nhiều khả năng nhất
+        self._idle: "queue.LifoQueue[PooledSynthesizer]" = queue.LifoQueue()
+
+    def _create(self) -> PooledSynthesizer:
+        pooled = PooledSynthesizer(self.speech_config)
+        pooled.connection.open(True)
+        return pooled
+
+    def warm_up(self, count: int) -> int:
+        """
+        Tạo sẵn tối đa `count` synthesizer với kết nối đã mở, để chunk đầu tiên của job không phải chờ kết nối.
+
+        Returns:
+            int: số synthesizer rảnh trong pool sau khi làm nóng.
+        """
+        for _ in range(min(count, self.max_idle) - self._idle.qsize()):
+            try:
+                self._idle.put(self._create())
+            except Exception as e:
+                logger.warning(f"⚠️ [TTS] Không mở trước được kết nối tới Azure: {e}")
+                break
+        return self._idle.qsize()
+
+    @contextmanager
+    def acquire(self) -> Iterator[PooledSynthesizer]:
+        try:
+            pooled = self._idle.get_nowait()
+        except queue.Empty:
+            pooled = self._create()
+        try:
+            yield pooled
+        except Exception:
+            pooled.broken = True
+            raise
+        finally:
+            # Callback (bookmark, ...) chỉ có hiệu lực trong một lần dùng
+            pooled.synthesizer.bookmark_reached.disconnect_all()
+            if pooled.broken or self._idle.qsize() >= self.max_idle:
+                pooled.close()
+            else:
+                self._idle.put(pooled)
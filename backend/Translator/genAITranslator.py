@@ -5,6 +5,9 @@ from dotenv import load_dotenv
 import google.generativeai as genai
 from typing import Union, Iterable, Dict, Optional,List
 import ast
+import threading
+from cachetools import TTLCache
+from Translator.http_client import HTTP_TIMEOUT, get_session
 from youtube_transcript_api import (
     YouTubeTranscriptApi,
     TranscriptsDisabled,
@@ -17,7 +20,28 @@ load_dotenv()
 # Cấu hình logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
 
+# Metadata YouTube được cache theo video_id (có thể ghi đè bằng biến môi trường)
+YOUTUBE_METADATA_CACHE_SIZE = int(os.getenv("YOUTUBE_METADATA_CACHE_SIZE", 1024))
+YOUTUBE_METADATA_TTL = int(os.getenv("YOUTUBE_METADATA_TTL", 6 * 3600))
+
+_metadata_cache = TTLCache(maxsize=YOUTUBE_METADATA_CACHE_SIZE, ttl=YOUTUBE_METADATA_TTL)
+_metadata_lock = threading.Lock()
+_genai_lock = threading.Lock()
+_genai_api_key = None
+
+def configure_genai(api_key: str):
+    # genai.configure là cấu hình toàn cục, chỉ gọi lại khi đổi API key
+    global _genai_api_key
+    with _genai_lock:
+        if _genai_api_key != api_key:
+            genai.configure(api_key=api_key)
+            _genai_api_key = api_key
+
 class GenAITranslator:
+    # Giữ prompt Gemini đủ ngắn để model trả về đúng số câu
+    MAX_BATCH_ITEMS = 100
+    MAX_BATCH_CHARS = 8000
+
     def __init__(self, youtubeAPIKey=None, geminiAPIKey=None,video_id= None):
         # Lấy API Key từ biến môi trường nếu không truyền vào
         if not video_id:
@@ -35,7 +59,7 @@ class GenAITranslator:
             raise ValueError("Thiếu API Key. Vui lòng kiểm tra .env")
 
         # Cấu hình Google Generative AI
-        genai.configure(api_key=self.geminiAPIKey)
+        configure_genai(self.geminiAPIKey)
         self.model = genai.GenerativeModel("gemini-2.0-flash")
         logging.info("Khởi tạo thành công GenAITranslator.")
     def translate(self,  texts: Union[str, List[str]],source_lang = "",target_langs='vi',) -> Optional[List[Dict[str, str]]]:
@@ -114,11 +138,39 @@ def makePrompt(video_title: str, video_description: str, video_tags: list, targe
         STRICTLY FOLLOW this format or your response will be rejected by the system."""
 
 
+YOUTUBE_VIDEOS_URL = "https://www.googleapis.com/youtube/v3/videos"
+
+def _parse_youtube_metadata(video_id: str, data: Dict) -> Optional[Dict]:
+    if not data["items"]:
+        logging.warning(f"Không tìm thấy video với ID: {video_id}")
+        return None
+
+    snippet = data["items"][0]["snippet"]
+    return {
+        "title": snippet.get("title", ""),
+        "description": snippet.get("description", ""),
+        "tags": snippet.get("tags", [])
+    }
+
+def _cached_metadata(video_id: str) -> Optional[Dict]:
+    with _metadata_lock:
+        return _metadata_cache.get(video_id)
+
+def _cache_metadata(video_id: str, metadata: Optional[Dict]) -> Optional[Dict]:
+    # Không cache kết quả lỗi để lần sau còn gọi lại API
+    if metadata:
+        with _metadata_lock:
+            _metadata_cache[video_id] = metadata
+    return metadata
+
 def get_youtube_metadata(video_id: str, api_key: str) -> Dict:
     """
-    Lấy metadata (title, description, tags) từ video YouTube.
+    Lấy metadata (title, description, tags) từ video YouTube, dùng cache theo video_id.
     """
-    url = f"https://www.googleapis.com/youtube/v3/videos"
+    cached = _cached_metadata(video_id)
+    if cached is not None:
+        return cached
+
     params = {
         "part": "snippet",
         "id": video_id,
@@ -126,20 +178,9 @@ def get_youtube_metadata(video_id: str, api_key: str) -> Dict:
     }
 
     try:
-        response = requests.get(url, params=params)
+        response = get_session().get(YOUTUBE_VIDEOS_URL, params=params, timeout=HTTP_TIMEOUT)
         response.raise_for_status()
-        data = response.json()
-
-        if not data["items"]:
-            logging.warning(f"Không tìm thấy video với ID: {video_id}")
-            return None
-
-        snippet = data["items"][0]["snippet"]
-        return {
-            "title": snippet.get("title", ""),
-            "description": snippet.get("description", ""),
-            "tags": snippet.get("tags", [])
-        }
+        return _cache_metadata(video_id, _parse_youtube_metadata(video_id, response.json()))
     except requests.RequestException as req_err:
         logging.error(f"Lỗi khi gọi YouTube API: {req_err}")
         return None
@@ -0,0 +1,52 @@
+import os
+import threading
+from typing import Tuple, Optional
+from cachetools import TTLCache
+from Translator.translator import AzureTranslator
+from Translator.genAITranslator import GenAITranslator
+from fake_backends.config import fake_enabled
+
+# ------------------ Mapping Translator ------------------
+
+TRANSLATOR_MAP = {
+    "AzureTranslator": AzureTranslator,
+    "GenAITranslator": GenAITranslator
+}
+
+# Instance translator được giữ lại trong tiến trình (có thể ghi đè bằng biến môi trường)
+TRANSLATOR_CACHE_SIZE = int(os.getenv("TRANSLATOR_CACHE_SIZE", 64))
+TRANSLATOR_CACHE_TTL = int(os.getenv("TRANSLATOR_CACHE_TTL", 1800))
+
+_translators = TTLCache(maxsize=TRANSLATOR_CACHE_SIZE, ttl=TRANSLATOR_CACHE_TTL)
+_translators_lock = threading.Lock()
+
+def create_translator(name: str, video_id: str = None):
+    cls = TRANSLATOR_MAP.get(name)
+    if not cls:
+        raise ValueError(f"Unsupported translator: {name}")
+    if fake_enabled("translator"):
+        from fake_backends.translator import FAKE_TRANSLATOR_MAP
+        cls = FAKE_TRANSLATOR_MAP[name]
+    return cls(video_id=video_id) if name == "GenAITranslator" else cls()
+
+def translator_cache_key(name: str, video_id: str = None) -> Tuple[str, Optional[str]]:
+    # Chỉ GenAITranslator phụ thuộc video (prompt dùng metadata của video)
+    return name, video_id if name == "GenAITranslator" else None
+
+def get_translator(name: str, video_id: str = None):
+    """
+    Trả về translator dùng chung trong tiến trình, chỉ khởi tạo lại khi hết hạn
+    (TRANSLATOR_CACHE_TTL) hoặc bị đẩy ra khỏi cache (TRANSLATOR_CACHE_SIZE).
+
+    Raises:
+        ValueError: Nếu tên translator không được hỗ trợ.
+    """
+    key = translator_cache_key(name, video_id)
+    with _translators_lock:
+        translator = _translators.get(key)
+    if translator is None:
+        # Khởi tạo ngoài lock vì GenAITranslator có thể gọi mạng lấy metadata
+        translator = create_translator(name, video_id=video_id)
+        with _translators_lock:
+            translator = _translators.setdefault(key, translator)
+    return translator
@@ -3,8 +3,13 @@ import requests
 from typing import Union, Iterable, Dict, Optional,List
 from dotenv import load_dotenv
 import re
+from Translator.http_client import HTTP_TIMEOUT, get_session
 load_dotenv()
 class AzureTranslator:
+    # Giới hạn của Azure Translator v3 cho 1 request: 1000 phần tử, 50.000 ký tự
+    MAX_BATCH_ITEMS = 1000
+    MAX_BATCH_CHARS = 50000
+
     def __init__(self,
                  api_key: str = os.getenv("MICROSOFT_API_KEY"),
                  endpoint: str = os.getenv("MICROSOFT_ENDPOINT"),
@@ -16,24 +21,10 @@ class AzureTranslator:
 
         if not all([self.api_key, self.endpoint, self.region]):
             raise ValueError("Thiếu cấu hình API KEY hoặc ENDPOINT hoặc REGION")
-    def translate(self,
-                texts: Union[str, List[str]],
-                source_lang: Optional[str] = "",
-                target_langs: Union[str, Iterable[str]] = "vi",
-                timeout: int = 10) -> Optional[List[Dict[str, str]]]:
-        """
-        Dịch một hoặc nhiều đoạn văn bản sang một hoặc nhiều ngôn ngữ.
-
-        Args:
-            texts: Chuỗi hoặc danh sách các chuỗi văn bản cần dịch.
-            source_lang: Ngôn ngữ gốc (nếu không truyền thì tự động phát hiện).
-            target_langs: Một ngôn ngữ hoặc danh sách các ngôn ngữ đích.
-            timeout: Thời gian chờ tối đa cho request.
-
-        Returns:
-            List[Dict[str, str]]: Danh sách kết quả dịch theo thứ tự đầu vào.
-                Mỗi phần tử là dict {lang_code: translated_text}
-        """
+    def _build_request(self,
+                       texts: Union[str, List[str]],
+                       source_lang: Optional[str],
+                       target_langs: Union[str, Iterable[str]]):
         # Chuẩn hóa đầu vào
         if isinstance(texts, str):
             texts = [texts]
@@ -57,24 +48,46 @@ class AzureTranslator:
 
         # Body gồm danh sách các object {"Text": ...}
         body = [{"Text": text} for text in texts]
+        return self.endpoint + route, headers, body
+
+    def _parse_response(self, data) -> List[Dict[str, str]]:
+        # Trả về list có cùng thứ tự với `texts`
+        result = []
+        for item in data:
+            translations = {t["to"]: t["text"] for t in item["translations"]}
+            result.append(translations)
+        return result
+
+    def translate(self,
+                texts: Union[str, List[str]],
+                source_lang: Optional[str] = "",
+                target_langs: Union[str, Iterable[str]] = "vi",
+                timeout: int = HTTP_TIMEOUT) -> Optional[List[Dict[str, str]]]:
+        """
+        Dịch một hoặc nhiều đoạn văn bản sang một hoặc nhiều ngôn ngữ.
+
+        Args:
+            texts: Chuỗi hoặc danh sách các chuỗi văn bản cần dịch.
+            source_lang: Ngôn ngữ gốc (nếu không truyền thì tự động phát hiện).
+            target_langs: Một ngôn ngữ hoặc danh sách các ngôn ngữ đích.
+            timeout: Thời gian chờ tối đa cho request.
+
+        Returns:
+            List[Dict[str, str]]: Danh sách kết quả dịch theo thứ tự đầu vào.
+                Mỗi phần tử là dict {lang_code: translated_text}
+        """
+        url, headers, body = self._build_request(texts, source_lang, target_langs)
 
         try:
-            response = requests.post(
-                url=self.endpoint + route,
+            # Session dùng chung: giữ kết nối keep-alive và tự retry khi gặp 429/5xx
+            response = get_session().post(
+                url=url,
                 headers=headers,
                 json=body,
                 timeout=timeout
             )
             response.raise_for_status()
-            data = response.json()
-
-            # Trả về list có cùng thứ tự với `texts`
-            result = []
-            for item in data:
-                translations = {t["to"]: t["text"] for t in item["translations"]}
-                result.append(translations)
-
-            return result
+            return self._parse_response(response.json())
 
         except requests.exceptions.RequestException as err:
             print(f"⚠️ Translator API error: {err}")
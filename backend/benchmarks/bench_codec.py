@@ -0,0 +1,87 @@
+"""
+Benchmark codec payload chunk trong Redis: thời gian encode / decode và kích thước byte.
+
+So sánh cách cũ (json.dumps list entry) với các codec của `redis_cache.codec`
+(json, msgpack nếu đã cài, compact, compact + zlib) trên một chunk nhỏ và một transcript dài.
+
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_codec --segments 10000 --repeat 5
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from typing import List, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from redis_cache.codec import CODECS_BY_NAME, encode_segments, decode_segments, msgpack
+
+
+def make_segments(count: int, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    words = ["xin", "chào", "các", "bạn", "hôm", "nay", "chúng", "ta", "sẽ", "học", "về", "lập", "trình", "hello", "world"]
+    segments, start = [], rng.uniform(0, 2)
+    for _ in range(count):
+        duration = round(rng.uniform(0.8, 6.0), 3)
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(1, 14)))
+        segments.append({"text": text, "start": round(start, 3), "duration": duration})
+        start += duration + rng.choice([0.0, 0.1, 0.5, 1.2])
+    return segments
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def bench_case(segments: List[Dict], repeat: int):
+    # Cách cũ: list entry <-> JSON, decode trả về list dict
+    legacy_raw = json.dumps(segments, ensure_ascii=False)
+    rows = [(
+        "legacy json",
+        len(legacy_raw.encode("utf-8")),
+        best_of(lambda: json.dumps(segments, ensure_ascii=False), repeat),
+        best_of(lambda: json.loads(legacy_raw), repeat),
+    )]
+
+    variants = [(name, name, None) for name in CODECS_BY_NAME if name != "msgpack" or msgpack is not None]
+    variants.append(("compact+zlib", "compact", 0))
+    for label, codec, compress_min_bytes in variants:
+        # Không nén (ngưỡng cực lớn) trừ biến thể +zlib, để so sánh riêng từng codec
+        threshold = sys.maxsize if compress_min_bytes is None else compress_min_bytes
+        raw = encode_segments(segments, codec=codec, compress_min_bytes=threshold)
+        assert decode_segments(raw).to_entries() == segments, f"{label}: decode khác dữ liệu gốc"
+        rows.append((
+            label,
+            len(raw),
+            best_of(lambda: encode_segments(segments, codec=codec, compress_min_bytes=threshold), repeat),
+            best_of(lambda: decode_segments(raw), repeat),
+        ))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark codec payload chunk")
+    parser.add_argument("--segments", type=int, default=10000)
+    parser.add_argument("--chunk", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if msgpack is None:
+        print("msgpack chưa được cài, bỏ qua codec msgpack")
+    for count in (args.chunk, args.segments):
+        print(f"\n{count} segment, best of {args.repeat}")
+        print(f"{'codec':<14}{'bytes':>12}{'encode ms':>12}{'decode ms':>12}")
+        for label, size, encode_time, decode_time in bench_case(make_segments(count), args.repeat):
+            print(f"{label:<14}{size:>12}{encode_time * 1000:>12.3f}{decode_time * 1000:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
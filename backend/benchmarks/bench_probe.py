@@ -0,0 +1,72 @@
+"""
+Benchmark đo thời lượng audio: đọc header container (audio_probe) so với giải mã bằng ffmpeg (pydub).
+
+Mặc định dùng các chunk WAV tổng hợp; truyền thêm file audio thật (webm / ogg / mp3 / wav của Azure)
+để đo trên dữ liệu thực tế. Phần ffmpeg chỉ chạy khi máy có ffmpeg.
+
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_probe --chunks 200 chunk_0.webm chunk_1.mp3
+"""
+import io
+import os
+import sys
+import time
+import wave
+import random
+import argparse
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydub import AudioSegment
+from Handler_Transcript.audio_probe import probe_duration
+from Handler_Transcript.Handler_Transcript import resolve_ffmpeg
+
+
+def make_wav_chunks(count: int, seed: int = 0) -> List[bytes]:
+    rng = random.Random(seed)
+    chunks = []
+    for _ in range(count):
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as writer:
+            writer.setnchannels(1)
+            writer.setsampwidth(2)
+            writer.setframerate(16000)
+            writer.writeframes(b"\x00\x00" * int(16000 * rng.uniform(5, 40)))
+        chunks.append(buffer.getvalue())
+    return chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark đo thời lượng audio")
+    parser.add_argument("files", nargs="*", help="File audio thật (tùy chọn)")
+    parser.add_argument("--chunks", type=int, default=200)
+    args = parser.parse_args()
+
+    samples = [("wav", data) for data in make_wav_chunks(args.chunks)]
+    for path in args.files:
+        with open(path, "rb") as audio_file:
+            samples.append((os.path.splitext(path)[1].lstrip("."), audio_file.read()))
+
+    started = time.perf_counter()
+    durations = [probe_duration(data) for _, data in samples]
+    probe_time = time.perf_counter() - started
+    print(f"{len(samples)} audio | header probe {probe_time / len(samples) * 1e6:8.1f} µs/audio")
+    unknown = sum(duration is None for duration in durations)
+    if unknown:
+        print(f"{unknown} audio không đọc được header, sẽ phải dùng ffmpeg")
+
+    if resolve_ffmpeg() is None:
+        print("Không có ffmpeg, bỏ qua phần so sánh")
+        return
+    started = time.perf_counter()
+    decoded = [len(AudioSegment.from_file(io.BytesIO(data), format=fmt)) / 1000.0 for fmt, data in samples]
+    ffmpeg_time = time.perf_counter() - started
+    print(f"{len(samples)} audio | ffmpeg decode {ffmpeg_time / len(samples) * 1e6:8.1f} µs/audio "
+          f"| x{ffmpeg_time / probe_time:.0f}")
+    drift = max(abs(a - b) for a, b in zip(durations, decoded) if a is not None)
+    print(f"Chênh lệch lớn nhất so với ffmpeg: {drift * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark tính tốc độ đọc + dựng SSML cho transcript dài (mặc định 5.000 segment).
+
+So sánh cách cũ (vòng lặp Python, strip text nhiều lần) với đường NumPy hiện tại
+và kiểm tra hai cách cho kết quả giống hệt nhau.
+
+Chạy từ thư mục backend:
+    python -m benchmarks.bench_ssml --segments 5000 --repeat 5
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from typing import List, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# SpeechConfig chỉ cần key / region khác rỗng, benchmark không gọi Azure
+os.environ.setdefault("TTS_REGION", "benchmark")
+os.environ.setdefault("TEXT_TO_SPEECH_KEY", "benchmark")
+
+from Text_To_Speech.TextToSpeech import TextToSpeechModule
+
+
+def make_segments(count: int, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    words = ["xin", "chào", "các", "bạn", "hôm", "nay", "chúng", "ta", "sẽ", "học", "về", "lập", "trình", "<code>", "&"]
+    segments, start = [], rng.uniform(0, 2)
+    for _ in range(count):
+        duration = round(rng.uniform(0.8, 6.0), 3)
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(0, 14)))
+        segments.append({"text_translated": f"  {text} ", "start": round(start, 3), "duration": duration})
+        start += duration + rng.choice([0.0, 0.1, 0.5, 1.2, 6.0])
+    return segments
+
+
+# ------------------ Cách cũ (tham chiếu) ------------------
+
+def legacy_calculate_rate_global(tts: TextToSpeechModule, segments: List[Dict]) -> List[str]:
+    total_chars = sum(len(tts._safe_strip(seg.get('text_translated'))) for seg in segments)
+    total_duration = sum(seg['duration'] for seg in segments)
+    if total_duration == 0 or total_chars == 0:
+        return ["0%"] * len(segments)
+
+    avg_cps = total_chars / total_duration
+    rates = []
+    for seg in segments:
+        text_len = len(tts._safe_strip(seg.get('text_translated')))
+        if text_len == 0:
+            rates.append("0%")
+            continue
+        seg_cps = text_len / seg['duration']
+        smooth_cps = seg_cps * 0.7 + avg_cps * 0.3
+        rate_factor = seg['duration'] / (text_len / smooth_cps)
+        rate_percent = round((rate_factor - 1) * 100)
+        rate_percent = max(-30, min(50, rate_percent))
+        rates.append(f"{'+' if rate_percent > 0 else ''}{rate_percent}%")
+    return rates
+
+
+def legacy_generate_ssml(tts: TextToSpeechModule, segments: List[Dict]) -> str:
+    rates = legacy_calculate_rate_global(tts, segments)
+    ssml_parts = [
+        '<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" '
+        'xmlns:mstts="http://www.w3.org/2001/mstts" xml:lang="vi-VN">',
+        f'<voice name="{tts.voice}">'
+    ]
+    first_start = segments[0].get('start', 0.0)
+    if first_start > 0.1:
+        ssml_parts.append(f'<break time="{int(first_start * 1000)}ms"/>')
+    for i, (seg, rate) in enumerate(zip(segments, rates)):
+        text = tts._escape_xml(tts._safe_strip(seg.get('text_translated')))
+        if text:
+            ssml_parts.append(f'<prosody rate="{rate}">{text}</prosody>')
+        if i < len(segments) - 1:
+            current_end = seg.get('start', 0) + seg.get('duration', 0)
+            next_start = segments[i+1].get('start', current_end)
+            gap = next_start - current_end
+            if 0.3 < gap < 5.0:
+                ssml_parts.append(f'<break time="{int(gap * 1000)}ms"/>')
+    ssml_parts.extend(['</voice>', '</speak>'])
+    return "\n".join(ssml_parts)
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark calculate_rate_global / generate_ssml")
+    parser.add_argument("--segments", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tts = TextToSpeechModule(voice="vi-VN-HoaiMyNeural", output_format="webm")
+    segments = make_segments(args.segments)
+
+    assert tts.calculate_rate_global(segments) == legacy_calculate_rate_global(tts, segments), "Rate khác bản cũ"
+    assert tts.generate_ssml(segments) == legacy_generate_ssml(tts, segments), "SSML khác bản cũ"
+
+    cases = [
+        ("calculate_rate_global", lambda: legacy_calculate_rate_global(tts, segments),
+         lambda: tts.calculate_rate_global(segments)),
+        ("generate_ssml", lambda: legacy_generate_ssml(tts, segments), lambda: tts.generate_ssml(segments)),
+    ]
+    print(f"{args.segments} segment, best of {args.repeat}")
+    for name, legacy, current in cases:
+        legacy_time, current_time = best_of(legacy, args.repeat), best_of(current, args.repeat)
+        print(f"{name:<22} cũ {legacy_time * 1000:8.2f} ms | NumPy {current_time * 1000:8.2f} ms | x{legacy_time / current_time:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Kiểm tra server vẫn phản hồi khi đang có nhiều request /dubbing chậm: gửi đồng thời N request
+lồng tiếng (chunk chưa có audio nên phải chờ worker), trong lúc đó liên tục gọi các endpoint nhẹ
+và đo độ trễ của chúng. Nếu handler chặn event loop, độ trễ của probe tăng theo thời gian lồng tiếng.
+
+Đây là benchmark chạy tay, không phải test tự động: cần server uvicorn và Redis thật đang chạy.
+
+    FAKE_BACKENDS=all FAKE_TTS_LATENCY_MS=1500 uvicorn main:app --port 8000 --workers 1
+    python -m benchmarks.concurrency_check --base-url http://localhost:8000 --slow-requests 120
+
+Probe:
+    loop     GET /openapi.json  (chỉ đi qua event loop)
+    thread   GET /jobs/{id}     (handler `def`: threadpool + Redis, 404 là bình thường)
+
+Số request chậm mặc định lớn hơn REDIS_MAX_CONNECTIONS (50) để bắt lỗi hết kết nối Redis của API.
+Thoát với mã 1 nếu p99 của probe vượt --max-probe-ms hoặc có request /dubbing lỗi.
+"""
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+from typing import Dict, List
+
+import httpx
+import numpy as np
+
+from benchmarks.load_test import LoadStats
+
+PROBES = {
+    "loop": "/openapi.json",
+    "thread": "/jobs/concurrency-check-probe",
+}
+
+
+async def probe(client: httpx.AsyncClient, path: str, latencies: List[float], stop: asyncio.Event, interval: float):
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            await client.get(path)
+        except httpx.HTTPError:
+            pass
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    millis = np.asarray(latencies) * 1000 if latencies else np.zeros(1)
+    p50, p99 = np.percentile(millis, [50, 99]).tolist()
+    return {"requests": len(latencies), "p50_ms": p50, "p99_ms": p99, "max_ms": float(millis.max())}
+
+
+async def measure_probes(client: httpx.AsyncClient, interval: float, busy=None) -> Dict[str, Dict]:
+    # busy=None: đo lúc server rảnh trong một khoảng ngắn; ngược lại đo cho tới khi busy chạy xong
+    stop = asyncio.Event()
+    latencies = {name: [] for name in PROBES}
+    probes = [asyncio.create_task(probe(client, path, latencies[name], stop, interval)) for name, path in PROBES.items()]
+    if busy is None:
+        await asyncio.sleep(1.0)
+    else:
+        await busy
+    stop.set()
+    await asyncio.gather(*probes)
+    return {name: summarize(values) for name, values in latencies.items()}
+
+
+async def run(args) -> Dict:
+    limits = httpx.Limits(max_connections=args.slow_requests + len(PROBES) + 1)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        idle = await measure_probes(client, args.probe_interval)
+
+        # Video mới mỗi lần chạy để mọi chunk đều phải qua worker
+        video_id = f"{args.video_prefix}{uuid.uuid4().hex[:8]}"
+        split = (await client.post("/video_split", json={
+            "video_id": video_id,
+            "target_language": args.target_language,
+        })).json()
+        chunks = split["list_chunks"]
+        if not split.get("need_translator") or not chunks:
+            raise SystemExit(f"❌ Video {video_id} không cần dịch hoặc không có chunk, không tạo được request chậm.")
+
+        stats = LoadStats()
+        slow = asyncio.gather(*[
+            stats.timed("dubbing", client.post("/dubbing", json={
+                "video_id": video_id,
+                "list_chunks_id": [f"{video_id}_{chunks[i % len(chunks)]}"],
+                "need_translator": True,
+                "translator": args.translator,
+                "target_language": args.target_language,
+                "tts_voice": args.voice,
+            }))
+            for i in range(args.slow_requests)
+        ])
+        started = time.monotonic()
+        busy = await measure_probes(client, args.probe_interval, slow)
+        elapsed = time.monotonic() - started
+
+    return {"idle": idle, "busy": busy, "dubbing": stats.report(elapsed).get("dubbing", {})}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Độ trễ endpoint nhẹ khi server đang lồng tiếng")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--slow-requests", type=int, default=80, help="Số request /dubbing đồng thời")
+    parser.add_argument("--probe-interval", type=float, default=0.05, help="Khoảng nghỉ giữa hai lần probe (giây)")
+    parser.add_argument("--max-probe-ms", type=float, default=250, help="Ngưỡng p99 của probe khi server bận")
+    parser.add_argument("--video-prefix", default="concurrency")
+    parser.add_argument("--translator", default="AzureTranslator")
+    parser.add_argument("--target-language", default="vi")
+    parser.add_argument("--voice", default="vi-VN-HoaiMyNeural")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output", help="Ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    dubbing = result["dubbing"]
+    print(f"/dubbing: {dubbing.get('requests', 0)} request, {dubbing.get('errors', 0)} lỗi, "
+          f"p50 {dubbing.get('p50_ms', 0):.0f} ms, max {dubbing.get('max_ms', 0):.0f} ms")
+    print(f"{'probe':<8}{'state':<7}{'req':>6}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    failed = []
+    for name in PROBES:
+        for state in ("idle", "busy"):
+            row = result[state][name]
+            print(f"{name:<8}{state:<7}{row['requests']:>6}{row['p50_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}")
+        if result["busy"][name]["p99_ms"] > args.max_probe_ms:
+            failed.append(name)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(result, output_file, indent=2)
+
+    if dubbing.get("errors", 0):
+        print(f"❌ {dubbing['errors']} request /dubbing lỗi ({dubbing.get('statuses')}).")
+        sys.exit(1)
+    if failed:
+        print(f"❌ Probe {', '.join(failed)} vượt {args.max_probe_ms:.0f} ms khi server bận: event loop / threadpool bị chặn.")
+        sys.exit(1)
+    print(f"✅ Mọi probe dưới {args.max_probe_ms:.0f} ms trong lúc {args.slow_requests} request lồng tiếng đang chờ.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Load test: nhiều người xem giả lập cùng gọi /video_split rồi /dubbing lần lượt từng chunk,
+báo cáo số request, lỗi, throughput và độ trễ p50 / p95 / p99 cho từng endpoint.
+
+Chạy server với backend giả (không cần key Azure / Google / YouTube) rồi chạy load test
+từ thư mục backend (client HTTP cài bằng `pip install -r requirements-bench.txt`):
+    FAKE_BACKENDS=all uvicorn main:app --port 8000
+    python -m benchmarks.load_test --base-url http://localhost:8000 --viewers 50 --duration 60
+
+Độ trễ / tỉ lệ lỗi của backend giả chỉnh bằng FAKE_LATENCY_MS, FAKE_FAILURE_RATE,
+FAKE_{TRANSLATOR,GENAI,TTS,TRANSCRIPT}_* (xem fake_backends/config.py).
+"""
+import json
+import time
+import random
+import asyncio
+import argparse
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+
+class LoadStats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def timed(self, endpoint: str, request) -> Optional[Dict]:
+        started = time.perf_counter()
+        try:
+            response = await request
+            status = str(response.status_code)
+            body = response.json() if response.status_code < 400 else None
+        except (httpx.HTTPError, ValueError) as e:
+            status, body = type(e).__name__, None
+        self.latencies[endpoint].append(time.perf_counter() - started)
+        self.statuses[endpoint][status] += 1
+        if body is None:
+            self.errors[endpoint] += 1
+        return body
+
+    def report(self, elapsed: float) -> Dict[str, Dict]:
+        summary = {}
+        for endpoint, latencies in self.latencies.items():
+            millis = np.asarray(latencies) * 1000
+            p50, p95, p99 = np.percentile(millis, [50, 95, 99]).tolist()
+            summary[endpoint] = {
+                "requests": len(latencies),
+                "errors": self.errors[endpoint],
+                "throughput_rps": len(latencies) / elapsed,
+                "p50_ms": p50,
+                "p95_ms": p95,
+                "p99_ms": p99,
+                "max_ms": float(millis.max()),
+                "statuses": dict(self.statuses[endpoint]),
+            }
+        return summary
+
+
+async def viewer(client: httpx.AsyncClient, args, stats: LoadStats, deadline: float, rng: random.Random):
+    # Một người xem: mở video, rồi yêu cầu lồng tiếng vài chunk liên tiếp như khi đang xem
+    while time.monotonic() < deadline:
+        video_id = f"{args.video_prefix}{rng.randrange(args.videos)}"
+        split = await stats.timed("video_split", client.post("/video_split", json={
+            "video_id": video_id,
+            "target_language": args.target_language,
+            "translator": args.translator,
+            "tts_voice": args.voice,
+        }))
+        if not split or not split.get("list_chunks"):
+            continue
+
+        chunks = split["list_chunks"]
+        # Phần lớn xem từ đầu, số còn lại tua tới vị trí ngẫu nhiên
+        first = 0 if rng.random() < args.start_from_beginning else rng.randrange(len(chunks))
+        for chunk_start in chunks[first:first + args.chunks_per_viewer]:
+            if time.monotonic() >= deadline:
+                break
+            await stats.timed("dubbing", client.post("/dubbing", json={
+                "video_id": video_id,
+                "list_chunks_id": [f"{video_id}_{chunk_start}"],
+                "need_translator": split["need_translator"],
+                "translator": args.translator,
+                "target_language": args.target_language,
+                "tts_voice": args.voice,
+                "response_mode": args.response_mode,
+                "position": float(chunk_start),
+            }))
+
+
+async def run(args) -> Dict[str, Dict]:
+    stats = LoadStats()
+    limits = httpx.Limits(max_connections=args.viewers, max_keepalive_connections=args.viewers)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        started = time.monotonic()
+        deadline = started + args.duration
+        await asyncio.gather(*[
+            viewer(client, args, stats, deadline, random.Random(args.seed + i)) for i in range(args.viewers)
+        ])
+        elapsed = time.monotonic() - started
+    return stats.report(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /video_split + /dubbing")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--viewers", type=int, default=20, help="Số người xem đồng thời")
+    parser.add_argument("--duration", type=float, default=30, help="Thời gian chạy (giây)")
+    parser.add_argument("--videos", type=int, default=10, help="Số video khác nhau được xem")
+    parser.add_argument("--video-prefix", default="loadtest")
+    parser.add_argument("--chunks-per-viewer", type=int, default=3)
+    parser.add_argument("--start-from-beginning", type=float, default=0.7, help="Tỉ lệ người xem từ đầu video")
+    parser.add_argument("--translator", default="AzureTranslator")
+    parser.add_argument("--target-language", default="vi")
+    parser.add_argument("--voice", default="vi-VN-HoaiMyNeural")
+    parser.add_argument("--response-mode", default="json")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    summary = asyncio.run(run(args))
+    print(f"{args.viewers} người xem, {args.duration:.0f}s, {args.videos} video")
+    print(f"{'endpoint':<12}{'req':>7}{'err':>6}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for endpoint, row in summary.items():
+        print(f"{endpoint:<12}{row['requests']:>7}{row['errors']:>6}{row['throughput_rps']:>9.1f}"
+              f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(summary, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+Bộ micro-benchmark cho các đường nóng xử lý transcript / SSML / payload Redis.
+
+Mỗi benchmark chạy với nhiều kích thước transcript (mặc định 100 đến 50.000 entry), đo kiểu timeit
+(tự chọn số vòng lặp để mỗi mẫu đủ --min-time giây, tắt GC khi đo), in bảng ra stderr và kết quả JSON
+ra stdout hoặc --output để lưu lại giữa các lần chạy. Truyền --compare <file JSON cũ> để so sánh median:
+mã thoát 1 nếu có benchmark chậm hơn quá --max-regression (mặc định 20%).
+
+Chạy từ thư mục backend:
+    python -m benchmarks.suite --output bench_before.json
+    python -m benchmarks.suite --sizes 100,1000 --filter tts. --compare bench_before.json
+    python -m benchmarks.suite --redis    # thêm round-trip qua Redis thật (REDIS_HOST / REDIS_PORT / REDIS_DB)
+"""
+import os
+import sys
+import json
+import math
+import random
+import fnmatch
+import platform
+import argparse
+import statistics
+import subprocess
+import timeit
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# SpeechConfig chỉ cần key / region khác rỗng, benchmark không gọi Azure
+os.environ.setdefault("TTS_REGION", "benchmark")
+os.environ.setdefault("TEXT_TO_SPEECH_KEY", "benchmark")
+
+import numpy as np
+from Handler_Transcript.Handler_Transcript import Handler
+from Text_To_Speech.TextToSpeech import TextToSpeechModule
+from redis_cache.codec import REDIS_SEGMENT_CODEC, encode_segments, decode_segments
+
+DEFAULT_SIZES = (100, 1000, 10000, 50000)
+
+# name -> (setup(fixture) trả về hàm cần đo, có cần Redis thật hay không)
+BENCHMARKS: Dict[str, tuple] = {}
+
+
+def benchmark(name: str, needs_redis: bool = False):
+    def register(setup: Callable[[Dict], Callable[[], object]]):
+        BENCHMARKS[name] = (setup, needs_redis)
+        return setup
+    return register
+
+# ------------------ Dữ liệu ------------------
+
+_WORDS = ["xin", "chào", "các", "bạn", "hôm", "nay", "chúng", "ta", "sẽ", "học", "về",
+          "lập", "trình", "hello", "world", "<code>", "&", "\"quote\""]
+
+
+def make_transcript(count: int, seed: int = 0) -> List[Dict]:
+    # Transcript giống YouTube: segment 0.8-6 giây, có khoảng lặng, text có ký tự cần escape
+    rng = random.Random(seed)
+    entries, start = [], rng.uniform(0, 2)
+    for _ in range(count):
+        duration = round(rng.uniform(0.8, 6.0), 3)
+        text = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(1, 14)))
+        entries.append({"text": text, "start": round(start, 3), "duration": duration})
+        start += duration + rng.choice([0.0, 0.1, 0.5, 1.2, 6.0])
+    return entries
+
+
+def make_fixture(size: int, seed: int, handler: Handler, tts: TextToSpeechModule) -> Dict:
+    transcript = make_transcript(size, seed)
+    chunks = handler.split_transcript(transcript, "bench")
+    # "Bản dịch" của cả chunk: ghép text gốc và đảo thứ tự từ để số từ khác nhau giữa các segment
+    translated = [[{"vi": " ".join(reversed(" ".join(e["text"] for e in c["chunk"]).split()))}] for c in chunks]
+    merged_chunks = [handler.merge_chunk_translation(c["chunk"], t) for c, t in zip(chunks, translated)]
+    segments = handler.mergeTranslatedTextToTranscript(transcript, merged_chunks)
+    return {
+        "size": size,
+        "handler": handler,
+        "tts": tts,
+        "transcript": transcript,
+        "chunks": chunks,
+        "translated": translated,
+        "merged_chunks": merged_chunks,
+        "segments": segments,
+    }
+
+# ------------------ Handler ------------------
+
+@benchmark("handler.split_transcript")
+def bench_split_transcript(fx):
+    handler, transcript = fx["handler"], fx["transcript"]
+    return lambda: handler.split_transcript(transcript, "bench")
+
+
+@benchmark("handler.merge_chunk_translation")
+def bench_merge_chunk_translation(fx):
+    handler, pairs = fx["handler"], [(c["chunk"], t) for c, t in zip(fx["chunks"], fx["translated"])]
+    return lambda: [handler.merge_chunk_translation(chunk, translated) for chunk, translated in pairs]
+
+
+@benchmark("handler.mergeTranslatedTextToTranscript")
+def bench_merge_to_transcript(fx):
+    handler, transcript, merged_chunks = fx["handler"], fx["transcript"], fx["merged_chunks"]
+    return lambda: handler.mergeTranslatedTextToTranscript(transcript, merged_chunks)
+
+# ------------------ TTS / SSML ------------------
+
+@benchmark("tts.calculate_rate_global")
+def bench_calculate_rate_global(fx):
+    tts, segments = fx["tts"], fx["segments"]
+    return lambda: tts.calculate_rate_global(segments)
+
+
+@benchmark("tts.generate_ssml")
+def bench_generate_ssml(fx):
+    tts, segments = fx["tts"], fx["segments"]
+    return lambda: tts.generate_ssml(segments)
+
+
+@benchmark("tts._escape_xml")
+def bench_escape_xml(fx):
+    escape, texts = fx["tts"]._escape_xml, [seg["text_translated"] for seg in fx["segments"]]
+    return lambda: [escape(text) for text in texts]
+
+# ------------------ Payload Redis ------------------
+
+@benchmark("redis.json_roundtrip")
+def bench_json_roundtrip(fx):
+    # Định dạng cũ: list entry <-> JSON cho từng chunk
+    chunks = [c["chunk"] for c in fx["chunks"]]
+    return lambda: [json.loads(json.dumps(chunk, ensure_ascii=False)) for chunk in chunks]
+
+
+@benchmark("redis.transcript_roundtrip")
+def bench_transcript_roundtrip(fx):
+    # Như push_all_chunks_to_redis + load_transcript_chunks (codec REDIS_SEGMENT_CODEC)
+    chunks = [c["chunk"] for c in fx["chunks"]]
+    return lambda: [decode_segments(encode_segments(chunk)).to_entries() for chunk in chunks]
+
+
+@benchmark("redis.translation_roundtrip")
+def bench_translation_roundtrip(fx):
+    # Như store_translation + synthesize_and_store_chunk
+    merged_chunks, key = fx["merged_chunks"], "text_translated"
+    return lambda: [
+        decode_segments(encode_segments(merged, text_key=key), text_key=key).to_entries(text_key=key)
+        for merged in merged_chunks
+    ]
+
+
+@benchmark("redis.server_roundtrip", needs_redis=True)
+def bench_server_roundtrip(fx):
+    # SET theo lô rồi MGET qua Redis thật, key riêng của benchmark (tự hết hạn sau 60 giây)
+    from redis_cache.store import get_redis, get_many, set_many
+    redis_conn = get_redis({
+        "host": os.getenv("REDIS_HOST", "localhost"),
+        "port": int(os.getenv("REDIS_PORT", 6379)),
+        "db": int(os.getenv("REDIS_DB", 0)),
+    })
+    keys = [f"bench:transcript:{c['id']}" for c in fx["chunks"]]
+    payloads = [c["chunk"] for c in fx["chunks"]]
+
+    def roundtrip():
+        set_many(redis_conn, {key: encode_segments(chunk) for key, chunk in zip(keys, payloads)}, ex=60)
+        return [decode_segments(raw).to_entries() for raw in get_many(redis_conn, keys)]
+    return roundtrip
+
+# ------------------ Đo và báo cáo ------------------
+
+def calibrate(timer: timeit.Timer, min_time: float) -> int:
+    loops = 1
+    while True:
+        elapsed = timer.timeit(loops)
+        if elapsed >= min_time:
+            return loops
+        loops = max(loops * 2, math.ceil(loops * min_time / max(elapsed, 1e-9)))
+
+
+def measure(func: Callable[[], object], repeat: int, min_time: float) -> Dict:
+    timer = timeit.Timer(func)
+    loops = calibrate(timer, min_time)
+    samples = [timer.timeit(loops) / loops for _ in range(repeat)]
+    return {
+        "loops": loops,
+        "repeat": repeat,
+        "min_s": min(samples),
+        "median_s": statistics.median(samples),
+        "mean_s": statistics.fmean(samples),
+        "stdev_s": statistics.stdev(samples) if repeat > 1 else 0.0,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(names: List[str], sizes: List[int], repeat: int, min_time: float, seed: int) -> Dict:
+    handler = Handler()
+    tts = TextToSpeechModule(voice="vi-VN-HoaiMyNeural", output_format="webm")
+    results = []
+    for size in sizes:
+        fixture = make_fixture(size, seed, handler, tts)
+        for name in names:
+            func = BENCHMARKS[name][0](fixture)
+            row = {"name": name, "size": size, **measure(func, repeat, min_time)}
+            row["per_entry_ns"] = row["median_s"] / size * 1e9
+            results.append(row)
+            print(f"{name:<40}{size:>8}{row['median_s'] * 1000:>12.3f} ms{row['per_entry_ns']:>10.0f} ns/entry"
+                  f"  ±{row['stdev_s'] / row['median_s'] * 100:.1f}%", file=sys.stderr)
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "numpy": np.__version__,
+            "segment_codec": REDIS_SEGMENT_CODEC,
+            "sizes": sizes,
+            "repeat": repeat,
+            "min_time": min_time,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(report: Dict, baseline: Dict, max_regression: float) -> List[Dict]:
+    """So median với kết quả cũ, trả về danh sách benchmark chậm hơn ngưỡng."""
+    for key in ("python", "platform", "segment_codec"):
+        if baseline["meta"].get(key) != report["meta"].get(key):
+            print(f"⚠️ {key} khác kết quả cũ: {baseline['meta'].get(key)} -> {report['meta'].get(key)}", file=sys.stderr)
+
+    previous = {(row["name"], row["size"]): row["median_s"] for row in baseline["results"]}
+    regressions = []
+    print(f"\nSo với {baseline['meta'].get('git_commit')} ({baseline['meta'].get('created_at')}):", file=sys.stderr)
+    for row in report["results"]:
+        before = previous.get((row["name"], row["size"]))
+        if before is None:
+            continue
+        ratio = row["median_s"] / before
+        regressed = ratio > 1 + max_regression
+        if regressed:
+            regressions.append({"name": row["name"], "size": row["size"], "ratio": ratio})
+        print(f"{row['name']:<40}{row['size']:>8}  x{ratio:.2f}{'  ❌ chậm hơn' if regressed else ''}", file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark transcript / SSML / payload Redis")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Số entry transcript, phân cách bằng dấu phẩy")
+    parser.add_argument("--filter", default="*", help="Glob hoặc chuỗi con tên benchmark, ví dụ 'tts.*'")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05, help="Thời gian tối thiểu mỗi mẫu (giây)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--redis", action="store_true", help="Chạy cả benchmark cần Redis thật")
+    parser.add_argument("--output", help="Ghi kết quả JSON ra file thay vì stdout")
+    parser.add_argument("--compare", help="File JSON kết quả cũ để so sánh")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Tỉ lệ chậm hơn tối đa cho phép khi --compare")
+    parser.add_argument("--list", action="store_true", help="Liệt kê benchmark rồi thoát")
+    args = parser.parse_args()
+
+    names = [
+        name for name, (_, needs_redis) in BENCHMARKS.items()
+        if (fnmatch.fnmatch(name, args.filter) or args.filter in name) and (args.redis or not needs_redis)
+    ]
+    if args.list:
+        print("\n".join(names))
+        return
+    if not names:
+        parser.error(f"Không có benchmark nào khớp '{args.filter}'")
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    report = run_suite(names, sizes, args.repeat, args.min_time, args.seed)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            regressions = compare(report, json.load(baseline_file), args.max_regression)
+        if regressions:
+            print(f"\n❌ {len(regressions)} benchmark chậm hơn quá {args.max_regression:.0%}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
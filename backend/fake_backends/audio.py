@@ -0,0 +1,111 @@
+import io
+import math
+import wave
+import struct
+
+# Audio giả (im lặng) có đúng container, kích thước tương đối và thời lượng đọc được bằng audio_probe,
+# dùng cho TTS giả. Opus dùng frame im lặng 20 ms chuẩn (CELT fullband) nên trình duyệt vẫn phát được.
+
+SAMPLE_RATE = 16000
+OPUS_SILENCE_FRAME = b"\xf8\xff\xfe"
+OPUS_FRAME_MS = 20
+OPUS_PRE_SKIP = 312
+MP3_FRAME = b"\xff\xf3\x48\xc0" + b"\x00" * 140    # MPEG-2 Layer III, 32 kbps, 16 kHz, mono
+MP3_FRAME_SECONDS = 576 / SAMPLE_RATE
+
+
+def synthetic_wav(duration: float) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(SAMPLE_RATE)
+        writer.writeframes(b"\x00\x00" * round(duration * SAMPLE_RATE))
+    return buffer.getvalue()
+
+
+def synthetic_mp3(duration: float) -> bytes:
+    return MP3_FRAME * math.ceil(duration / MP3_FRAME_SECONDS)
+
+# ---------------- WebM ----------------
+
+def _ebml_size(size: int) -> bytes:
+    length = 1
+    while size >= (1 << (7 * length)) - 1:
+        length += 1
+    return (size | (1 << (7 * length))).to_bytes(length, "big")
+
+
+def _ebml(element_id: int, body: bytes) -> bytes:
+    return element_id.to_bytes((element_id.bit_length() + 7) // 8, "big") + _ebml_size(len(body)) + body
+
+
+def synthetic_webm(duration: float) -> bytes:
+    unknown_size = b"\x01\xff\xff\xff\xff\xff\xff\xff"
+    parts = [
+        _ebml(0x1A45DFA3, _ebml(0x4282, b"webm") + _ebml(0x4287, b"\x04") + _ebml(0x4285, b"\x02")),
+        (0x18538067).to_bytes(4, "big") + unknown_size,
+        _ebml(0x1549A966, _ebml(0x2AD7B1, (1_000_000).to_bytes(3, "big"))),
+        _ebml(0x1654AE6B, _ebml(0xAE, _ebml(0xD7, b"\x01") + _ebml(0x83, b"\x02") + _ebml(0x86, b"A_OPUS")
+                                + _ebml(0xE1, _ebml(0xB5, struct.pack(">f", 48000.0)) + _ebml(0x9F, b"\x01")))),
+    ]
+    # Cluster 10 giây như output dạng stream (không ghi Duration)
+    frames = math.ceil(duration * 1000 / OPUS_FRAME_MS)
+    for frame in range(frames):
+        timestamp = frame * OPUS_FRAME_MS
+        if timestamp % 10_000 == 0:
+            parts.append((0x1F43B675).to_bytes(4, "big") + unknown_size + _ebml(0xE7, timestamp.to_bytes(4, "big")))
+        parts.append(_ebml(0xA3, b"\x81" + struct.pack(">h", timestamp % 10_000) + b"\x80" + OPUS_SILENCE_FRAME))
+    return b"".join(parts)
+
+# ---------------- Ogg Opus ----------------
+
+def _ogg_crc_table():
+    table = []
+    for i in range(256):
+        crc = i << 24
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x04C11DB7) if crc & 0x80000000 else crc << 1
+        table.append(crc & 0xFFFFFFFF)
+    return table
+
+_OGG_CRC_TABLE = _ogg_crc_table()
+
+
+def _ogg_page(packets, granule: int, sequence: int, header_type: int = 0) -> bytes:
+    lacing = []
+    for packet in packets:
+        lacing.extend([255] * (len(packet) // 255) + [len(packet) % 255])
+    page = bytearray(b"OggS" + bytes([0, header_type]) + struct.pack("<qIII", granule, 1, sequence, 0)
+                     + bytes([len(lacing)]) + bytes(lacing) + b"".join(packets))
+    crc = 0
+    for byte in page:
+        crc = ((crc << 8) & 0xFFFFFFFF) ^ _OGG_CRC_TABLE[((crc >> 24) & 0xFF) ^ byte]
+    struct.pack_into("<I", page, 22, crc)
+    return bytes(page)
+
+
+def synthetic_ogg(duration: float) -> bytes:
+    head = b"OpusHead" + bytes([1, 1]) + struct.pack("<HIhB", OPUS_PRE_SKIP, SAMPLE_RATE, 0, 0)
+    tags = b"OpusTags" + struct.pack("<I", 4) + b"fake" + struct.pack("<I", 0)
+    pages = [_ogg_page([head], 0, 0, header_type=0x02), _ogg_page([tags], 0, 1)]
+    frames = math.ceil(duration * 1000 / OPUS_FRAME_MS)
+    samples_per_frame = 48000 * OPUS_FRAME_MS // 1000
+    for first in range(0, frames, 50):
+        count = min(50, frames - first)
+        granule = OPUS_PRE_SKIP + (first + count) * samples_per_frame
+        last = first + count >= frames
+        pages.append(_ogg_page([OPUS_SILENCE_FRAME] * count, granule, len(pages), header_type=0x04 if last else 0))
+    return b"".join(pages)
+
+
+SYNTHETIC_FORMATS = {
+    "wav": synthetic_wav,
+    "webm": synthetic_webm,
+    "ogg": synthetic_ogg,
+    "mp3": synthetic_mp3,
+}
+
+
+def synthetic_audio(duration: float, output_format: str) -> bytes:
+    return SYNTHETIC_FORMATS[output_format](max(duration, 0.0))
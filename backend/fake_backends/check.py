@@ -0,0 +1,93 @@
+"""
+Kiểm tra nhanh backend giả: dựng từng backend giả qua đúng hàm mà server / worker dùng
+(create_tts_module, create_translator, TranscriptApi) rồi gọi những gì worker sẽ gọi,
+với TTS là cả hai chế độ TTS_SYNTHESIS_MODE. Không cần Redis: audio cache được thay bằng
+bản luôn tổng hợp lại.
+
+Chạy từ thư mục backend:
+    FAKE_BACKENDS=all python -m fake_backends.check
+
+Thoát với mã 1 nếu có backend giả lỗi.
+"""
+import sys
+import traceback
+from fake_backends.config import SUPPORTED_FAKES, fake_enabled
+
+SAMPLE_SEGMENTS = [
+    {"text_translated": "xin chào các bạn", "start": 300.0, "duration": 1.5},
+    {"text_translated": "", "start": 301.5, "duration": 0.5},
+    {"text_translated": "hôm nay chúng ta học về redis và hàng đợi", "start": 302.4, "duration": 1.0},
+]
+
+
+class PassThroughAudioCache:
+    # Thay AudioCache (cần Redis): mọi SSML đều được tổng hợp lại
+    def get_or_synthesize_timed(self, tts, ssml):
+        return tts.synthesize_with_timing(ssml)
+
+
+def check_tts():
+    from Text_To_Speech.TextToSpeech import create_tts_module
+    from Text_To_Speech.alignment import synthesize_aligned
+    from Text_To_Speech.stitching import synthesize_segments
+    from Text_To_Speech.pcm import PCM_FORMAT
+
+    tts = create_tts_module(voice="vi-VN-HoaiMyNeural", output_format="webm")
+    # Như warm_up_tts ở chế độ chunk và segment
+    tts.warm_up(1)
+    tts.for_format(PCM_FORMAT).warm_up(1)
+    for mode, synthesize in (("chunk", synthesize_aligned), ("segment", synthesize_segments)):
+        aligned = synthesize(tts, PassThroughAudioCache(), SAMPLE_SEGMENTS)
+        if aligned is None:
+            raise RuntimeError(f"TTS giả không trả audio ở chế độ {mode}")
+        print(f"  tts/{mode}: {len(aligned[0].getvalue())} byte, {aligned[1]['duration']:.2f} giây")
+
+
+def check_translator():
+    from Translator.registry import TRANSLATOR_MAP, create_translator
+
+    for name in TRANSLATOR_MAP:
+        result = create_translator(name, video_id="fake-check").translate(
+            texts=["hello world"], source_lang="", target_langs="vi"
+        )
+        if not result:
+            raise RuntimeError(f"{name} giả không trả kết quả dịch")
+        print(f"  translator/{name}: {result}")
+
+
+def check_transcript():
+    from fake_backends.youtube import FakeYouTubeTranscriptApi
+
+    transcript = FakeYouTubeTranscriptApi.list_transcripts("fake-check").find_transcript(["en"]).fetch().to_raw_data()
+    if not transcript:
+        raise RuntimeError("Transcript giả rỗng")
+    print(f"  transcript: {len(transcript)} segment")
+
+
+CHECKS = {
+    "tts": check_tts,
+    "translator": check_translator,
+    "transcript": check_transcript,
+}
+
+
+def main():
+    failed = []
+    for backend in SUPPORTED_FAKES:
+        if not fake_enabled(backend):
+            print(f"⏭️ {backend}: không bật trong FAKE_BACKENDS, bỏ qua")
+            continue
+        print(f"🧪 {backend}")
+        try:
+            CHECKS[backend]()
+        except Exception:
+            traceback.print_exc()
+            failed.append(backend)
+    if failed:
+        print(f"❌ Backend giả lỗi: {', '.join(failed)}")
+        sys.exit(1)
+    print("✅ Mọi backend giả đã bật đều chạy được.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import os
+import time
+import random
+import hashlib
+import threading
+from loguru import logger
+
+# Backend giả để chạy / load test không cần Azure, Gemini, YouTube.
+# FAKE_BACKENDS: danh sách phân cách bằng dấu phẩy trong {translator, tts, transcript}, hoặc "all".
+FAKE_BACKENDS = {name.strip() for name in os.getenv("FAKE_BACKENDS", "").split(",") if name.strip()}
+FAKE_SEED = int(os.getenv("FAKE_SEED", 0))
+SUPPORTED_FAKES = ("translator", "tts", "transcript")
+
+
+class FakeBackendError(RuntimeError):
+    """Lỗi được backend giả cố ý tạo ra theo FAKE_*_FAILURE_RATE."""
+
+
+def fake_enabled(backend: str) -> bool:
+    return "all" in FAKE_BACKENDS or backend in FAKE_BACKENDS
+
+
+def stable_seed(*parts) -> int:
+    # Seed cố định theo nội dung (không dùng hash() vì bị ngẫu nhiên hóa giữa các tiến trình)
+    raw = "\x00".join(str(part) for part in (FAKE_SEED,) + parts).encode("utf-8")
+    return int.from_bytes(hashlib.sha256(raw).digest()[:8], "big")
+
+
+class FakeProfile:
+    """
+    Độ trễ và tỉ lệ lỗi của một backend giả, đọc từ biến môi trường:
+    FAKE_{NAME}_LATENCY_MS, FAKE_{NAME}_JITTER_MS, FAKE_{NAME}_FAILURE_RATE
+    (mặc định lấy từ FAKE_LATENCY_MS / FAKE_JITTER_MS / FAKE_FAILURE_RATE).
+    """
+
+    def __init__(self, name: str):
+        prefix = f"FAKE_{name.upper()}_"
+        self.name = name
+        self.latency_ms = float(os.getenv(prefix + "LATENCY_MS", os.getenv("FAKE_LATENCY_MS", 50)))
+        self.jitter_ms = float(os.getenv(prefix + "JITTER_MS", os.getenv("FAKE_JITTER_MS", 10)))
+        self.failure_rate = float(os.getenv(prefix + "FAILURE_RATE", os.getenv("FAKE_FAILURE_RATE", 0)))
+        self._rng = random.Random(stable_seed(name))
+        self._lock = threading.Lock()
+
+    def simulate(self, extra_ms: float = 0.0):
+        """
+        Chờ như một lần gọi dịch vụ thật, rồi ném FakeBackendError với xác suất `failure_rate`.
+        """
+        with self._lock:
+            delay_ms = max(0.0, self.latency_ms + extra_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms))
+            failed = self._rng.random() < self.failure_rate
+        time.sleep(delay_ms / 1000)
+        if failed:
+            raise FakeBackendError(f"Fake {self.name} failure")
+
+
+def log_enabled_fakes():
+    enabled = [backend for backend in SUPPORTED_FAKES if fake_enabled(backend)]
+    if enabled:
+        logger.warning(f"🧪 Đang dùng backend giả cho: {', '.join(enabled)} (FAKE_BACKENDS)")
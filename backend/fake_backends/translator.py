@@ -0,0 +1,79 @@
+import os
+import logging
+from typing import Union, Iterable, Dict, Optional, List
+from fake_backends.config import FakeProfile, FakeBackendError
+
+# Thời gian xử lý thêm theo độ dài văn bản, giống dịch vụ thật chậm hơn khi batch lớn
+FAKE_TRANSLATOR_MS_PER_KCHAR = float(os.getenv("FAKE_TRANSLATOR_MS_PER_KCHAR", 20))
+
+_profiles: Dict[str, FakeProfile] = {}
+
+
+def _profile(name: str) -> FakeProfile:
+    return _profiles.setdefault(name, FakeProfile(name))
+
+
+def fake_translation(text: str, target_lang: str) -> str:
+    # Kết quả cố định theo input để chạy lại cho cùng kết quả (và translation memory vẫn hit)
+    return f"[{target_lang}] {text}"
+
+
+def _normalize(texts: Union[str, List[str]], target_langs: Union[str, Iterable[str]]):
+    texts = [texts] if isinstance(texts, str) else list(texts)
+    target_langs = [target_langs] if isinstance(target_langs, str) else list(target_langs)
+    return texts, target_langs
+
+
+class FakeAzureTranslator:
+    """AzureTranslator giả: cùng giới hạn batch và dạng kết quả, không gọi mạng."""
+
+    MAX_BATCH_ITEMS = 1000
+    MAX_BATCH_CHARS = 50000
+
+    def __init__(self, *args, **kwargs):
+        self.profile = _profile("translator")
+
+    def translate(self,
+                  texts: Union[str, List[str]],
+                  source_lang: Optional[str] = "",
+                  target_langs: Union[str, Iterable[str]] = "vi",
+                  timeout: int = None) -> Optional[List[Dict[str, str]]]:
+        texts, target_langs = _normalize(texts, target_langs)
+        try:
+            self.profile.simulate(sum(map(len, texts)) / 1000 * FAKE_TRANSLATOR_MS_PER_KCHAR)
+        except FakeBackendError as err:
+            # AzureTranslator trả None khi request lỗi
+            print(f"⚠️ Translator API error: {err}")
+            return None
+        return [{lang: fake_translation(text, lang) for lang in target_langs} for text in texts]
+
+
+class FakeGenAITranslator:
+    """GenAITranslator giả: không lấy metadata YouTube, không gọi Gemini."""
+
+    MAX_BATCH_ITEMS = 100
+    MAX_BATCH_CHARS = 8000
+
+    def __init__(self, video_id=None, *args, **kwargs):
+        if not video_id:
+            raise ValueError("Phải cung cấp video_id.")
+        self.video_id = video_id
+        self.profile = _profile("genai")
+
+    def translate(self, texts: Union[str, List[str]], source_lang="", target_langs='vi') -> Optional[List[Dict[str, str]]]:
+        texts, _ = _normalize(texts, target_langs)
+        if not texts:
+            return []
+        try:
+            self.profile.simulate(sum(map(len, texts)) / 1000 * FAKE_TRANSLATOR_MS_PER_KCHAR)
+        except FakeBackendError as err:
+            # GenAITranslator trả list rỗng khi lỗi
+            logging.exception(f"Lỗi trong quá trình dịch: {err}")
+            return []
+        return [{target_langs: fake_translation(text, target_langs)} for text in texts]
+
+
+FAKE_TRANSLATOR_MAP = {
+    "AzureTranslator": FakeAzureTranslator,
+    "GenAITranslator": FakeGenAITranslator,
+}
@@ -0,0 +1,92 @@
+import os
+import re
+import html
+import logging
+from io import BytesIO
+from typing import Dict, Optional, Tuple
+from Text_To_Speech.TextToSpeech import TextToSpeechModule, TICKS_PER_SECOND, MAX_BREAK_MS
+from fake_backends.config import FakeProfile, FakeBackendError
+from fake_backends.audio import SYNTHETIC_FORMATS, synthetic_audio
+
+# Tốc độ đọc giả ở rate 0% (ký tự / giây) và thời gian xử lý thêm cho mỗi giây audio
+FAKE_TTS_CPS = float(os.getenv("FAKE_TTS_CPS", 14))
+FAKE_TTS_MS_PER_AUDIO_SECOND = float(os.getenv("FAKE_TTS_MS_PER_AUDIO_SECOND", 5))
+
+_SSML_TOKEN = re.compile(
+    r'<bookmark mark="(?P<mark>[^"]+)"/>'
+    r'|<prosody rate="(?P<rate>[-+]?\d+)%">(?P<text>.*?)</prosody>'
+    r'|<break time="(?P<break>\d+)ms"/>',
+    re.S,
+)
+
+_profile = FakeProfile("tts")
+
+
+class FakeTextToSpeechModule(TextToSpeechModule):
+    """
+    TextToSpeechModule giả: dựng SSML như bản thật, nhưng "tổng hợp" bằng cách tính thời lượng đọc
+    từ SSML (FAKE_TTS_CPS, prosody rate, break) và trả về audio im lặng đúng định dạng / thời lượng.
+    """
+
+    def __init__(self, region: str = None, text_to_speech_key: str = None,
+                 output_format: str = "mp3", voice: str = "vi-VN-HoaiMyNeural"):
+        self.region = region or "fake"
+        self.key = text_to_speech_key or "fake"
+        self.speech_config = None
+        self.voice = voice
+        self.default_cps = 10
+        self.current_format = None
+        self.output_format = output_format
+        self._set_output_format(output_format)
+        self.logger = logging.getLogger(__name__)
+        self._init_shared_state()
+
+    def _set_output_format(self, output_format: str):
+        if output_format not in SYNTHETIC_FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}. Supported: {list(SYNTHETIC_FORMATS)}")
+        self.current_format = output_format
+
+    @staticmethod
+    def speak_timeline(ssml_text: str) -> Tuple[Dict[str, float], float]:
+        # Thời điểm các bookmark và tổng thời lượng (giây) nếu đọc SSML với tốc độ FAKE_TTS_CPS
+        marks, position = {}, 0.0
+        for token in _SSML_TOKEN.finditer(ssml_text):
+            if token.group("mark"):
+                # Làm tròn theo tick như audio_offset của Azure
+                marks[token.group("mark")] = round(position * TICKS_PER_SECOND) / TICKS_PER_SECOND
+            elif token.group("rate") is not None:
+                speed = FAKE_TTS_CPS * (1 + int(token.group("rate")) / 100)
+                position += len(html.unescape(token.group("text"))) / speed
+            else:
+                # Azure cắt break dài (vd. khoảng lặng đầu chunk ở giữa video) về MAX_BREAK_MS
+                position += min(int(token.group("break")), MAX_BREAK_MS) / 1000
+        return marks, position
+
+    def synthesize_with_timing(self, ssml_text: str, audio_format=None
+                               ) -> Optional[Tuple[BytesIO, Dict[str, float], Optional[float]]]:
+        if not ssml_text.strip():
+            raise ValueError("SSML text cannot be empty")
+        marks, duration = self.speak_timeline(ssml_text)
+        try:
+            _profile.simulate(duration * FAKE_TTS_MS_PER_AUDIO_SECOND)
+        except FakeBackendError as e:
+            self.logger.error(f"TTS synthesis failed: {e}")
+            return None
+        audio_bytes = synthetic_audio(duration, self.output_format)
+        self.logger.info(f"Fake TTS completed, audio size: {len(audio_bytes)} bytes")
+        return BytesIO(audio_bytes), marks, duration
+
+    def warm_up(self, count: int) -> int:
+        # Không có kết nối nào để mở trước
+        return 0
+
+    def synthesize_to_file(self, ssml: str, output_file: str) -> bool:
+        synthesized = self.synthesize_with_timing(ssml)
+        if synthesized is None:
+            return False
+        with open(output_file, "wb") as audio_file:
+            audio_file.write(synthesized[0].getvalue())
+        return True
+
+    def synthesize_to_speaker(self, ssml: str) -> bool:
+        return self.synthesize_with_timing(ssml) is not None
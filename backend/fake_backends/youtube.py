@@ -0,0 +1,72 @@
+import os
+import random
+from typing import List, Dict, Iterable
+from youtube_transcript_api import NoTranscriptFound, VideoUnavailable
+from fake_backends.config import FakeProfile, FakeBackendError, stable_seed
+
+# Transcript giả: độ dài video và các ngôn ngữ có sẵn (có thể ghi đè bằng biến môi trường)
+FAKE_TRANSCRIPT_SECONDS = float(os.getenv("FAKE_TRANSCRIPT_SECONDS", 600))
+FAKE_TRANSCRIPT_LANGUAGES = [lang.strip() for lang in os.getenv("FAKE_TRANSCRIPT_LANGUAGES", "en").split(",") if lang.strip()]
+
+_WORDS = ["today", "we", "will", "learn", "about", "python", "redis", "audio", "video", "speech",
+          "translation", "and", "the", "queue", "worker", "cache", "fast", "simple", "example", "this"]
+
+_profile = FakeProfile("transcript")
+
+
+def fake_transcript_entries(video_id: str, language: str, seconds: float = FAKE_TRANSCRIPT_SECONDS) -> List[Dict]:
+    # Cùng video_id / ngôn ngữ luôn cho cùng transcript
+    rng = random.Random(stable_seed(video_id, language))
+    entries, start = [], round(rng.uniform(0, 1.5), 2)
+    while start < seconds:
+        duration = round(rng.uniform(1.2, 5.0), 2)
+        text = " ".join(rng.choice(_WORDS) for _ in range(max(1, int(duration * 2.5))))
+        entries.append({"text": f"{text} ({language})", "start": start, "duration": duration})
+        start = round(start + duration + rng.choice([0.0, 0.0, 0.2, 0.5, 1.5]), 2)
+    return entries
+
+
+class FakeFetchedTranscript:
+    def __init__(self, entries: List[Dict]):
+        self._entries = entries
+
+    def to_raw_data(self) -> List[Dict]:
+        return [dict(entry) for entry in self._entries]
+
+
+class FakeTranscript:
+    def __init__(self, video_id: str, language_code: str):
+        self.video_id = video_id
+        self.language_code = language_code
+        self.is_generated = False
+
+    def fetch(self) -> FakeFetchedTranscript:
+        _profile.simulate()
+        return FakeFetchedTranscript(fake_transcript_entries(self.video_id, self.language_code))
+
+
+class FakeTranscriptList:
+    def __init__(self, video_id: str, languages: List[str]):
+        self.video_id = video_id
+        self._transcripts = {lang: FakeTranscript(video_id, lang) for lang in languages}
+
+    def __iter__(self):
+        return iter(self._transcripts.values())
+
+    def find_transcript(self, language_codes: Iterable[str]) -> FakeTranscript:
+        for language_code in language_codes:
+            if language_code in self._transcripts:
+                return self._transcripts[language_code]
+        raise NoTranscriptFound(self.video_id, list(language_codes), self)
+
+
+class FakeYouTubeTranscriptApi:
+    """Thay cho YouTubeTranscriptApi trong `main.get_transcript` (cùng `list_transcripts`)."""
+
+    @staticmethod
+    def list_transcripts(video_id: str) -> FakeTranscriptList:
+        try:
+            _profile.simulate()
+        except FakeBackendError:
+            raise VideoUnavailable(video_id)
+        return FakeTranscriptList(video_id, FAKE_TRANSCRIPT_LANGUAGES)
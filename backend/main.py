@@ -3,9 +3,15 @@ from fastapi.responses import JSONResponse
 import base64
 
 import json
-import redis
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import StreamingResponse
+import uuid
+import struct
+import hashlib
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from anyio import to_thread
+from fastapi.responses import StreamingResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from youtube_transcript_api import (
     YouTubeTranscriptApi,
@@ -14,18 +20,71 @@ from youtube_transcript_api import (
     NoTranscriptFound
 )
 from pydantic import BaseModel, Field
-from typing import List, Dict
-from Translator.translator import AzureTranslator
-from Translator.genAITranslator import GenAITranslator
-from Text_To_Speech.TextToSpeech import TextToSpeechModule
-from Handler_Transcript.Handler_Transcript import Handler
+from typing import List, Dict, AsyncIterable, AsyncIterator, Optional
+from Translator.registry import TRANSLATOR_MAP
+from Text_To_Speech.TextToSpeech import create_tts_module
+from fake_backends.config import fake_enabled, log_enabled_fakes
+from Handler_Transcript.compact_transcript import CompactTranscript
 from loguru import logger
-from redis_cache.cache import multiprocessingForTTSAndTranslator, push_all_chunks_to_redis
+from redis_cache.cache import (
+    push_all_chunks_to_redis,
+    refresh_transcript_chunks,
+    stream_audio_chunks_async,
+    submit_dubbing_job,
+    submit_prefetch_job,
+    dubbing_variant,
+    load_cached_audio,
+    load_audio_meta,
+    audio_key,
+    synthesize_timed
+)
+from redis_cache.audio_cache import AudioCache
+from redis_cache.transcript_cache import TranscriptCache
+from redis_cache.worker_pool import WorkerPool
+from redis_cache.jobs import get_job_status
+from redis_cache.scheduler import seek_job
+from redis_cache.store import get_redis, get_many, close_async_redis
+from redis_cache.codec import decode_segments
+from monitoring.metrics import configure_metrics, span, observe, inc_counter
+from monitoring.prometheus import CACHE_LOOKUPS, render_metrics
 
 # ------------------ Cấu hình ứng dụng ------------------
 
-app = FastAPI()
-transcriptHandler = Handler()
+REDIS_CONFIG = {
+    "host": os.getenv("REDIS_HOST", "172.21.106.92"),
+    "port": int(os.getenv("REDIS_PORT", 6379)),
+    "db": int(os.getenv("REDIS_DB", 0))
+}
+
+# Tham số chia transcript, cũng là một phần key của manifest trong cache
+CHUNK_MAX_CHARS = 400
+CHUNK_MAX_ITEMS = 10
+
+# Số luồng tối đa cho phần chặn của request (Redis đồng bộ, YouTube, Azure TTS, base64).
+# Handler `def` và run_in_threadpool đều dùng chung giới hạn này; việc chờ worker pool thì không chiếm luồng
+API_THREADPOOL_SIZE = int(os.getenv("API_THREADPOOL_SIZE", 40))
+
+worker_pool = WorkerPool(REDIS_CONFIG)
+transcript_cache = TranscriptCache(REDIS_CONFIG)
+
+# FAKE_BACKENDS có "transcript": transcript giả, không gọi YouTube
+if fake_enabled("transcript"):
+    from fake_backends.youtube import FakeYouTubeTranscriptApi as TranscriptApi
+else:
+    TranscriptApi = YouTubeTranscriptApi
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Worker dịch / TTS được tạo một lần và dùng lại cho mọi request
+    log_enabled_fakes()
+    configure_metrics(REDIS_CONFIG)
+    to_thread.current_default_thread_limiter().total_tokens = API_THREADPOOL_SIZE
+    worker_pool.start()
+    yield
+    worker_pool.stop()
+    await close_async_redis()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -34,20 +93,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ------------------ Mapping Translator ------------------
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    # Nhãn theo route (/audio/{chunk_id}) thay vì path thật để số series không tăng theo chunk_id
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    if route is not None:
+        observe(f"http {request.method} {route.path}", time.perf_counter() - started,
+                "error" if response.status_code >= 500 else "ok")
+    return response
 
-TRANSLATOR_MAP = {
-    "AzureTranslator": AzureTranslator,
-    "GenAITranslator": GenAITranslator
-}
+# ------------------ Kiểm tra Translator ------------------
 
-def get_translator(name: str, video_id: str = None):
-    cls = TRANSLATOR_MAP.get(name)
-    if not cls:
+def validate_translator(name: str) -> str:
+    # Translator được khởi tạo và giữ lại trong worker pool, ở đây chỉ kiểm tra tên
+    if name not in TRANSLATOR_MAP:
         logger.error(f"❌ Translator không được hỗ trợ: {name}")
         raise HTTPException(status_code=400, detail=f"Unsupported translator: {name}")
     logger.info(f"✅ Sử dụng translator: {name}")
-    return cls(video_id=video_id) if name == "GenAITranslator" else cls()
+    return name
 
 
 # ------------------ Schema ------------------
@@ -60,26 +125,46 @@ class DubbingRequest(BaseModel):
     translator: str = "AzureTranslator"
     tts_voice: str = Field(..., description="Tên giọng đọc TTS")
     need_translator: bool
+    response_mode: str = Field("json", description="json | ndjson | sse | binary | multipart")
+    position: Optional[float] = Field(None, description="Vị trí phát hiện tại (giây), dùng để tính deadline của chunk")
 
 class VideoRequest(BaseModel):
     video_id: str
     target_language: str = "vi"
+    # Lồng tiếng trước cả video ở nền (chỉ khi cần dịch), các tham số dưới đây giống /dubbing
+    prefetch: bool = False
+    position: float = Field(0.0, description="Vị trí phát hiện tại (giây)")
+    source_lang: str = ""
+    translator: str = "AzureTranslator"
+    tts_voice: Optional[str] = None
+
+class SeekRequest(BaseModel):
+    position: float = Field(..., description="Vị trí phát mới (giây)")
 
 # ------------------ Hàm xử lý phụ trợ ------------------
 
 def get_transcript(data: VideoRequest) -> Dict:
+    cached = transcript_cache.get_transcript(data.video_id, data.target_language)
+    inc_counter(CACHE_LOOKUPS, cache="transcript", result="hit" if cached is not None else "miss")
+    if cached is not None:
+        logger.info(f"♻️ Dùng transcript đã cache cho video {data.video_id} ({data.target_language})")
+        return cached
     try:
-        transcript_list = YouTubeTranscriptApi.list_transcripts(data.video_id)
-        logger.info(f"📋 Danh sách transcript: {[t.language_code for t in transcript_list]}")
+        with span("youtube.transcript", video_id=data.video_id):
+            # Một lần list + một lần fetch; get_transcript sẽ list lại thêm một lần nữa
+            transcript_list = TranscriptApi.list_transcripts(data.video_id)
+            logger.info(f"📋 Danh sách transcript: {[t.language_code for t in transcript_list]}")
 
-        if data.target_language in [t.language_code for t in transcript_list]:
-            transcript = YouTubeTranscriptApi.get_transcript(data.video_id, languages=[data.target_language])
-            logger.info(f"✅ Đã tìm thấy transcript ngôn ngữ đích: {data.target_language}")
-            return {"transcript": transcript, "flagTargetLang": True}
-        else:
-            transcript = YouTubeTranscriptApi.get_transcript(data.video_id)
-            logger.warning("⚠️ Không có transcript đích, sử dụng transcript gốc.")
-            return {"transcript": transcript, "flagTargetLang": False}
+            if data.target_language in [t.language_code for t in transcript_list]:
+                transcript = transcript_list.find_transcript([data.target_language]).fetch().to_raw_data()
+                logger.info(f"✅ Đã tìm thấy transcript ngôn ngữ đích: {data.target_language}")
+                transcript_info = {"transcript": CompactTranscript.from_entries(transcript), "flagTargetLang": True}
+            else:
+                transcript = transcript_list.find_transcript(["en"]).fetch().to_raw_data()
+                logger.warning("⚠️ Không có transcript đích, sử dụng transcript gốc.")
+                transcript_info = {"transcript": CompactTranscript.from_entries(transcript), "flagTargetLang": False}
+        transcript_cache.set_transcript(data.video_id, data.target_language, transcript_info)
+        return transcript_info
 
     except TranscriptsDisabled:
         logger.error("🚫 Transcript đã bị tắt.")
@@ -94,23 +179,205 @@ def get_transcript(data: VideoRequest) -> Dict:
         logger.exception("❌ Lỗi không xác định khi lấy transcript.")
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
+# Các chế độ trả audio theo từng chunk ngay khi TTS xong
+MULTIPART_BOUNDARY = f"dubbing-audio-{uuid.uuid4().hex}"
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+    "binary": "application/octet-stream",
+    "multipart": f"multipart/mixed; boundary={MULTIPART_BOUNDARY}",
+}
+
+def detect_audio_media_type(audio_bytes: bytes) -> str:
+    # Nhận dạng định dạng theo magic bytes của container
+    if audio_bytes.startswith(b"\x1a\x45\xdf\xa3"):
+        return "audio/webm"
+    if audio_bytes.startswith(b"OggS"):
+        return "audio/ogg"
+    if audio_bytes.startswith(b"RIFF"):
+        return "audio/wav"
+    return "audio/mpeg"
+
+def encode_stream_frame(mode: str, chunk_id: str, audio_bytes: bytes) -> bytes:
+    if mode == "binary":
+        # Frame: [4 byte độ dài chunk_id][chunk_id utf-8][4 byte độ dài audio][audio]
+        chunk_id_bytes = chunk_id.encode("utf-8")
+        return (struct.pack(">I", len(chunk_id_bytes)) + chunk_id_bytes
+                + struct.pack(">I", len(audio_bytes)) + audio_bytes)
+
+    if mode == "multipart":
+        headers = (f"--{MULTIPART_BOUNDARY}\r\n"
+                   f"Content-Type: {detect_audio_media_type(audio_bytes)}\r\n"
+                   f"Content-Length: {len(audio_bytes)}\r\n"
+                   f"X-Chunk-Id: {chunk_id}\r\n\r\n")
+        return headers.encode("utf-8") + audio_bytes + b"\r\n"
+
+    payload = json.dumps({
+        "chunk_id": chunk_id,
+        "audio_base64": base64.b64encode(audio_bytes).decode('utf-8'),
+    })
+    if mode == "sse":
+        return f"event: chunk\ndata: {payload}\n\n".encode("utf-8")
+    return (payload + "\n").encode("utf-8")
+
+async def chain_audio_streams(cached_items: List[Dict], live_stream: Optional[AsyncIterable[Dict]] = None) -> AsyncIterator[Dict]:
+    # Chunk đã có audio gửi trước, sau đó tới chunk worker vừa tổng hợp xong
+    for item in cached_items:
+        yield item
+    if live_stream is not None:
+        async for item in live_stream:
+            yield item
+
+async def encode_audio_stream(mode: str, audio_stream: AsyncIterable[Dict], list_chunk_ids: List[str]) -> AsyncIterator[bytes]:
+    sent = []
+    async for item in audio_stream:
+        sent.append(item["chunk_id"])
+        yield encode_stream_frame(mode, item["chunk_id"], item["audio_bytes"])
+
+    # Frame kết thúc cho ndjson / sse: báo các chunk không tạo được audio
+    missing = [chunk_id for chunk_id in list_chunk_ids if chunk_id not in sent]
+    if mode == "sse":
+        yield f"event: done\ndata: {json.dumps({'missing': missing})}\n\n".encode("utf-8")
+    elif mode == "ndjson":
+        yield (json.dumps({"done": True, "missing": missing}) + "\n").encode("utf-8")
+    elif mode == "multipart":
+        yield f"--{MULTIPART_BOUNDARY}--\r\n".encode("utf-8")
+
+def parse_range_header(range_header: str, size: int):
+    """
+    Đọc header Range dạng "bytes=start-end" (chỉ hỗ trợ một khoảng).
+
+    Returns:
+        (start, end) tính cả hai đầu, hoặc None nếu khoảng không hợp lệ.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    start_str, _, end_str = spec.strip().partition("-")
+    try:
+        if start_str:
+            start = int(start_str)
+            end = int(end_str) if end_str else size - 1
+        else:
+            # "bytes=-N": N byte cuối
+            start = max(size - int(end_str), 0)
+            end = size - 1
+    except ValueError:
+        return None
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        return None
+    return start, end
+
+def encode_json_chunks(list_chunk_ids: List[str], audio_by_chunk: Dict[str, bytes], variant: str,
+                       redis_config: dict) -> List[Dict]:
+    # Offset đo được của từng segment trong audio, client đồng bộ theo đó thay vì tự ước lượng
+    with span("dubbing.audio_meta", chunks=len(audio_by_chunk)):
+        timings = load_audio_meta(get_redis(redis_config), list(audio_by_chunk), variant)
+    with span("dubbing.base64", chunks=len(audio_by_chunk)):
+        return [
+            {
+                "chunk_id": chunk_id,
+                "audio_base64": base64.b64encode(audio_by_chunk[chunk_id]).decode('utf-8'),
+                "timing": timings.get(chunk_id),
+            }
+            for chunk_id in list_chunk_ids
+            if chunk_id in audio_by_chunk
+        ]
+
+def synthesize_target_transcript(data: DubbingRequest, redis_config: dict) -> Response:
+    # Transcript đã ở ngôn ngữ đích: tổng hợp một audio chung cho mọi chunk, không qua worker pool
+    redis_conn = get_redis(redis_config)
+    segments = []
+
+    with span("dubbing.load_transcript", chunks=len(data.list_chunks_id)):
+        raw_chunks = get_many(redis_conn, [f"transcript:{chunk_id}" for chunk_id in data.list_chunks_id])
+    for chunk_id, raw_chunk in zip(data.list_chunks_id, raw_chunks):
+        if raw_chunk:
+            try:
+                # Transcript đã ở ngôn ngữ đích nên đọc thẳng text gốc
+                segments.extend(decode_segments(raw_chunk).to_entries(text_key="text_translated"))
+            except Exception as e:
+                logger.warning(f"❌ Lỗi decode chunk {chunk_id}: {e}")
+        else:
+            logger.warning(f"[TTS] Không tìm thấy chunk: {chunk_id}")
+
+    if not segments:
+        raise HTTPException(status_code=404, detail="Không có transcript hợp lệ")
+
+    try:
+        tts = create_tts_module(voice=data.tts_voice, output_format="webm")
+        logger.info(f"🔊 Đang tạo audio đã căn thời lượng cho {len(segments)} đoạn.")
+        with span("dubbing.synthesize", segments=len(segments)):
+            aligned = synthesize_timed(tts, AudioCache(redis_config), segments)
+        if aligned is None:
+            raise RuntimeError("Azure TTS không trả về audio")
+        audio_bytesio, timing = aligned
+        audio_bytesio.seek(0)
+        if data.response_mode in STREAM_MEDIA_TYPES:
+            audio_stream = [{"chunk_id": "combined", "audio_bytes": audio_bytesio.getvalue()}]
+            return StreamingResponse(
+                encode_audio_stream(data.response_mode, chain_audio_streams(audio_stream), ["combined"]),
+                media_type=STREAM_MEDIA_TYPES[data.response_mode]
+            )
+        # Trả về một danh sách chứa một BytesIO được mã hóa
+        with span("dubbing.base64", chunks=1):
+            audio_base64 = base64.b64encode(audio_bytesio.read()).decode('utf-8')
+        return JSONResponse(content={
+            "chunks": [{"chunk_id": "combined", "audio_base64": audio_base64, "timing": timing}]
+        })
+    except Exception as e:
+        logger.exception(f"❌ Lỗi khi synthesize TTS: {e}")
+        raise HTTPException(status_code=500, detail=f"TTS synthesis failed: {str(e)}")
+
 # ------------------ Endpoint ------------------
 
+# Handler `def` (không phải `async def`): FastAPI chạy trong threadpool nên YouTube / Redis
+# đồng bộ không chặn event loop của các request khác
 @app.post("/video_split")
-async def split(data: VideoRequest):
+def split(data: VideoRequest):
     logger.info(f"🎬 Nhận yêu cầu lồng tiếng video ID: {data.video_id}")
     transcript_info = get_transcript(data)
-    chunks = transcriptHandler.split_transcript(transcript_info['transcript'], data.video_id)
-    
-    redis_config = {"host": "172.21.106.92", "port": 6379, "db": 0}
-    push_all_chunks_to_redis(chunks=chunks, redis_config=redis_config)
-    
-    logger.info(f"📤 Đã chia transcript thành {len(chunks)} đoạn.")
-    list_chunks_id = [item['id'] for item in chunks]
+
+    redis_config = REDIS_CONFIG
+    list_chunks_id = transcript_cache.get_manifest(data.video_id, data.target_language, CHUNK_MAX_CHARS, CHUNK_MAX_ITEMS)
+    if list_chunks_id is not None and refresh_transcript_chunks(list_chunks_id, redis_config):
+        logger.info(f"♻️ Dùng lại {len(list_chunks_id)} đoạn đã chia của video {data.video_id}.")
+    else:
+        # Chunk là view trên transcript dạng cột, ghi thẳng ra nhị phân khi push
+        chunks = [
+            {'id': chunk_id, 'chunk': chunk_view}
+            for chunk_id, chunk_view in transcript_info['transcript'].split(
+                data.video_id, max_chars=CHUNK_MAX_CHARS, max_items=CHUNK_MAX_ITEMS
+            )
+        ]
+        push_all_chunks_to_redis(chunks=chunks, redis_config=redis_config)
+        logger.info(f"📤 Đã chia transcript thành {len(chunks)} đoạn.")
+        list_chunks_id = [item['id'] for item in chunks]
+        transcript_cache.set_manifest(data.video_id, data.target_language, CHUNK_MAX_CHARS, CHUNK_MAX_ITEMS, list_chunks_id)
     
+    prefetch_job_id = None
+    if data.prefetch and not transcript_info['flagTargetLang']:
+        if not data.tts_voice:
+            raise HTTPException(status_code=400, detail="tts_voice is required for prefetch")
+        prefetch_job_id = submit_prefetch_job(
+            redis_config=redis_config,
+            list_chunk_ids=list_chunks_id,
+            translator_name=validate_translator(data.translator),
+            video_id=data.video_id,
+            source_lang=data.source_lang,
+            target_lang=data.target_language,
+            tts_voice=data.tts_voice,
+            position=data.position
+        )
+
     return {
         'total': len(list_chunks_id),
-        'info' : transcript_info,
+        'info' : {
+            'transcript': transcript_info['transcript'].to_entries(),
+            'flagTargetLang': transcript_info['flagTargetLang'],
+        },
+        'prefetch_job_id': prefetch_job_id,
         'list_chunks': [
                         item.split('_')[1]
                         for item in list_chunks_id
@@ -121,67 +388,124 @@ async def split(data: VideoRequest):
 
 @app.post("/dubbing")
 async def dubbing(data: DubbingRequest):
-    redis_config = {"host": "172.21.106.92", "port": 6379, "db": 0}
+    # Phần chặn (Redis đồng bộ, Azure TTS, base64) chạy trong threadpool có giới hạn,
+    # còn việc chờ worker pool dùng redis.asyncio nên không giữ luồng nào trong lúc chờ
+    redis_config = REDIS_CONFIG
+
+    if data.response_mode != "json" and data.response_mode not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported response_mode: {data.response_mode}")
 
     if data.need_translator:
-        translator = get_translator(data.translator, video_id=data.video_id)
-        multiprocessing_res = multiprocessingForTTSAndTranslator(
-            list_chunk_ids=data.list_chunks_id,
-            translator_func=translator.translate,
-            source_lang=data.source_lang,
-            target_lang=data.target_language,
-            video_id=data.video_id,
-            tts_voice=data.tts_voice,
-            redis_config=redis_config
-        )
+        translator_name = validate_translator(data.translator)
+
+        # Chunk đã được lồng tiếng (thường là bởi job lồng tiếng trước) thì đọc thẳng từ Redis
+        variant = dubbing_variant(translator_name, data.source_lang, data.target_language, data.tts_voice)
+        with span("dubbing.cached_audio", chunks=len(data.list_chunks_id)):
+            cached_audio = await run_in_threadpool(load_cached_audio, get_redis(redis_config), data.list_chunks_id, variant)
+        missing_ids = [chunk_id for chunk_id in data.list_chunks_id if chunk_id not in cached_audio]
+        inc_counter(CACHE_LOOKUPS, len(cached_audio), cache="dubbed_audio", result="hit")
+        inc_counter(CACHE_LOOKUPS, len(missing_ids), cache="dubbed_audio", result="miss")
+        logger.info(f"♻️ {len(cached_audio)}/{len(data.list_chunks_id)} chunk đã có audio sẵn.")
 
-        audio_chunks = multiprocessing_res['audio_chunks']
+        job_id = None
+        if missing_ids:
+            job_id = await run_in_threadpool(
+                submit_dubbing_job,
+                redis_config=redis_config,
+                list_chunk_ids=missing_ids,
+                translator_name=translator_name,
+                video_id=data.video_id,
+                source_lang=data.source_lang,
+                target_lang=data.target_language,
+                tts_voice=data.tts_voice,
+                position=data.position
+            )
 
-        if audio_chunks:
-            result = []
-            for item in audio_chunks:
-                item["audio_bytesio"].seek(0)
-                audio_base64 = base64.b64encode(item["audio_bytesio"].read()).decode('utf-8')
-                result.append({
-                    "chunk_id": item["chunk_id"],
-                    "audio_base64": audio_base64,
-                })
+        if data.response_mode in STREAM_MEDIA_TYPES:
+            audio_stream = [{"chunk_id": chunk_id, "audio_bytes": audio_bytes} for chunk_id, audio_bytes in cached_audio.items()]
+            headers = {}
+            live_stream = None
+            if job_id is not None:
+                live_stream = stream_audio_chunks_async(missing_ids, job_id, variant, redis_config)
+                headers["X-Job-Id"] = job_id
+            return StreamingResponse(
+                encode_audio_stream(data.response_mode, chain_audio_streams(audio_stream, live_stream), data.list_chunks_id),
+                media_type=STREAM_MEDIA_TYPES[data.response_mode],
+                headers=headers
+            )
 
+        audio_by_chunk = dict(cached_audio)
+        if job_id is not None:
+            with span("dubbing.wait_workers", job_id=job_id, chunks=len(missing_ids)):
+                async for item in stream_audio_chunks_async(missing_ids, job_id, variant, redis_config):
+                    audio_by_chunk[item["chunk_id"]] = item["audio_bytes"]
+            logger.info("🎉 Worker pool đã xử lý xong job!")
+
+        if audio_by_chunk:
+            result = await run_in_threadpool(encode_json_chunks, data.list_chunks_id, audio_by_chunk, variant, redis_config)
             return JSONResponse(content={"chunks": result})
 
         raise HTTPException(status_code=404, detail="No audio found")
 
-    
     else:
-        redis_conn = redis.Redis(**redis_config)
-        segments = []
-
-        for chunk_id in data.list_chunks_id:
-            raw_chunk = redis_conn.get(f"transcript:{chunk_id}")
-            if raw_chunk:
-                try:
-                    chunk_data = json.loads(raw_chunk)
-                    segments.append(chunk_data)
-                except Exception as e:
-                    logger.warning(f"❌ Lỗi decode chunk {chunk_id}: {e}")
-            else:
-                logger.warning(f"[TTS] Không tìm thấy chunk: {chunk_id}")
-
-        if not segments:
-            raise HTTPException(status_code=404, detail="Không có transcript hợp lệ")
-
-        try:
-            tts = TextToSpeechModule(voice=data.tts_voice, output_format="webm")
-            logger.info(f"🔊 Đang tạo SSML cho {len(segments)} đoạn.")
-            ssml = tts.generate_ssml(segments)
-            logger.info(f"📝 SSML đã được tạo:\n{ssml[:500]}...")
-            audio_bytesio = tts.ssml_to_bytesio(ssml)
-            audio_bytesio.seek(0)
-            # Trả về một danh sách chứa một BytesIO được mã hóa
-            audio_base64 = base64.b64encode(audio_bytesio.read()).decode('utf-8')
-            return JSONResponse(content={
-                "chunks": [{"chunk_id": "combined", "audio_base64": audio_base64}]
-            })
-        except Exception as e:
-            logger.exception(f"❌ Lỗi khi synthesize TTS: {e}")
-            raise HTTPException(status_code=500, detail=f"TTS synthesis failed: {str(e)}")
\ No newline at end of file
+        return await run_in_threadpool(synthesize_target_transcript, data, redis_config)
+
+@app.get("/metrics")
+def metrics():
+    # Định dạng text của Prometheus, gộp số liệu của API và mọi worker qua Redis
+    body = render_metrics(REDIS_CONFIG)
+    return Response(content=body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    status = get_job_status(get_redis(REDIS_CONFIG), job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
+
+@app.post("/jobs/{job_id}/seek")
+def job_seek(job_id: str, data: SeekRequest):
+    # Người xem tua video: chunk quanh vị trí mới của job được dịch / tổng hợp trước
+    if not seek_job(get_redis(REDIS_CONFIG), job_id, data.position):
+        raise HTTPException(status_code=404, detail="Job not found")
+    logger.info(f"⏩ Job {job_id} chuyển vị trí phát sang {data.position}s")
+    return {"job_id": job_id, "position": data.position}
+
+# Audio / timing của chunk lưu theo cấu hình lồng tiếng, query giống các trường cùng tên của /dubbing
+def audio_variant(tts_voice: str, target_language: str, source_lang: str, translator: str) -> str:
+    return dubbing_variant(translator, source_lang, target_language, tts_voice)
+
+@app.get("/audio/{chunk_id}/timing")
+def get_chunk_timing(chunk_id: str, tts_voice: str, target_language: str = "vi", source_lang: str = "",
+                     translator: str = "AzureTranslator"):
+    variant = audio_variant(tts_voice, target_language, source_lang, translator)
+    timing = load_audio_meta(get_redis(REDIS_CONFIG), [chunk_id], variant).get(chunk_id)
+    if timing is None:
+        raise HTTPException(status_code=404, detail="Timing not found")
+    return timing
+
+@app.get("/audio/{chunk_id}")
+def get_chunk_audio(chunk_id: str, request: Request, tts_voice: str, target_language: str = "vi",
+                    source_lang: str = "", translator: str = "AzureTranslator"):
+    variant = audio_variant(tts_voice, target_language, source_lang, translator)
+    audio_bytes = get_redis(REDIS_CONFIG).get(audio_key(variant, chunk_id))
+    if not audio_bytes:
+        raise HTTPException(status_code=404, detail="Audio not found")
+
+    etag = f'"{hashlib.sha1(audio_bytes).hexdigest()}"'
+    headers = {"ETag": etag, "Accept-Ranges": "bytes", "Cache-Control": "private, max-age=3600"}
+    media_type = detect_audio_media_type(audio_bytes)
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if range_header:
+        byte_range = parse_range_header(range_header, len(audio_bytes))
+        if byte_range is None:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{len(audio_bytes)}"})
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(audio_bytes)}"
+        return Response(content=audio_bytes[start:end + 1], status_code=206, media_type=media_type, headers=headers)
+
+    return Response(content=audio_bytes, media_type=media_type, headers=headers)
@@ -0,0 +1,174 @@
+import os
+import json
+import asyncio
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from collections import defaultdict
+from typing import Dict, Iterator, Optional
+import redis
+from loguru import logger
+from redis_cache.store import get_redis
+
+# Bucket (giây) của histogram thời gian từng giai đoạn, từ thao tác Redis đến cả lượt tổng hợp Azure
+METRICS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Số liệu được gom trong tiến trình rồi cộng dồn vào Redis tối đa mỗi METRICS_FLUSH_INTERVAL giây
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 1.0))
+# Span chậm hơn ngưỡng này luôn được ghi log cảnh báo; METRICS_LOG_SPANS=1 để ghi log mọi span
+METRICS_SLOW_SPAN_SECONDS = float(os.getenv("METRICS_SLOW_SPAN_SECONDS", 10))
+METRICS_LOG_SPANS = os.getenv("METRICS_LOG_SPANS", "0") == "1"
+
+# Tổng hợp của mọi tiến trình (API + worker) trong Redis
+HISTOGRAMS_KEY = "metrics:histograms"    # HASH "{stage}|{outcome}|{le}" / "...|sum" / "...|count" -> giá trị
+COUNTERS_KEY = "metrics:counters"        # HASH "{name}|{label}={value},..." -> giá trị
+WORKERS_KEY = "metrics:workers"          # HASH "{kind}:{pid}" -> {"busy", "capacity", "updated"}
+
+_lock = threading.Lock()
+_redis_config: Optional[dict] = None
+_histograms: Dict[str, float] = defaultdict(float)
+_counters: Dict[str, float] = defaultdict(float)
+_workers: Dict[str, Dict[str, int]] = {}
+_last_flush = time.monotonic()
+# (job_id, chunk_id) của span đang mở, span con trong cùng luồng / task kế thừa khi không truyền vào
+_span_ids: ContextVar = ContextVar("span_ids", default=(None, None))
+
+
+def configure_metrics(redis_config: dict):
+    """
+    Gắn số liệu của tiến trình hiện tại với Redis. Gọi ở đầu mỗi tiến trình (API, từng worker):
+    bộ đệm kế thừa từ tiến trình cha khi fork được bỏ đi để không bị cộng hai lần.
+    """
+    global _redis_config, _last_flush
+    with _lock:
+        _redis_config = redis_config
+        _histograms.clear()
+        _counters.clear()
+        _workers.clear()
+        _last_flush = time.monotonic()
+
+
+def bucket_label(seconds: float) -> str:
+    index = bisect.bisect_left(METRICS_BUCKETS, seconds)
+    return repr(METRICS_BUCKETS[index]) if index < len(METRICS_BUCKETS) else "+Inf"
+
+
+def _flush_if_due():
+    # Trong event loop của API không ghi Redis đồng bộ: số liệu được flush ở lần gọi kế tiếp
+    # từ threadpool / worker, hoặc khi /metrics được đọc
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        flush_metrics()
+
+
+def observe(stage: str, seconds: float, outcome: str = "ok"):
+    series = f"{stage}|{outcome}"
+    with _lock:
+        _histograms[f"{series}|{bucket_label(seconds)}"] += 1
+        _histograms[f"{series}|sum"] += seconds
+        _histograms[f"{series}|count"] += 1
+    _flush_if_due()
+
+
+def inc_counter(name: str, amount: float = 1, **labels):
+    if not amount:
+        return
+    field = name + "|" + ",".join(f"{key}={value}" for key, value in sorted(labels.items()))
+    with _lock:
+        _counters[field] += amount
+    _flush_if_due()
+
+
+def set_worker_state(kind: str, busy: int, capacity: int):
+    # Heartbeat của worker, ghi kèm lần flush kế tiếp
+    with _lock:
+        _workers[kind] = {"busy": busy, "capacity": capacity}
+
+
+def clear_worker_state(kind: str):
+    with _lock:
+        _workers.pop(kind, None)
+        redis_config = _redis_config
+    if redis_config is not None:
+        try:
+            get_redis(redis_config).hdel(WORKERS_KEY, f"{kind}:{os.getpid()}")
+        except redis.RedisError:
+            pass
+
+
+class Span:
+    __slots__ = ("stage", "job_id", "chunk_id", "fields", "outcome")
+
+    def __init__(self, stage: str, job_id: Optional[str], chunk_id: Optional[str], fields: Dict):
+        self.stage = stage
+        self.job_id = job_id
+        self.chunk_id = chunk_id
+        self.fields = fields
+        self.outcome = "ok"
+
+
+@contextmanager
+def span(stage: str, job_id: str = None, chunk_id: str = None, **fields) -> Iterator[Span]:
+    """
+    Đo thời gian một giai đoạn, ghi vào histogram `stage` theo kết quả (ok / error).
+
+    Exception trong khối được tính là error; giai đoạn thất bại mà không ném exception
+    (ví dụ TTS trả về None) thì gán `current.outcome = "error"`. job_id / chunk_id không truyền vào
+    thì lấy từ span bao ngoài; log của span mang chúng cùng các trường thêm dưới dạng extra của loguru.
+    """
+    parent_job_id, parent_chunk_id = _span_ids.get()
+    job_id, chunk_id = job_id or parent_job_id, chunk_id or parent_chunk_id
+    current = Span(stage, job_id, chunk_id, fields)
+    token = _span_ids.set((job_id, chunk_id))
+    started = time.perf_counter()
+    try:
+        yield current
+    except Exception:
+        current.outcome = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        _span_ids.reset(token)
+        observe(stage, elapsed, current.outcome)
+        if METRICS_LOG_SPANS or elapsed >= METRICS_SLOW_SPAN_SECONDS:
+            bound = logger.bind(span=stage, job_id=job_id, chunk_id=chunk_id, duration_ms=round(elapsed * 1000, 2),
+                                outcome=current.outcome, **current.fields)
+            ids = "".join(f", {name} {value}" for name, value in (("job", job_id), ("chunk", chunk_id)) if value)
+            message = f"⏱️ {stage} {elapsed * 1000:.1f} ms ({current.outcome}{ids})"
+            if elapsed >= METRICS_SLOW_SPAN_SECONDS:
+                bound.warning(f"🐢 Chậm: {message}")
+            else:
+                bound.info(message)
+
+
+def flush_metrics(force: bool = False):
+    global _last_flush
+    with _lock:
+        if _redis_config is None or (not force and time.monotonic() - _last_flush < METRICS_FLUSH_INTERVAL):
+            return
+        redis_config = _redis_config
+        histograms, counters, workers = dict(_histograms), dict(_counters), dict(_workers)
+        _histograms.clear()
+        _counters.clear()
+        _last_flush = time.monotonic()
+
+    try:
+        pipe = get_redis(redis_config).pipeline(transaction=False)
+        for field, value in histograms.items():
+            pipe.hincrbyfloat(HISTOGRAMS_KEY, field, value)
+        for field, value in counters.items():
+            pipe.hincrbyfloat(COUNTERS_KEY, field, value)
+        now = time.time()
+        for kind, state in workers.items():
+            pipe.hset(WORKERS_KEY, f"{kind}:{os.getpid()}", json.dumps({**state, "updated": now}))
+        pipe.execute()
+    except redis.RedisError as e:
+        # Giữ lại để cộng vào lần flush sau
+        logger.warning(f"⚠️ [Metrics] Không ghi được số liệu vào Redis: {e}")
+        with _lock:
+            for field, value in histograms.items():
+                _histograms[field] += value
+            for field, value in counters.items():
+                _counters[field] += value
@@ -0,0 +1,149 @@
+import json
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+from redis_cache.store import get_redis
+from redis_cache.audio_cache import AudioCache
+from redis_cache.translation_memory import TranslationMemory
+from redis_cache.scheduler import TRANSLATION_JOBS_KEY, TTS_JOBS_KEY
+from monitoring.metrics import (
+    METRICS_BUCKETS,
+    HISTOGRAMS_KEY,
+    COUNTERS_KEY,
+    WORKERS_KEY,
+    flush_metrics,
+)
+
+# Worker không gửi heartbeat quá lâu (đã dừng / bị kill) thì không tính nữa
+WORKER_STALE_SECONDS = 15
+
+CACHE_LOOKUPS = "dubbing_cache_lookups_total"
+COUNTER_HELP = {
+    CACHE_LOOKUPS: "Số lần tra cache theo kết quả.",
+}
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _family(lines: List[str], name: str, kind: str, help_text: str, samples: List[Tuple[str, Dict, float]]):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for sample_name, labels, value in samples:
+        lines.append(f"{sample_name}{_labels(**labels)} {_number(value)}")
+
+
+def _decode_hash(raw: Dict) -> Dict[str, float]:
+    return {key.decode("utf-8"): float(value) for key, value in raw.items()}
+
+
+def _histogram_samples(raw: Dict[str, float]) -> List[Tuple[str, Dict, float]]:
+    # Redis lưu số đếm từng bucket, Prometheus cần số đếm cộng dồn theo le
+    series = defaultdict(dict)
+    for field, value in raw.items():
+        stage, outcome, part = field.rsplit("|", 2)
+        series[(stage, outcome)][part] = value
+    samples = []
+    name = "dubbing_stage_duration_seconds"
+    for (stage, outcome), parts in sorted(series.items()):
+        cumulative = 0.0
+        for le in [repr(bucket) for bucket in METRICS_BUCKETS] + ["+Inf"]:
+            cumulative += parts.get(le, 0.0)
+            samples.append((f"{name}_bucket", {"stage": stage, "outcome": outcome, "le": le}, cumulative))
+        samples.append((f"{name}_sum", {"stage": stage, "outcome": outcome}, parts.get("sum", 0.0)))
+        samples.append((f"{name}_count", {"stage": stage, "outcome": outcome}, parts.get("count", 0.0)))
+    return samples
+
+
+def _counter_samples(raw: Dict[str, float]) -> Dict[str, List[Tuple[str, Dict, float]]]:
+    families = defaultdict(list)
+    for field, value in sorted(raw.items()):
+        name, _, encoded = field.partition("|")
+        labels = dict(pair.split("=", 1) for pair in encoded.split(",") if pair)
+        families[name].append((name, labels, value))
+    return families
+
+
+def render_metrics(redis_config: dict) -> str:
+    """
+    Số liệu của mọi tiến trình theo định dạng text của Prometheus: histogram thời gian từng giai đoạn,
+    số lần tra cache (và tỉ lệ hit), độ dài queue, số luồng worker đang bận / tổng.
+    """
+    flush_metrics(force=True)
+    redis_conn = get_redis(redis_config)
+    pipe = redis_conn.pipeline(transaction=False)
+    pipe.hgetall(HISTOGRAMS_KEY)
+    pipe.hgetall(COUNTERS_KEY)
+    pipe.hgetall(WORKERS_KEY)
+    pipe.zcard(TRANSLATION_JOBS_KEY)
+    pipe.zcard(TTS_JOBS_KEY)
+    histograms, counters, workers, translation_depth, tts_depth = pipe.execute()
+
+    lines: List[str] = []
+    _family(lines, "dubbing_stage_duration_seconds", "histogram",
+            "Thời gian từng giai đoạn xử lý (Redis, dịch, SSML, Azure TTS, base64, ...).",
+            _histogram_samples(_decode_hash(histograms)))
+
+    # Cache audio TTS và translation memory tự đếm hit / miss trong Redis, các cache khác đếm qua inc_counter
+    counter_families = _counter_samples(_decode_hash(counters))
+    cache_stats = {
+        "tts_audio": AudioCache(redis_config).stats(),
+        "translation_memory": TranslationMemory(redis_config).stats(),
+    }
+    for cache, stats in cache_stats.items():
+        counter_families[CACHE_LOOKUPS].append((CACHE_LOOKUPS, {"cache": cache, "result": "hit"}, stats["hits"]))
+        counter_families[CACHE_LOOKUPS].append((CACHE_LOOKUPS, {"cache": cache, "result": "miss"}, stats["misses"]))
+
+    lookups = defaultdict(lambda: {"hit": 0.0, "miss": 0.0})
+    for _, labels, value in counter_families.get(CACHE_LOOKUPS, []):
+        lookups[labels["cache"]][labels["result"]] += value
+    for name, samples in sorted(counter_families.items()):
+        _family(lines, name, "counter", COUNTER_HELP.get(name, name), samples)
+    _family(lines, "dubbing_cache_hit_ratio", "gauge", "Tỉ lệ hit của từng cache từ lúc bắt đầu đếm.", [
+        ("dubbing_cache_hit_ratio", {"cache": cache}, counts["hit"] / (counts["hit"] + counts["miss"]))
+        for cache, counts in sorted(lookups.items()) if counts["hit"] + counts["miss"]
+    ])
+    _family(lines, "dubbing_tts_cache_bytes", "gauge", "Dung lượng audio trong cache TTS.",
+            [("dubbing_tts_cache_bytes", {}, cache_stats["tts_audio"]["bytes"])])
+
+    _family(lines, "dubbing_queue_depth", "gauge", "Số task đang chờ trong queue của worker pool.", [
+        ("dubbing_queue_depth", {"queue": "translation"}, translation_depth),
+        ("dubbing_queue_depth", {"queue": "tts"}, tts_depth),
+    ])
+
+    busy, capacity, alive, stale = defaultdict(int), defaultdict(int), defaultdict(int), []
+    now = time.time()
+    for field, raw_state in workers.items():
+        state = json.loads(raw_state)
+        if now - state["updated"] > WORKER_STALE_SECONDS:
+            stale.append(field)
+            continue
+        kind = field.decode("utf-8").rsplit(":", 1)[0]
+        busy[kind] += state["busy"]
+        capacity[kind] += state["capacity"]
+        alive[kind] += 1
+    if stale:
+        redis_conn.hdel(WORKERS_KEY, *stale)
+    kinds = sorted(alive)
+    _family(lines, "dubbing_workers", "gauge", "Số tiến trình worker còn gửi heartbeat.",
+            [("dubbing_workers", {"kind": kind}, alive[kind]) for kind in kinds])
+    _family(lines, "dubbing_worker_busy", "gauge", "Số luồng worker đang xử lý.",
+            [("dubbing_worker_busy", {"kind": kind}, busy[kind]) for kind in kinds])
+    _family(lines, "dubbing_worker_capacity", "gauge", "Tổng số luồng worker.",
+            [("dubbing_worker_capacity", {"kind": kind}, capacity[kind]) for kind in kinds])
+    _family(lines, "dubbing_worker_utilization", "gauge", "Tỉ lệ luồng worker đang bận.", [
+        ("dubbing_worker_utilization", {"kind": kind}, busy[kind] / capacity[kind])
+        for kind in kinds if capacity[kind]
+    ])
+    return "\n".join(lines) + "\n"
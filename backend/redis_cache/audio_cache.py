@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import hashlib
+import redis
+from io import BytesIO
+from typing import Optional, Dict, Tuple
+from loguru import logger
+from redis_cache.store import get_redis
+from monitoring.metrics import span
+
+# Cấu hình cache audio (có thể ghi đè bằng biến môi trường)
+AUDIO_CACHE_PREFIX = "tts_cache"
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+AUDIO_CACHE_POLICY = os.getenv("AUDIO_CACHE_POLICY", "lru")
+
+
+class AudioCache:
+    """
+    Cache audio TTS định danh theo nội dung, lưu trong Redis.
+
+    Key = sha256(voice, output_format, SSML) nên cùng một đoạn lồng tiếng sẽ được
+    dùng lại giữa các request / người xem, bất kể chunk_id. Tổng dung lượng bị giới
+    hạn bởi `max_bytes`, vượt quá thì loại bỏ theo chính sách LRU hoặc LFU.
+    """
+
+    def __init__(self, redis_config: dict, max_bytes: int = AUDIO_CACHE_MAX_BYTES, policy: str = AUDIO_CACHE_POLICY):
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"Unsupported cache policy: {policy}. Supported: ['lru', 'lfu']")
+        self.redis_conn = get_redis(redis_config)
+        self.max_bytes = max_bytes
+        self.policy = policy
+
+        self.index_key = f"{AUDIO_CACHE_PREFIX}:index"    # ZSET digest -> thời điểm truy cập (lru) / số lần dùng (lfu)
+        self.sizes_key = f"{AUDIO_CACHE_PREFIX}:sizes"    # HASH digest -> số byte
+        self.total_key = f"{AUDIO_CACHE_PREFIX}:total_bytes"
+        self.stats_key = f"{AUDIO_CACHE_PREFIX}:stats"    # HASH hits / misses
+
+    @staticmethod
+    def make_key(ssml: str, voice: str, output_format: str) -> str:
+        raw = f"{voice}\x00{output_format}\x00{ssml}".encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    def _data_key(self, digest: str) -> str:
+        return f"{AUDIO_CACHE_PREFIX}:data:{digest}"
+
+    def _timing_key(self, digest: str) -> str:
+        # Thời điểm bookmark + thời lượng audio đo lúc tổng hợp, đi kèm audio cùng digest
+        return f"{AUDIO_CACHE_PREFIX}:timing:{digest}"
+
+    def _touch(self, pipe, digest: str):
+        if self.policy == "lru":
+            pipe.zadd(self.index_key, {digest: time.time()})
+        else:
+            pipe.zincrby(self.index_key, 1, digest)
+
+    def get(self, digest: str) -> Optional[bytes]:
+        try:
+            audio_bytes = self.redis_conn.get(self._data_key(digest))
+            pipe = self.redis_conn.pipeline()
+            if audio_bytes is None:
+                pipe.hincrby(self.stats_key, "misses", 1)
+            else:
+                pipe.hincrby(self.stats_key, "hits", 1)
+                self._touch(pipe, digest)
+            pipe.execute()
+            return audio_bytes
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ [TTS cache] Không đọc được cache {digest[:12]}: {e}")
+            return None
+
+    def set(self, digest: str, audio_bytes: bytes, timing: Optional[Dict] = None):
+        if not audio_bytes or len(audio_bytes) > self.max_bytes:
+            return
+        try:
+            if timing is not None:
+                self.redis_conn.set(self._timing_key(digest), json.dumps(timing))
+            # NX: nhiều worker cùng tổng hợp một đoạn thì chỉ tính dung lượng một lần
+            if not self.redis_conn.set(self._data_key(digest), audio_bytes, nx=True):
+                return
+            pipe = self.redis_conn.pipeline()
+            pipe.hset(self.sizes_key, digest, len(audio_bytes))
+            pipe.incrby(self.total_key, len(audio_bytes))
+            self._touch(pipe, digest)
+            pipe.execute()
+            self._evict()
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ [TTS cache] Không ghi được cache {digest[:12]}: {e}")
+
+    def _evict(self, batch_size: int = 16):
+        total = int(self.redis_conn.get(self.total_key) or 0)
+        while total > self.max_bytes:
+            victims = self.redis_conn.zrange(self.index_key, 0, batch_size - 1)
+            if not victims:
+                break
+            sizes = self.redis_conn.hmget(self.sizes_key, victims)
+            pipe = self.redis_conn.pipeline()
+            evicted = 0
+            for digest, size in zip(victims, sizes):
+                if total <= self.max_bytes:
+                    break
+                digest = digest.decode("utf-8")
+                size = int(size or 0)
+                pipe.delete(self._data_key(digest), self._timing_key(digest))
+                pipe.hdel(self.sizes_key, digest)
+                pipe.zrem(self.index_key, digest)
+                pipe.decrby(self.total_key, size)
+                total -= size
+                evicted += 1
+            pipe.execute()
+            logger.info(f"🧹 [TTS cache] Đã loại bỏ {evicted} audio ({self.policy}).")
+
+    def stats(self) -> Dict[str, float]:
+        raw = self.redis_conn.hgetall(self.stats_key)
+        hits = int(raw.get(b"hits", 0))
+        misses = int(raw.get(b"misses", 0))
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": self.redis_conn.zcard(self.index_key),
+            "bytes": int(self.redis_conn.get(self.total_key) or 0),
+        }
+
+    def get_or_synthesize(self, tts, ssml: str) -> Optional[BytesIO]:
+        """
+        Trả về audio cho SSML: lấy từ cache nếu có, ngược lại gọi Azure qua
+        `tts.ssml_to_bytesio` rồi lưu kết quả vào cache.
+
+        Args:
+            tts: TextToSpeechModule - dùng voice và output_format của module làm một phần của key.
+            ssml: str - tài liệu SSML cần tổng hợp.
+
+        Returns:
+            Optional[BytesIO]: audio đã tổng hợp, None nếu TTS thất bại.
+        """
+        digest = self.make_key(ssml, tts.voice, tts.output_format)
+        cached = self.get(digest)
+        if cached is not None:
+            logger.info(f"♻️ [TTS cache] Hit {digest[:12]} ({len(cached)} bytes)")
+            return BytesIO(cached)
+
+        with span("tts.azure") as current:
+            audio_bytesio = tts.ssml_to_bytesio(ssml)
+            if audio_bytesio is None:
+                current.outcome = "error"
+        if audio_bytesio is not None:
+            self.set(digest, audio_bytesio.getvalue())
+        return audio_bytesio
+
+    def get_or_synthesize_timed(self, tts, ssml: str) -> Optional[Tuple[BytesIO, Dict[str, float], Optional[float]]]:
+        """
+        Như `get_or_synthesize` nhưng trả kèm thời điểm bookmark và thời lượng audio
+        (`tts.synthesize_with_timing`). Audio trong cache chưa có timing thì tổng hợp lại để đo.
+
+        Returns:
+            Optional[Tuple[BytesIO, Dict[str, float], Optional[float]]]: (audio, {mark: offset giây}, thời lượng).
+        """
+        digest = self.make_key(ssml, tts.voice, tts.output_format)
+        cached = self.get(digest)
+        if cached is not None:
+            try:
+                raw_timing = self.redis_conn.get(self._timing_key(digest))
+            except redis.RedisError:
+                raw_timing = None
+            if raw_timing is not None:
+                timing = json.loads(raw_timing)
+                logger.info(f"♻️ [TTS cache] Hit {digest[:12]} ({len(cached)} bytes, có timing)")
+                return BytesIO(cached), timing["marks"], timing["duration"]
+
+        with span("tts.azure") as current:
+            synthesized = tts.synthesize_with_timing(ssml)
+            if synthesized is None:
+                current.outcome = "error"
+        if synthesized is not None:
+            audio_bytesio, marks, duration = synthesized
+            self.set(digest, audio_bytesio.getvalue(), timing={"marks": marks, "duration": duration})
+        return synthesized
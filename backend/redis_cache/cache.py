@@ -1,185 +1,351 @@
-import multiprocessing
-import redis
+import os
 from io import BytesIO
 from loguru import logger
-from Handler_Transcript.Handler_Transcript import Handler
-from fastapi import HTTPException
-from Text_To_Speech.TextToSpeech import TextToSpeechModule
-from typing import List, Dict
+from Text_To_Speech.alignment import synthesize_aligned
+from Text_To_Speech.stitching import synthesize_segments
+from Text_To_Speech.pcm import PCM_FORMAT
+from redis_cache.translation_memory import TranslationMemory, normalize_segment
+from typing import List, Dict, Any, AsyncIterator, Iterator, Optional, Tuple
 import json
+import time
+import anyio
+from redis_cache.jobs import (
+    JOB_TIMEOUT, create_job, cancel_job_async, next_job_event_async, is_job_active, set_job_position
+)
+from redis_cache.store import get_redis, get_async_redis, get_many, set_many
+from redis_cache.codec import encode_segments, decode_segments
+from redis_cache.scheduler import chunk_start, chunk_deadlines, enqueue_translation
+from monitoring.metrics import span
+
+# Thời gian giữ transcript chunk trong Redis
+TRANSCRIPT_CHUNK_TTL = 3600
+# Lồng tiếng trước cả video (có thể ghi đè bằng biến môi trường)
+PREFETCH_TIMEOUT = int(os.getenv("PREFETCH_TIMEOUT", 1800))
+# "chunk": một SSML cho cả chunk, "segment": tổng hợp từng segment rồi ghép audio
+TTS_SYNTHESIS_MODE = os.getenv("TTS_SYNTHESIS_MODE", "chunk")
 
 # Push tất cả transcript chunk vào Redis
 def push_all_chunks_to_redis(chunks: List[Dict], redis_config: dict):
-    redis_conn = redis.Redis(**redis_config)
+    redis_conn = get_redis(redis_config)
     try:
-        for chunk in chunks:
-            chunk_id = chunk['id']  # Ví dụ: abc123:0.00
-            payload = chunk['chunk']  # Danh sách entry [{"text", "start", "end"}, ...]
-            redis_conn.set(f"transcript:{chunk_id}", json.dumps(payload, ensure_ascii=False), ex=3600)
-            redis_conn.lpush("transcript_chunk_queue", chunk_id)
+        # Chunk id ví dụ: abc123_0.0, payload mã hóa bằng codec cấu hình (REDIS_SEGMENT_CODEC)
+        payloads = {
+            f"transcript:{chunk['id']}": encode_segments(chunk['chunk'])
+            for chunk in chunks
+        }
+        set_many(redis_conn, payloads, ex=TRANSCRIPT_CHUNK_TTL)
+        if chunks:
+            redis_conn.lpush("transcript_chunk_queue", *[chunk['id'] for chunk in chunks])
         logger.info("✅ Đã đẩy tất cả transcript chunks vào Redis.")
     except Exception as e:
         logger.exception("❌ Lỗi khi push transcript chunks vào Redis.")
 
-# Hàm dịch 1 chunk
-def translate_chunk(chunk: List[Dict], translator_func, handler, source_lang, target_lang) -> List[Dict]:
-    try:
-        entries = chunk  # chunk là danh sách các câu nhỏ [{"text", ...}]
-        texts = [entry["text"] for entry in entries]
-        need_text_trans = ' '.join(texts)
-        logger.info("📘 [Translator] Đang dịch chunk...")
+# Gia hạn transcript chunk của manifest đã cache; False nếu có chunk đã hết hạn (cần chia / push lại)
+def refresh_transcript_chunks(list_chunk_ids: List[str], redis_config: dict) -> bool:
+    redis_conn = get_redis(redis_config)
+    pipe = redis_conn.pipeline(transaction=False)
+    for chunk_id in list_chunk_ids:
+        pipe.expire(f"transcript:{chunk_id}", TRANSCRIPT_CHUNK_TTL)
+    return all(pipe.execute())
+
+# Tên backend dịch, dùng làm một phần key của translation memory
+def translator_backend_name(translator_func) -> str:
+    owner = getattr(translator_func, "__self__", None)
+    return type(owner).__name__ if owner is not None else getattr(translator_func, "__qualname__", "unknown")
+
+# Dịch cả chunk bằng một chuỗi ghép (cách cũ, dùng khi không tra được theo segment)
+def translate_joined_chunk(chunk: List[Dict], translator_func, handler, source_lang, target_lang) -> List[Dict]:
+    texts = [entry["text"] for entry in chunk]
+    need_text_trans = ' '.join(texts)
+    with span(f"translate.{translator_backend_name(translator_func)}", segments=len(texts)):
         rawTextAfterTranslate = translator_func(texts=need_text_trans, source_lang=source_lang, target_langs=target_lang)
-        return handler.merge_chunk_translation(chunk=entries, translated_result=rawTextAfterTranslate, target_language=target_lang)
-    except Exception as e:
-        logger.exception("❌ Lỗi khi dịch transcript.")
-        raise HTTPException(status_code=500, detail=f"Translation failed: {str(e)}")
-
-# Tiến trình dịch transcript
-def translator_process(list_chunks_id: List[str], translator_func, redis_config, source_lang, target_lang):
-    redis_conn = redis.Redis(**redis_config)
-    handler = Handler()
-
-    for chunk_id in list_chunks_id:
+    return handler.merge_chunk_translation(chunk=chunk, translated_result=rawTextAfterTranslate, target_language=target_lang)
+
+# Giới hạn mặc định cho 1 request dịch (translator có thể khai báo MAX_BATCH_ITEMS / MAX_BATCH_CHARS riêng)
+DEFAULT_BATCH_ITEMS = 100
+DEFAULT_BATCH_CHARS = 10000
+
+def translator_batch_limits(translator_func) -> Tuple[int, int]:
+    owner = getattr(translator_func, "__self__", None)
+    return (getattr(owner, "MAX_BATCH_ITEMS", DEFAULT_BATCH_ITEMS),
+            getattr(owner, "MAX_BATCH_CHARS", DEFAULT_BATCH_CHARS))
+
+# Gom các segment thành từng request, không vượt quá số phần tử và số ký tự cho phép
+def pack_translation_batches(texts: List[str], max_items: int, max_chars: int,
+                             first_batch_items: int = None) -> List[List[str]]:
+    batches = []
+    current, current_chars = [], 0
+    limit = first_batch_items or max_items
+    for text in texts:
+        if current and (len(current) >= limit or current_chars + len(text) > max_chars):
+            batches.append(current)
+            current, current_chars = [], 0
+            limit = max_items
+        current.append(text)
+        current_chars += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
+# Dịch nhiều chunk bằng ít request nhất, trả về từng chunk ngay khi đủ bản dịch
+def translate_chunks_batched(
+    chunks: Dict[str, List[Dict]],
+    translator_func,
+    handler,
+    source_lang,
+    target_lang,
+    translation_memory: TranslationMemory,
+    job_id: str = None
+) -> Iterator[Tuple[str, Optional[List[Dict]], Optional[str]]]:
+    """
+    Dịch các chunk theo thứ tự phát, gom segment của nhiều chunk vào chung một request.
+
+    Args:
+        chunks: Dict[str, List[Dict]] - chunk_id -> danh sách entry [{text, start, duration}], theo thứ tự phát
+        translator_func: hàm translate của translator (nhận list text, trả list kết quả)
+        translation_memory: TranslationMemory - bản dịch đã có được dùng lại, bản dịch mới được lưu vào
+        job_id: str - chỉ dùng để gắn vào span đo thời gian
+
+    Yields:
+        (chunk_id, merged, error): merged là danh sách [{text_translated, start, duration}],
+        hoặc None kèm thông báo lỗi nếu chunk không dịch được.
+    """
+    backend = translator_backend_name(translator_func)
+    max_items, max_chars = translator_batch_limits(translator_func)
+    texts_by_chunk = {
+        chunk_id: [normalize_segment(entry["text"]) for entry in entries]
+        for chunk_id, entries in chunks.items()
+    }
+    unique_texts = list(dict.fromkeys(text for texts in texts_by_chunk.values() for text in texts if text))
+    with span("translator.memory_lookup", job_id=job_id, segments=len(unique_texts)):
+        cached = translation_memory.get_many(unique_texts, source_lang, target_lang, backend)
+    known = {text: translated for text, translated in zip(unique_texts, cached) if translated is not None}
+    known[""] = ""
+
+    # Chỉ gửi các segment chưa có bản dịch, mỗi câu lặp lại chỉ gửi một lần
+    misses = [text for text in unique_texts if text not in known]
+    logger.info(f"📘 [Translator] {len(chunks)} chunk, TM có sẵn {len(unique_texts) - len(misses)}/{len(unique_texts)} segment, "
+                f"cần dịch {len(misses)} segment.")
+
+    pending = list(chunks.keys())
+
+    def completed_chunks():
+        nonlocal pending
+        done = [chunk_id for chunk_id in pending if all(text in known for text in texts_by_chunk[chunk_id])]
+        pending = [chunk_id for chunk_id in pending if chunk_id not in done]
+        for chunk_id in done:
+            translated = [known[text] for text in texts_by_chunk[chunk_id]]
+            yield chunk_id, handler.merge_segment_translation(chunks[chunk_id], translated), None
+
+    yield from completed_chunks()
+
+    # Request đầu chỉ chứa chunk phát đầu tiên để TTS bắt đầu sớm nhất có thể
+    first_missing = [text for text in dict.fromkeys(texts_by_chunk[pending[0]]) if text not in known] if pending else []
+    batches = pack_translation_batches(misses, max_items, max_chars, first_batch_items=len(first_missing) or None)
+    for batch in batches:
         try:
-            raw_chunk = redis_conn.get(f"transcript:{chunk_id}")
-            if raw_chunk is None:
-                logger.warning(f"[Translator] Không tìm thấy chunk: {chunk_id}")
-                continue
-
-            chunk_data = json.loads(raw_chunk)
-            merged = translate_chunk(chunk_data, translator_func, handler, source_lang, target_lang)
-
-            redis_conn.set(f"translation:{chunk_id}", json.dumps(merged, ensure_ascii=False), ex=3600)
-            redis_conn.lpush("translation_queue", chunk_id)
-            logger.info(f"✅ [Translator] Hoàn tất chunk: {chunk_id}")
+            # Tên span theo backend: tách thời gian gọi Azure Translator và Gemini
+            with span(f"translate.{backend}", job_id=job_id, segments=len(batch)):
+                raw = translator_func(texts=batch, source_lang=source_lang, target_langs=target_lang)
+            translated = handler.extract_translations(raw, target_lang)
         except Exception as e:
-            logger.error(f"❌ [Translator] Lỗi chunk {chunk_id}: {e}")
-
-# Tiến trình tạo audio từ bản dịch
-def tts_process(redis_config: dict, total_chunks: int, tts_voice: str):
-    redis_conn = redis.Redis(**redis_config)
-    tts = TextToSpeechModule(voice=tts_voice, output_format="webm")
-
-    logger.info("📗 [TTS] Bắt đầu lắng nghe queue...")
-
-    processed_chunks = 0
-    processed_set = set()
-
-    while processed_chunks < total_chunks:
-        result = redis_conn.brpop("translation_queue", timeout=10)
-        if result is None:
-            logger.warning("[TTS] Timeout khi chờ dữ liệu mới...")
+            logger.error(f"❌ [Translator] Lỗi request dịch {len(batch)} segment: {e}")
             continue
-
-        _, chunk_id_bytes = result
-        chunk_id = chunk_id_bytes.decode("utf-8")
-
-        if chunk_id in processed_set:
-            logger.warning(f"[TTS] Chunk {chunk_id} đã xử lý, bỏ qua.")
+        if len(translated) != len(batch) or not all(translated):
+            logger.warning(f"⚠️ [Translator] Kết quả dịch {len(batch)} segment không khớp, bỏ qua batch.")
             continue
-
+        new_translations = dict(zip(batch, translated))
+        translation_memory.set_many(new_translations, source_lang, target_lang, backend)
+        known.update(new_translations)
+        logger.info(f"📘 [Translator] Đã dịch {len(batch)} segment trong 1 request.")
+        yield from completed_chunks()
+
+    # Chunk còn thiếu bản dịch (batch lỗi): dịch lại cả chunk bằng một chuỗi ghép
+    for chunk_id in list(pending):
+        logger.warning(f"⚠️ [Translator] Dịch lại cả chunk {chunk_id}.")
         try:
-            translated_bytes = redis_conn.get(f"translation:{chunk_id}")
-            if not translated_bytes:
-                logger.error(f"[TTS] Không tìm thấy bản dịch cho {chunk_id}")
-                continue
-            logger.info(f"[TTS] Dang xử lý xong chunk: {chunk_id}")
-            merged_chunk = json.loads(translated_bytes)
-            ssml = tts.generate_ssml(merged_chunk)
-            audio_bytesio = tts.ssml_to_bytesio(ssml)
-            redis_conn.set(f"audio:{chunk_id}", audio_bytesio.getvalue(), ex=3600)
-
-            logger.info(f"✅ [TTS] Đã xử lý xong chunk: {chunk_id}")
-
-            processed_chunks += 1
-            processed_set.add(chunk_id)
-
+            yield chunk_id, translate_joined_chunk(chunks[chunk_id], translator_func, handler, source_lang, target_lang), None
         except Exception as e:
-            logger.error(f"[TTS] Lỗi xử lý chunk {chunk_id}: {e}")
-
-    logger.info("🎉 [TTS] Hoàn tất toàn bộ chunks.")
-
-# Lấy danh sách audio BytesIO từ Redis
-from typing import Any
-
-def collect_audio_bytes_and_duration(list_chunk_ids: List[str], redis_config: dict) -> List[Dict[str, Any]]:
-    redis_conn = redis.Redis(**redis_config)
-    result = []
-
-    for chunk_id in list_chunk_ids:
-        audio_bytes = redis_conn.get(f"audio:{chunk_id}")
-        if not audio_bytes:
-            logger.warning(f"❌ Không tìm thấy audio cho {chunk_id}")
+            yield chunk_id, None, f"Translation failed: {e}"
+
+# Đọc các transcript chunk từ Redis (chunk không tồn tại sẽ bị bỏ qua)
+def load_transcript_chunks(redis_conn, list_chunk_ids: List[str]) -> Dict[str, List[Dict]]:
+    chunks = {}
+    raw_chunks = get_many(redis_conn, [f"transcript:{chunk_id}" for chunk_id in list_chunk_ids])
+    for chunk_id, raw_chunk in zip(list_chunk_ids, raw_chunks):
+        if raw_chunk is None:
+            logger.warning(f"[Translator] Không tìm thấy chunk: {chunk_id}")
             continue
-
-        audio_io = BytesIO(audio_bytes)
-
-
-        result.append({
-            "chunk_id": chunk_id,
-            "audio_bytesio": audio_io,
-        })
-    return result
-
-# Lấy bản dịch đã merge từ Redis
-def collect_merged_chunks_from_redis(list_chunk_ids: List[str], redis_config: dict) -> List[Dict]:
-    redis_conn = redis.Redis(**redis_config)
-    merged_chunks = []
-
-    for chunk_id in list_chunk_ids:
-        merged_bytes = redis_conn.get(f"translation:{chunk_id}")
-        if merged_bytes:
-            try:
-                merged_chunk = json.loads(merged_bytes)
-                merged_chunks.append(merged_chunk)
-            except Exception as e:
-                logger.error(f"❌ Lỗi khi decode merged chunk {chunk_id}: {e}")
-        else:
-            logger.warning(f"❌ Không tìm thấy merged chunk cho {chunk_id}")
-    return merged_chunks
-
-# Hàm chính điều phối 2 tiến trình dịch và TTS
-def multiprocessingForTTSAndTranslator(
+        chunks[chunk_id] = decode_segments(raw_chunk).to_entries()
+    return chunks
+
+# Cấu hình lồng tiếng của một job, là một phần key của bản dịch / audio
+def dubbing_variant(translator_name: str, source_lang: str, target_lang: str, tts_voice: str) -> str:
+    return f"{translator_name}|{source_lang or 'auto'}|{target_lang}|{tts_voice}"
+
+# Key theo cấu hình lồng tiếng: các job khác ngôn ngữ / giọng đọc của cùng video không ghi đè lên nhau
+def translation_key(variant: str, chunk_id: str) -> str:
+    return f"translation:{variant}:{chunk_id}"
+
+def audio_key(variant: str, chunk_id: str) -> str:
+    return f"audio:{variant}:{chunk_id}"
+
+def audio_meta_key(variant: str, chunk_id: str) -> str:
+    return f"audio_meta:{variant}:{chunk_id}"
+
+# Audio đã có sẵn trong Redis đúng cấu hình lồng tiếng, chunk_id -> bytes
+def load_cached_audio(redis_conn, list_chunk_ids: List[str], variant: str) -> Dict[str, bytes]:
+    values = get_many(redis_conn, [audio_key(variant, chunk_id) for chunk_id in list_chunk_ids])
+    return {chunk_id: audio_bytes for chunk_id, audio_bytes in zip(list_chunk_ids, values) if audio_bytes}
+
+# Timing đo được khi tổng hợp (offset / thời lượng đọc từng segment), chunk_id -> dict
+def load_audio_meta(redis_conn, list_chunk_ids: List[str], variant: str) -> Dict[str, Dict]:
+    raw_metas = get_many(redis_conn, [audio_meta_key(variant, chunk_id) for chunk_id in list_chunk_ids])
+    return {chunk_id: json.loads(raw) for chunk_id, raw in zip(list_chunk_ids, raw_metas) if raw}
+
+# Lưu bản dịch đã merge của 1 chunk
+def store_translation(redis_conn, chunk_id: str, merged: List[Dict], variant: str):
+    redis_conn.set(translation_key(variant, chunk_id), encode_segments(merged, text_key="text_translated"), ex=3600)
+    logger.info(f"✅ [Translator] Hoàn tất chunk: {chunk_id}")
+
+# Tổng hợp audio kèm timing từng segment theo TTS_SYNTHESIS_MODE
+def synthesize_timed(tts, audio_cache, segments) -> Optional[Tuple[BytesIO, Dict]]:
+    if TTS_SYNTHESIS_MODE == "segment":
+        return synthesize_segments(tts, audio_cache, segments)
+    return synthesize_aligned(tts, audio_cache, segments)
+
+# Mở trước kết nối tới Azure cho đúng định dạng mà TTS_SYNTHESIS_MODE sẽ tổng hợp
+def warm_up_tts(tts, count: int) -> int:
+    if TTS_SYNTHESIS_MODE == "segment":
+        tts = tts.for_format(PCM_FORMAT)
+    return tts.warm_up(count)
+
+# Tạo audio cho 1 chunk đã dịch và lưu vào Redis
+def synthesize_and_store_chunk(redis_conn, chunk_id: str, tts, audio_cache, variant: str) -> bool:
+    with span("tts.load_translation", chunk_id=chunk_id):
+        translated_bytes = redis_conn.get(translation_key(variant, chunk_id))
+    if not translated_bytes:
+        logger.error(f"[TTS] Không tìm thấy bản dịch cho {chunk_id}")
+        return False
+    logger.info(f"[TTS] Đang xử lý chunk: {chunk_id}")
+    # generate_ssml đọc thẳng các cột của CompactTranscript, không dựng lại list dict
+    merged_chunk = decode_segments(translated_bytes, text_key="text_translated")
+    aligned = synthesize_timed(tts, audio_cache, merged_chunk)
+    if aligned is None:
+        logger.error(f"[TTS] Không tạo được audio cho {chunk_id}")
+        return False
+    audio_bytesio, timing = aligned
+    with span("tts.store_audio", chunk_id=chunk_id):
+        pipe = redis_conn.pipeline()
+        pipe.set(audio_key(variant, chunk_id), audio_bytesio.getvalue(), ex=3600)
+        pipe.set(audio_meta_key(variant, chunk_id), json.dumps(timing), ex=3600)
+        pipe.execute()
+    logger.info(f"✅ [TTS] Đã xử lý xong chunk: {chunk_id}")
+    return True
+
+# Gửi 1 job lồng tiếng cho worker pool, trả về job_id để theo dõi tiến độ
+def submit_dubbing_job(
+    redis_config: dict,
     list_chunk_ids: List[str],
-    translator_func,
+    translator_name: str,
     video_id: str,
-    redis_config: dict,
     source_lang: str,
     target_lang: str,
-    tts_voice: str
-):
-    total_chunks = len(list_chunk_ids)
-    redis_conn = redis.Redis(**redis_config)
-
-    # Dọn queue cũ
-    redis_conn.delete("translation_queue")
+    tts_voice: str,
+    timeout: int = JOB_TIMEOUT,
+    prefetch: bool = False,
+    position: Optional[float] = None
+) -> str:
+    redis_conn = get_redis(redis_config)
+    job_id = create_job(redis_conn, list_chunk_ids, timeout)
+    if not list_chunk_ids:
+        # Transcript rỗng: không có gì để đưa vào queue, worker không phải xử lý job
+        return job_id
+    if position is None:
+        # Request không gửi vị trí phát: người xem đang chờ chunk sớm nhất của request
+        position = min(map(chunk_start, list_chunk_ids), default=0.0)
+    set_job_position(redis_conn, job_id, position)
+    job = {
+        "job_id": job_id,
+        "list_chunk_ids": list_chunk_ids,
+        "all_chunk_ids": list_chunk_ids,
+        "translator": translator_name,
+        "video_id": video_id,
+        "source_lang": source_lang,
+        "target_lang": target_lang,
+        "tts_voice": tts_voice,
+        "variant": dubbing_variant(translator_name, source_lang, target_lang, tts_voice),
+        "prefetch": prefetch,
+    }
+    enqueue_translation(redis_conn, job, chunk_deadlines(list_chunk_ids, position, time.time()))
+    logger.info(f"📨 Đã gửi job {job_id} ({len(list_chunk_ids)} chunk) cho worker pool.")
+    return job_id
 
-    translator = multiprocessing.Process(
-        target=translator_process,
-        args=(list_chunk_ids, translator_func, redis_config, source_lang, target_lang)
-    )
-    tts = multiprocessing.Process(
-        target=tts_process,
-        args=(redis_config, total_chunks, tts_voice)
+# Lồng tiếng trước toàn bộ video ở nền, ưu tiên các chunk gần vị trí phát; mỗi (video, cấu hình) chỉ có một job
+def submit_prefetch_job(
+    redis_config: dict,
+    list_chunk_ids: List[str],
+    translator_name: str,
+    video_id: str,
+    source_lang: str,
+    target_lang: str,
+    tts_voice: str,
+    position: float = 0.0
+) -> str:
+    redis_conn = get_redis(redis_config)
+    prefetch_key = f"prefetch:{video_id}:{dubbing_variant(translator_name, source_lang, target_lang, tts_voice)}"
+    existing = redis_conn.get(prefetch_key)
+    if existing is not None and is_job_active(redis_conn, existing.decode("utf-8")):
+        logger.info(f"♻️ Video {video_id} đang được lồng tiếng trước bởi job {existing.decode('utf-8')}.")
+        return existing.decode("utf-8")
+
+    job_id = submit_dubbing_job(
+        redis_config, list_chunk_ids, translator_name, video_id, source_lang, target_lang, tts_voice,
+        timeout=PREFETCH_TIMEOUT, prefetch=True, position=position
     )
+    redis_conn.set(prefetch_key, job_id, ex=PREFETCH_TIMEOUT)
+    return job_id
 
-    translator.start()
-    tts.start()
-
-    translator.join()
-    if translator.exitcode != 0:
-        logger.error("❌ Translator process exited with error!")
+# Trả về audio của từng chunk ngay khi worker TTS ghi xong, thay vì chờ cả batch.
+# Chờ sự kiện job bằng redis.asyncio nên request đang chờ worker không chiếm event loop lẫn luồng của threadpool
+async def stream_audio_chunks_async(
+    list_chunk_ids: List[str],
+    job_id: str,
+    variant: str,
+    redis_config: dict,
+    timeout: int = JOB_TIMEOUT
+) -> AsyncIterator[Dict[str, Any]]:
+    redis_conn = get_async_redis(redis_config)
+    pending = set(list_chunk_ids)
+    deadline = time.time() + timeout
 
-    tts.join()
-    if tts.exitcode != 0:
-        logger.error("❌ TTS process exited with error!")
+    try:
+        while pending and time.time() < deadline:
+            event = await next_job_event_async(redis_conn, job_id, timeout=1)
+            if event is None:
+                continue
 
-    logger.info("🎉 Tất cả các tiến trình đã hoàn tất!")
+            chunk_id = event["chunk_id"]
+            if chunk_id not in pending:
+                continue
+            pending.discard(chunk_id)
 
-    for chunk_id in list_chunk_ids:
-        audio = redis_conn.get(f"audio:{chunk_id}")
-        print(f"{chunk_id} -> Audio Bytes Length: {len(audio) if audio else '❌ No audio'}")
+            if not event["ok"]:
+                logger.warning(f"❌ [Job {job_id}] Chunk {chunk_id} lỗi: {event.get('error')}")
+                continue
 
-    return {
-        "audio_chunks": collect_audio_bytes_and_duration(list_chunk_ids, redis_config)
-    }
+            # Chỉ đọc audio đúng cấu hình lồng tiếng của job, không lấy nhầm của người xem khác
+            audio_bytes = await redis_conn.get(audio_key(variant, chunk_id))
+            if not audio_bytes:
+                logger.warning(f"❌ Không tìm thấy audio cho {chunk_id}")
+                continue
+            logger.info(f"📡 [Job {job_id}] Gửi chunk: {chunk_id}")
+            yield {"chunk_id": chunk_id, "audio_bytes": audio_bytes}
+
+        if pending:
+            logger.warning(f"⚠️ [Job {job_id}] Hết thời gian khi còn thiếu {len(pending)} chunk: {sorted(pending)}")
+    finally:
+        if pending:
+            # Request bị hủy (client ngắt kết nối) thì vẫn phải báo worker bỏ qua phần còn lại của job
+            with anyio.CancelScope(shield=True):
+                await cancel_job_async(redis_conn, job_id)
@@ -0,0 +1,138 @@
+import os
+import json
+import zlib
+import struct
+from abc import ABC, abstractmethod
+from typing import Dict, List, Union
+from Handler_Transcript.compact_transcript import CompactTranscript, COMPACT_MAGIC
+
+try:
+    import msgpack
+except ImportError:  # msgpack là tùy chọn, chỉ cần khi chọn REDIS_SEGMENT_CODEC=msgpack
+    msgpack = None
+
+# Cấu hình codec cho payload chunk trong Redis (có thể ghi đè bằng biến môi trường)
+REDIS_SEGMENT_CODEC = os.getenv("REDIS_SEGMENT_CODEC", "compact")
+CODEC_COMPRESS_MIN_BYTES = int(os.getenv("CODEC_COMPRESS_MIN_BYTES", 4096))
+CODEC_COMPRESS_LEVEL = int(os.getenv("CODEC_COMPRESS_LEVEL", 1))
+
+# Header: [magic][version][codec id][flags], payload ngay sau header
+CODEC_MAGIC = b"\xdc"
+CODEC_VERSION = 1
+FLAG_ZLIB = 0x01
+_HEADER = struct.Struct("<cBBB")
+
+
+class SegmentCodec(ABC):
+    """
+    Codec cho danh sách segment (transcript chunk / bản dịch đã merge).
+    `text_key` là tên trường text ("text" hoặc "text_translated").
+    """
+
+    codec_id = 0
+    name = ""
+
+    @abstractmethod
+    def encode(self, segments: Union[List[Dict], CompactTranscript], text_key: str) -> bytes:
+        ...
+
+    @abstractmethod
+    def decode(self, payload: bytes, text_key: str) -> CompactTranscript:
+        ...
+
+
+class JsonCodec(SegmentCodec):
+    codec_id = 1
+    name = "json"
+
+    def encode(self, segments, text_key):
+        if isinstance(segments, CompactTranscript):
+            segments = segments.to_entries(text_key=text_key)
+        return json.dumps(segments, ensure_ascii=False).encode("utf-8")
+
+    def decode(self, payload, text_key):
+        return CompactTranscript.from_entries(json.loads(bytes(payload)), text_key=text_key)
+
+
+class MsgpackCodec(SegmentCodec):
+    codec_id = 2
+    name = "msgpack"
+
+    def encode(self, segments, text_key):
+        if isinstance(segments, CompactTranscript):
+            segments = segments.to_entries(text_key=text_key)
+        return msgpack.packb(segments, use_bin_type=True)
+
+    def decode(self, payload, text_key):
+        return CompactTranscript.from_entries(msgpack.unpackb(payload, raw=False), text_key=text_key)
+
+
+class CompactCodec(SegmentCodec):
+    codec_id = 3
+    name = "compact"
+
+    def encode(self, segments, text_key):
+        if not isinstance(segments, CompactTranscript):
+            segments = CompactTranscript.from_entries(segments, text_key=text_key)
+        return segments.to_bytes()
+
+    def decode(self, payload, text_key):
+        return CompactTranscript.from_bytes(payload)
+
+
+CODECS_BY_NAME: Dict[str, SegmentCodec] = {codec.name: codec for codec in (JsonCodec(), MsgpackCodec(), CompactCodec())}
+CODECS_BY_ID: Dict[int, SegmentCodec] = {codec.codec_id: codec for codec in CODECS_BY_NAME.values()}
+
+
+def get_codec(name: str) -> SegmentCodec:
+    codec = CODECS_BY_NAME.get(name)
+    if codec is None:
+        raise ValueError(f"Unsupported codec: {name}. Supported: {list(CODECS_BY_NAME)}")
+    if codec is CODECS_BY_NAME["msgpack"] and msgpack is None:
+        raise ValueError("Codec msgpack cần cài gói msgpack.")
+    return codec
+
+
+def encode_segments(segments: Union[List[Dict], CompactTranscript], text_key: str = "text",
+                    codec: str = None, compress_min_bytes: int = None) -> bytes:
+    """
+    Mã hóa segment thành payload có version + codec id, nén zlib khi payload lớn và nén có lợi.
+
+    Args:
+        codec: tên codec, mặc định REDIS_SEGMENT_CODEC.
+        compress_min_bytes: payload từ kích thước này trở lên mới thử nén, mặc định CODEC_COMPRESS_MIN_BYTES.
+    """
+    selected = get_codec(codec or REDIS_SEGMENT_CODEC)
+    payload = selected.encode(segments, text_key)
+    flags = 0
+    threshold = CODEC_COMPRESS_MIN_BYTES if compress_min_bytes is None else compress_min_bytes
+    if len(payload) >= threshold:
+        compressed = zlib.compress(payload, CODEC_COMPRESS_LEVEL)
+        if len(compressed) < len(payload):
+            payload, flags = compressed, FLAG_ZLIB
+    return _HEADER.pack(CODEC_MAGIC, CODEC_VERSION, selected.codec_id, flags) + payload
+
+
+def decode_segments(raw: Union[bytes, memoryview], text_key: str = "text") -> CompactTranscript:
+    """
+    Giải mã payload của `encode_segments`; vẫn đọc được payload cũ chưa có header
+    (CompactTranscript nhị phân hoặc JSON list entry).
+
+    Raises:
+        ValueError: Nếu version hoặc codec id không được hỗ trợ.
+    """
+    view = memoryview(raw)
+    if view[:1] == CODEC_MAGIC:
+        _, version, codec_id, flags = _HEADER.unpack_from(view)
+        if version != CODEC_VERSION:
+            raise ValueError(f"Unsupported payload version: {version}")
+        if codec_id not in CODECS_BY_ID:
+            raise ValueError(f"Unsupported codec id: {codec_id}")
+        codec = get_codec(CODECS_BY_ID[codec_id].name)
+        payload = view[_HEADER.size:]
+        if flags & FLAG_ZLIB:
+            payload = zlib.decompress(payload)
+        return codec.decode(payload, text_key)
+    if view[:len(COMPACT_MAGIC)] == COMPACT_MAGIC:
+        return CompactTranscript.from_bytes(raw)
+    return CompactTranscript.from_entries(json.loads(bytes(view)), text_key=text_key)
@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import uuid
+from typing import List, Dict, Optional
+from loguru import logger
+
+# Thời gian tối đa cho một job lồng tiếng và thời gian giữ trạng thái job trong Redis
+JOB_TIMEOUT = int(os.getenv("JOB_TIMEOUT", 300))
+JOB_TTL = 3600
+
+# Trạng thái job
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_CANCELLED = "cancelled"
+
+
+def job_key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+def job_events_key(job_id: str) -> str:
+    # Queue riêng của từng job: worker báo chunk xong / lỗi, endpoint đọc ra
+    return f"job:{job_id}:events"
+
+
+def create_job(redis_conn, list_chunk_ids: List[str], timeout: int = JOB_TIMEOUT) -> str:
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    pipe = redis_conn.pipeline()
+    pipe.hset(job_key(job_id), mapping={
+        # Job không có chunk nào thì xong ngay
+        "status": JOB_RUNNING if list_chunk_ids else JOB_DONE,
+        "total": len(list_chunk_ids),
+        "done": 0,
+        "failed": 0,
+        "created": now,
+        "deadline": now + timeout,
+    })
+    pipe.expire(job_key(job_id), JOB_TTL)
+    pipe.execute()
+    return job_id
+
+
+def is_job_active(redis_conn, job_id: str) -> bool:
+    """
+    Worker kiểm tra trước khi xử lý chunk: bỏ qua job đã hủy, đã xong hoặc quá hạn.
+    """
+    status, deadline = redis_conn.hmget(job_key(job_id), "status", "deadline")
+    if status is None or status.decode("utf-8") != JOB_RUNNING:
+        return False
+    return time.time() < float(deadline)
+
+
+def acquire_tts_slot(redis_conn, job_id: str, limit: int) -> bool:
+    # Giới hạn số chunk của một job được tổng hợp đồng thời (tính trên mọi worker)
+    if redis_conn.hincrby(job_key(job_id), "tts_inflight", 1) <= limit:
+        return True
+    redis_conn.hincrby(job_key(job_id), "tts_inflight", -1)
+    return False
+
+
+def release_tts_slot(redis_conn, job_id: str):
+    redis_conn.hincrby(job_key(job_id), "tts_inflight", -1)
+
+
+def has_tts_slot(redis_conn, job_id: str, limit: int) -> bool:
+    inflight = redis_conn.hget(job_key(job_id), "tts_inflight")
+    return int(inflight or 0) < limit
+
+
+def report_chunk(redis_conn, job_id: str, chunk_id: str, ok: bool, error: str = None):
+    event = {"chunk_id": chunk_id, "ok": ok}
+    if error:
+        event["error"] = error
+    pipe = redis_conn.pipeline()
+    pipe.hincrby(job_key(job_id), "done" if ok else "failed", 1)
+    pipe.hmget(job_key(job_id), "total", "done", "failed")
+    pipe.rpush(job_events_key(job_id), json.dumps(event, ensure_ascii=False))
+    pipe.expire(job_events_key(job_id), JOB_TTL)
+    _, (total, done, failed), _, _ = pipe.execute()
+    if total is not None and int(done) + int(failed) >= int(total):
+        redis_conn.hset(job_key(job_id), "status", JOB_DONE)
+        logger.info(f"🏁 Job {job_id} hoàn tất: {int(done)} chunk thành công, {int(failed)} lỗi.")
+
+
+def fail_job(redis_conn, job_id: str, list_chunk_ids: List[str], error: str):
+    for chunk_id in list_chunk_ids:
+        report_chunk(redis_conn, job_id, chunk_id, ok=False, error=error)
+
+
+def set_job_position(redis_conn, job_id: str, position: float) -> bool:
+    """
+    Cập nhật vị trí phát (giây) của người xem cho job, ví dụ khi tua video.
+
+    Returns:
+        bool: False nếu job không tồn tại hoặc đã hết hạn trong Redis.
+    """
+    if not redis_conn.exists(job_key(job_id)):
+        return False
+    redis_conn.hset(job_key(job_id), mapping={"position": position, "position_at": time.time()})
+    return True
+
+
+def get_job_position(redis_conn, job_id: str) -> float:
+    position = redis_conn.hget(job_key(job_id), "position")
+    return float(position) if position is not None else 0.0
+
+
+async def next_job_event_async(redis_conn, job_id: str, timeout: int = 1) -> Optional[Dict]:
+    # Client redis.asyncio, dùng trong event loop của API
+    result = await redis_conn.blpop(job_events_key(job_id), timeout=timeout)
+    return json.loads(result[1]) if result else None
+
+
+async def cancel_job_async(redis_conn, job_id: str):
+    # Chỉ hủy job còn đang chạy (ví dụ client ngắt kết nối giữa chừng)
+    if await redis_conn.hget(job_key(job_id), "status") == JOB_RUNNING.encode("utf-8"):
+        await redis_conn.hset(job_key(job_id), "status", JOB_CANCELLED)
+        logger.info(f"🚫 Đã hủy job {job_id}.")
+
+
+def get_job_status(redis_conn, job_id: str) -> Optional[Dict]:
+    raw = redis_conn.hgetall(job_key(job_id))
+    if not raw:
+        return None
+    info = {key.decode("utf-8"): value.decode("utf-8") for key, value in raw.items()}
+    return {
+        "job_id": job_id,
+        "status": info["status"],
+        "total": int(info["total"]),
+        "done": int(info["done"]),
+        "failed": int(info["failed"]),
+        "elapsed": round(time.time() - float(info["created"]), 3),
+        "expired": info["status"] == JOB_RUNNING and time.time() >= float(info["deadline"]),
+        "position": float(info.get("position", 0.0)),
+    }
@@ -0,0 +1,126 @@
+import os
+import json
+import time
+from typing import List, Dict
+from loguru import logger
+from redis_cache.jobs import JOB_TTL, job_key, set_job_position
+
+# Queue dùng chung của worker pool, đều là ZSET chấm điểm theo deadline (epoch giây)
+TRANSLATION_JOBS_KEY = "jobs:translation:deadline"
+TTS_JOBS_KEY = "jobs:tts"
+# Số chunk worker dịch xử lý mỗi lượt trước khi trả phần còn lại của job về queue
+SCHEDULER_WINDOW = int(os.getenv("SCHEDULER_WINDOW", 10))
+# Chunk đã qua vị trí phát vẫn được xử lý nhưng xếp sau mọi chunk phía trước
+BEHIND_PLAYHEAD_PENALTY = int(os.getenv("BEHIND_PLAYHEAD_PENALTY", 3600))
+
+
+def job_tts_key(job_id: str) -> str:
+    # Các task TTS đã đưa vào queue của job, để chấm lại điểm khi người xem tua
+    return f"job:{job_id}:tts"
+
+
+def job_tts_parked_key(job_id: str) -> str:
+    # ZSET task TTS của job đang dùng hết luồng cho phép, chấm điểm theo deadline như queue chung
+    return f"job:{job_id}:tts_parked"
+
+
+# Chunk id có dạng {video_id}_{start}
+def chunk_start(chunk_id: str) -> float:
+    try:
+        return float(chunk_id.rsplit("_", 1)[1])
+    except (IndexError, ValueError):
+        return 0.0
+
+
+def chunk_deadlines(list_chunk_ids: List[str], position: float, position_at: float) -> Dict[str, float]:
+    """
+    Thời điểm (epoch) mỗi chunk bắt đầu được phát, giả sử video phát tiếp từ `position` lúc `position_at`.
+
+    Chunk chứa vị trí phát có deadline là `position_at`; chunk đã qua xếp sau mọi chunk phía trước,
+    chunk càng gần vị trí phát càng ưu tiên.
+    """
+    starts = {chunk_id: chunk_start(chunk_id) for chunk_id in list_chunk_ids}
+    current = max((start for start in starts.values() if start <= position), default=None)
+    deadlines = {}
+    for chunk_id, start in starts.items():
+        if start == current or start >= position:
+            deadlines[chunk_id] = position_at + max(start - position, 0.0)
+        else:
+            deadlines[chunk_id] = position_at + BEHIND_PLAYHEAD_PENALTY + (position - start)
+    return deadlines
+
+
+def job_chunk_deadlines(redis_conn, job_id: str, list_chunk_ids: List[str]) -> Dict[str, float]:
+    position, position_at = redis_conn.hmget(job_key(job_id), "position", "position_at")
+    if position is None:
+        # Job không ghi vị trí phát: xem như người xem đang chờ chunk đầu tiên
+        position = min(map(chunk_start, list_chunk_ids), default=0.0)
+    return chunk_deadlines(list_chunk_ids, float(position), float(position_at or time.time()))
+
+
+def enqueue_translation(redis_conn, job: Dict, deadlines: Dict[str, float]):
+    # Điểm của job = deadline gấp nhất trong các chunk còn lại
+    member = json.dumps(job, ensure_ascii=False)
+    pipe = redis_conn.pipeline()
+    pipe.zadd(TRANSLATION_JOBS_KEY, {member: min(deadlines[chunk_id] for chunk_id in job["list_chunk_ids"])})
+    pipe.hset(job_key(job["job_id"]), "translation_task", member)
+    pipe.execute()
+
+
+def enqueue_tts(redis_conn, task: Dict, deadline: float):
+    member = json.dumps(task, ensure_ascii=False)
+    pipe = redis_conn.pipeline()
+    pipe.zadd(TTS_JOBS_KEY, {member: deadline})
+    pipe.sadd(job_tts_key(task["job_id"]), member)
+    pipe.expire(job_tts_key(task["job_id"]), JOB_TTL)
+    pipe.execute()
+
+
+def take_tts_task(redis_conn, job_id: str, member: bytes):
+    # Task đã được worker nhận xử lý (hoặc bỏ): seek_job không cần chấm lại điểm cho nó nữa
+    redis_conn.srem(job_tts_key(job_id), member)
+
+
+def park_tts_task(redis_conn, job_id: str, member: bytes, score: float):
+    # Cất task ra khỏi queue để worker không lấy lại nó liên tục, task của job khác vẫn được xử lý
+    pipe = redis_conn.pipeline()
+    pipe.zadd(job_tts_parked_key(job_id), {member: score})
+    pipe.expire(job_tts_parked_key(job_id), JOB_TTL)
+    pipe.execute()
+
+
+def unpark_tts_task(redis_conn, job_id: str):
+    # Đưa task có deadline gấp nhất của job về queue (điểm đã được seek_job chấm lại theo vị trí phát)
+    parked = redis_conn.zpopmin(job_tts_parked_key(job_id))
+    if parked:
+        member, score = parked[0]
+        redis_conn.zadd(TTS_JOBS_KEY, {member: score})
+
+
+def seek_job(redis_conn, job_id: str, position: float) -> bool:
+    """
+    Cập nhật vị trí phát của job và chấm lại điểm các task còn trong queue dịch / TTS.
+
+    Returns:
+        bool: False nếu job không tồn tại.
+    """
+    if not set_job_position(redis_conn, job_id, position):
+        return False
+    translation_task = redis_conn.hget(job_key(job_id), "translation_task")
+    if translation_task is None:
+        return True
+    job = json.loads(translation_task)
+    deadlines = job_chunk_deadlines(redis_conn, job_id, job["all_chunk_ids"])
+
+    pipe = redis_conn.pipeline(transaction=False)
+    # XX: task đã được worker lấy ra thì không thêm lại
+    pipe.zadd(TRANSLATION_JOBS_KEY, {translation_task: min(deadlines[chunk_id] for chunk_id in job["list_chunk_ids"])}, xx=True)
+    for member in redis_conn.smembers(job_tts_key(job_id)):
+        score = deadlines.get(json.loads(member)["chunk_id"], time.time())
+        # Task có thể đang nằm trong queue chung hoặc đang chờ vì job dùng hết luồng
+        pipe.zadd(TTS_JOBS_KEY, {member: score}, xx=True)
+        pipe.zadd(job_tts_parked_key(job_id), {member: score}, xx=True)
+    pipe.execute()
+    logger.info(f"⏱️ Đã sắp xếp lại job {job_id} theo vị trí phát {position}s")
+    return True
+
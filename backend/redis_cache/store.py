@@ -0,0 +1,71 @@
+import os
+import threading
+import redis
+import redis.asyncio
+from typing import List, Dict, Optional, Tuple
+
+# Số kết nối tối đa mỗi pool (mỗi tiến trình có pool riêng)
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+# Pool async của API: mỗi stream /dubbing đang chờ giữ một kết nối trong BLPOP nên cần nhiều hơn,
+# hết kết nối thì chờ tối đa REDIS_ASYNC_POOL_TIMEOUT giây thay vì báo lỗi ngay
+REDIS_ASYNC_MAX_CONNECTIONS = int(os.getenv("REDIS_ASYNC_MAX_CONNECTIONS", 500))
+REDIS_ASYNC_POOL_TIMEOUT = float(os.getenv("REDIS_ASYNC_POOL_TIMEOUT", 20))
+# Số key tối đa trong 1 lệnh MGET / 1 pipeline
+REDIS_BULK_SIZE = 500
+
+_pools: Dict[Tuple, redis.ConnectionPool] = {}
+_pools_lock = threading.Lock()
+_async_pools: Dict[Tuple, redis.asyncio.BlockingConnectionPool] = {}
+
+
+def get_redis(redis_config: dict) -> redis.Redis:
+    """
+    Trả về client Redis dùng chung connection pool theo cấu hình.
+    Pool gắn với pid để tiến trình con (worker) không dùng lại socket của tiến trình cha.
+    """
+    key = (os.getpid(), tuple(sorted(redis_config.items())))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = redis.ConnectionPool(max_connections=REDIS_MAX_CONNECTIONS, **redis_config)
+            _pools[key] = pool
+    return redis.Redis(connection_pool=pool)
+
+
+def get_async_redis(redis_config: dict) -> redis.asyncio.Redis:
+    """
+    Client Redis async cho event loop của API: các lệnh chờ lâu (BLPOP sự kiện job)
+    không giữ luồng nào của threadpool. Chỉ dùng trong event loop, pool đóng bằng close_async_redis().
+    """
+    key = (os.getpid(), tuple(sorted(redis_config.items())))
+    pool = _async_pools.get(key)
+    if pool is None:
+        pool = redis.asyncio.BlockingConnectionPool(max_connections=REDIS_ASYNC_MAX_CONNECTIONS,
+                                                    timeout=REDIS_ASYNC_POOL_TIMEOUT, **redis_config)
+        _async_pools[key] = pool
+    return redis.asyncio.Redis(connection_pool=pool)
+
+
+async def close_async_redis():
+    pools = list(_async_pools.values())
+    _async_pools.clear()
+    for pool in pools:
+        await pool.disconnect()
+
+
+def get_many(redis_conn, keys: List[str]) -> List[Optional[bytes]]:
+    # MGET theo từng lô thay vì một GET cho mỗi key
+    values = []
+    for i in range(0, len(keys), REDIS_BULK_SIZE):
+        values.extend(redis_conn.mget(keys[i:i + REDIS_BULK_SIZE]))
+    return values
+
+
+def set_many(redis_conn, mapping: Dict[str, bytes], ex: int = None):
+    # MSET không hỗ trợ TTL nên dùng pipeline SET ... EX, mỗi lô là một round-trip
+    items = list(mapping.items())
+    for i in range(0, len(items), REDIS_BULK_SIZE):
+        pipe = redis_conn.pipeline(transaction=False)
+        for key, value in items[i:i + REDIS_BULK_SIZE]:
+            pipe.set(key, value, ex=ex)
+        pipe.execute()
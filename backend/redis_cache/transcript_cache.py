@@ -0,0 +1,94 @@
+import os
+import json
+import threading
+import redis
+from typing import Any, Callable, Dict, List, Optional
+from cachetools import TTLCache
+from loguru import logger
+from redis_cache.store import get_redis
+from redis_cache.codec import encode_segments, decode_segments
+
+# Cấu hình cache transcript (có thể ghi đè bằng biến môi trường)
+TRANSCRIPT_CACHE_PREFIX = "transcript_cache"
+TRANSCRIPT_CACHE_TTL = int(os.getenv("TRANSCRIPT_CACHE_TTL", 6 * 3600))
+TRANSCRIPT_MEMORY_SIZE = int(os.getenv("TRANSCRIPT_MEMORY_SIZE", 256))
+TRANSCRIPT_MEMORY_TTL = int(os.getenv("TRANSCRIPT_MEMORY_TTL", 600))
+
+
+class TranscriptCache:
+    """
+    Cache transcript đã tải từ YouTube và danh sách chunk (manifest) đã chia.
+
+    Hai tầng: TTLCache trong bộ nhớ tiến trình (giới hạn `memory_size` entry) rồi đến
+    Redis (TTL `ttl`, dùng chung giữa các tiến trình / instance). Manifest được key theo
+    (video_id, ngôn ngữ, tham số chia chunk) nên đổi cách chia sẽ không dùng nhầm dữ liệu cũ.
+    Transcript được giữ dạng CompactTranscript (trong bộ nhớ và nhị phân trên Redis) thay vì list dict / JSON.
+    """
+
+    def __init__(self, redis_config: dict, ttl: int = TRANSCRIPT_CACHE_TTL,
+                 memory_size: int = TRANSCRIPT_MEMORY_SIZE, memory_ttl: int = TRANSCRIPT_MEMORY_TTL):
+        self.redis_conn = get_redis(redis_config)
+        self.ttl = ttl
+        self._memory = TTLCache(maxsize=memory_size, ttl=min(memory_ttl, ttl))
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def transcript_key(video_id: str, language: str) -> str:
+        return f"{TRANSCRIPT_CACHE_PREFIX}:compact:{video_id}:{language}"
+
+    @staticmethod
+    def manifest_key(video_id: str, language: str, max_chars: int, max_items: int) -> str:
+        return f"{TRANSCRIPT_CACHE_PREFIX}:manifest:{video_id}:{language}:{max_chars}:{max_items}"
+
+    def _get(self, key: str, decode: Callable[[bytes], Any] = json.loads) -> Optional[Any]:
+        with self._lock:
+            value = self._memory.get(key)
+        if value is not None:
+            return value
+        try:
+            raw = self.redis_conn.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ [Transcript cache] Không đọc được {key}: {e}")
+            return None
+        if raw is None:
+            return None
+        value = decode(raw)
+        with self._lock:
+            self._memory[key] = value
+        return value
+
+    def _set(self, key: str, value: Any, encode: Callable[[Any], bytes] = None):
+        with self._lock:
+            self._memory[key] = value
+        try:
+            raw = encode(value) if encode else json.dumps(value, ensure_ascii=False)
+            self.redis_conn.set(key, raw, ex=self.ttl)
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ [Transcript cache] Không ghi được {key}: {e}")
+
+    @staticmethod
+    def _encode_transcript(transcript_info: Dict) -> bytes:
+        # [1 byte flagTargetLang][payload codec của transcript]
+        flag = b"\x01" if transcript_info["flagTargetLang"] else b"\x00"
+        return flag + encode_segments(transcript_info["transcript"])
+
+    @staticmethod
+    def _decode_transcript(raw: bytes) -> Dict:
+        return {"transcript": decode_segments(memoryview(raw)[1:]), "flagTargetLang": raw[:1] == b"\x01"}
+
+    def get_transcript(self, video_id: str, language: str) -> Optional[Dict]:
+        """
+        Returns:
+            Optional[Dict]: {"transcript": CompactTranscript, "flagTargetLang": bool} như `main.get_transcript`,
+            None nếu chưa có.
+        """
+        return self._get(self.transcript_key(video_id, language), decode=self._decode_transcript)
+
+    def set_transcript(self, video_id: str, language: str, transcript_info: Dict):
+        self._set(self.transcript_key(video_id, language), transcript_info, encode=self._encode_transcript)
+
+    def get_manifest(self, video_id: str, language: str, max_chars: int, max_items: int) -> Optional[List[str]]:
+        return self._get(self.manifest_key(video_id, language, max_chars, max_items))
+
+    def set_manifest(self, video_id: str, language: str, max_chars: int, max_items: int, list_chunk_ids: List[str]):
+        self._set(self.manifest_key(video_id, language, max_chars, max_items), list_chunk_ids)
@@ -0,0 +1,106 @@
+import os
+import time
+import hashlib
+import redis
+from typing import List, Dict, Optional
+from loguru import logger
+from redis_cache.store import get_redis
+
+# Cấu hình translation memory (có thể ghi đè bằng biến môi trường)
+TM_PREFIX = "tm"
+TM_TTL = int(os.getenv("TM_TTL", 7 * 24 * 3600))
+TM_MAX_ENTRIES = int(os.getenv("TM_MAX_ENTRIES", 500_000))
+
+
+def normalize_segment(text: Optional[str]) -> str:
+    # Gộp khoảng trắng để "[Music]" và " [Music] " dùng chung một bản dịch
+    return " ".join(text.split()) if isinstance(text, str) else ""
+
+
+class TranslationMemory:
+    """
+    Bộ nhớ dịch theo từng segment, lưu trong Redis.
+
+    Key = (backend, source_lang, target_lang, sha256(text)); mỗi bản dịch có TTL,
+    số entry bị giới hạn bởi `max_entries` (loại bỏ entry ít được dùng gần đây nhất).
+    """
+
+    def __init__(self, redis_config: dict, ttl: int = TM_TTL, max_entries: int = TM_MAX_ENTRIES):
+        self.redis_conn = get_redis(redis_config)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.index_key = f"{TM_PREFIX}:index"    # ZSET key -> thời điểm truy cập gần nhất
+        self.stats_key = f"{TM_PREFIX}:stats"    # HASH hits / misses
+
+    @staticmethod
+    def make_key(text: str, source_lang: str, target_lang: str, backend: str) -> str:
+        digest = hashlib.sha256(normalize_segment(text).encode("utf-8")).hexdigest()
+        return f"{TM_PREFIX}:{backend}:{source_lang or 'auto'}:{target_lang}:{digest}"
+
+    def get_many(self, texts: List[str], source_lang: str, target_lang: str, backend: str) -> List[Optional[str]]:
+        """
+        Tra cứu bản dịch cho nhiều segment trong một lần gọi Redis.
+
+        Returns:
+            List[Optional[str]]: bản dịch theo thứ tự `texts`, None nếu chưa có.
+        """
+        if not texts:
+            return []
+        keys = [self.make_key(text, source_lang, target_lang, backend) for text in texts]
+        try:
+            values = self.redis_conn.mget(keys)
+            hits = {key for key, value in zip(keys, values) if value is not None}
+            now = time.time()
+            pipe = self.redis_conn.pipeline()
+            if hits:
+                pipe.zadd(self.index_key, {key: now for key in hits})
+            pipe.hincrby(self.stats_key, "hits", sum(value is not None for value in values))
+            pipe.hincrby(self.stats_key, "misses", sum(value is None for value in values))
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ [TM] Không đọc được translation memory: {e}")
+            return [None] * len(texts)
+        return [value.decode("utf-8") if value is not None else None for value in values]
+
+    def set_many(self, translations: Dict[str, str], source_lang: str, target_lang: str, backend: str):
+        if not translations:
+            return
+        try:
+            now = time.time()
+            pipe = self.redis_conn.pipeline()
+            index = {}
+            for text, translated in translations.items():
+                key = self.make_key(text, source_lang, target_lang, backend)
+                pipe.set(key, translated, ex=self.ttl)
+                index[key] = now
+            pipe.zadd(self.index_key, index)
+            pipe.execute()
+            self._evict()
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ [TM] Không ghi được translation memory: {e}")
+
+    def _evict(self):
+        # Entry hết TTL tự mất khỏi Redis, chỉ cần dọn index và cắt bớt khi vượt giới hạn
+        pipe = self.redis_conn.pipeline()
+        pipe.zremrangebyscore(self.index_key, "-inf", time.time() - self.ttl)
+        pipe.zcard(self.index_key)
+        _, size = pipe.execute()
+        overflow = size - self.max_entries
+        if overflow <= 0:
+            return
+        victims = [key for key, _ in self.redis_conn.zpopmin(self.index_key, overflow)]
+        if victims:
+            self.redis_conn.delete(*victims)
+            logger.info(f"🧹 [TM] Đã loại bỏ {len(victims)} bản dịch cũ.")
+
+    def stats(self) -> Dict[str, float]:
+        raw = self.redis_conn.hgetall(self.stats_key)
+        hits = int(raw.get(b"hits", 0))
+        misses = int(raw.get(b"misses", 0))
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": self.redis_conn.zcard(self.index_key),
+        }
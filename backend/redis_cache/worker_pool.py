@@ -0,0 +1,261 @@
+import os
+import json
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict
+from loguru import logger
+from Handler_Transcript.Handler_Transcript import Handler
+from Text_To_Speech.TextToSpeech import TextToSpeechModule, create_tts_module
+from Translator.registry import get_translator
+from redis_cache.audio_cache import AudioCache
+from redis_cache.translation_memory import TranslationMemory
+from redis_cache.store import get_redis
+from redis_cache.jobs import (
+    is_job_active,
+    report_chunk,
+    fail_job,
+    acquire_tts_slot,
+    release_tts_slot,
+    has_tts_slot,
+)
+from redis_cache.scheduler import (
+    TRANSLATION_JOBS_KEY,
+    TTS_JOBS_KEY,
+    SCHEDULER_WINDOW,
+    job_chunk_deadlines,
+    enqueue_translation,
+    enqueue_tts,
+    take_tts_task,
+    park_tts_task,
+    unpark_tts_task,
+)
+from redis_cache.cache import (
+    load_transcript_chunks,
+    translate_chunks_batched,
+    store_translation,
+    synthesize_and_store_chunk,
+    warm_up_tts,
+)
+from monitoring.metrics import (
+    METRICS_FLUSH_INTERVAL,
+    configure_metrics,
+    span,
+    observe,
+    flush_metrics,
+    set_worker_state,
+    clear_worker_state,
+)
+
+# Số worker mỗi loại (có thể ghi đè bằng biến môi trường)
+TRANSLATOR_WORKERS = int(os.getenv("TRANSLATOR_WORKERS", 2))
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", 2))
+# Số request tổng hợp đồng thời trong mỗi worker TTS (tổng = TTS_WORKERS * TTS_CONCURRENCY)
+TTS_CONCURRENCY = int(os.getenv("TTS_CONCURRENCY", 4))
+# Số chunk tối đa của một job được tổng hợp cùng lúc
+TTS_MAX_PER_JOB = int(os.getenv("TTS_MAX_PER_JOB", 4))
+# Giọng đọc được mở sẵn kết nối tới Azure khi worker TTS khởi động (phân cách bằng dấu phẩy)
+TTS_WARM_VOICES = [voice.strip() for voice in os.getenv("TTS_WARM_VOICES", "vi-VN-HoaiMyNeural").split(",") if voice.strip()]
+# Số giây BZPOPMIN chờ job trước khi kiểm tra lại tín hiệu dừng
+WORKER_POLL_TIMEOUT = 2
+
+
+def _heartbeat_loop(stop_event):
+    # Một lượt dịch (nhiều batch, mỗi batch một request) có thể lâu hơn WORKER_STALE_SECONDS:
+    # flush từ luồng riêng để worker đang bận không bị /metrics coi là đã chết
+    while not stop_event.wait(METRICS_FLUSH_INTERVAL):
+        flush_metrics()
+
+
+# Worker dịch: lấy job có chunk gấp nhất, dịch một cửa sổ chunk rồi đẩy sang queue TTS
+def translator_worker(redis_config: dict, stop_event):
+    redis_conn = get_redis(redis_config)
+    handler = Handler()
+    translation_memory = TranslationMemory(redis_config)
+    configure_metrics(redis_config)
+    heartbeat = threading.Thread(target=_heartbeat_loop, args=(stop_event,), daemon=True)
+    heartbeat.start()
+
+    logger.info(f"📘 [Translator worker {os.getpid()}] Sẵn sàng.")
+    while not stop_event.is_set():
+        set_worker_state("translator", busy=0, capacity=1)
+        flush_metrics()
+        result = redis_conn.bzpopmin(TRANSLATION_JOBS_KEY, timeout=WORKER_POLL_TIMEOUT)
+        if result is None:
+            continue
+        set_worker_state("translator", busy=1, capacity=1)
+        job = json.loads(result[1])
+        job_id = job["job_id"]
+        if not is_job_active(redis_conn, job_id):
+            logger.warning(f"⚠️ [Translator worker] Job {job_id} đã hủy hoặc quá hạn, bỏ qua.")
+            continue
+
+        try:
+            translator_func = get_translator(job["translator"], video_id=job["video_id"]).translate
+        except Exception as e:
+            logger.error(f"❌ [Translator worker] Không khởi tạo được translator cho job {job_id}: {e}")
+            fail_job(redis_conn, job_id, job["list_chunk_ids"], f"Translator init failed: {e}")
+            continue
+
+        # Deadline tính lại mỗi lượt theo vị trí phát mới nhất của job (người xem có thể đã tua)
+        deadlines = job_chunk_deadlines(redis_conn, job_id, job["all_chunk_ids"])
+        ordered = sorted(job["list_chunk_ids"], key=deadlines.get)
+        list_chunk_ids, remaining = ordered[:SCHEDULER_WINDOW], ordered[SCHEDULER_WINDOW:]
+
+        with span("translator.load_chunks", job_id=job_id, chunks=len(list_chunk_ids)):
+            chunks = load_transcript_chunks(redis_conn, list_chunk_ids)
+        for chunk_id in list_chunk_ids:
+            if chunk_id not in chunks:
+                report_chunk(redis_conn, job_id, chunk_id, ok=False, error="Transcript not found")
+        handled = set()
+
+        try:
+            for chunk_id, merged, error in translate_chunks_batched(chunks, translator_func, handler, job["source_lang"],
+                                                                     job["target_lang"], translation_memory,
+                                                                     job_id=job_id):
+                handled.add(chunk_id)
+                if not is_job_active(redis_conn, job_id):
+                    logger.warning(f"⚠️ [Translator worker] Job {job_id} đã hủy hoặc quá hạn, bỏ qua.")
+                    remaining = []
+                    break
+                if merged is None:
+                    report_chunk(redis_conn, job_id, chunk_id, ok=False, error=error)
+                    continue
+                with span("translator.store", job_id=job_id, chunk_id=chunk_id):
+                    store_translation(redis_conn, chunk_id, merged, job["variant"])
+                    # Điểm = deadline của chunk: chunk sắp phát được tổng hợp trước, bất kể thuộc job nào.
+                    # Tính lại theo vị trí phát mới nhất: seek_job không chấm lại được task đang nằm trong worker
+                    deadlines = job_chunk_deadlines(redis_conn, job_id, job["all_chunk_ids"])
+                    task = {"job_id": job_id, "chunk_id": chunk_id, "tts_voice": job["tts_voice"],
+                            "variant": job["variant"], "queued_at": time.time()}
+                    enqueue_tts(redis_conn, task, deadlines[chunk_id])
+            if remaining and is_job_active(redis_conn, job_id):
+                # Trả phần còn lại về queue, chunk gấp hơn của job khác sẽ được dịch trước
+                deadlines = job_chunk_deadlines(redis_conn, job_id, job["all_chunk_ids"])
+                enqueue_translation(redis_conn, {**job, "list_chunk_ids": remaining}, deadlines)
+        except Exception as e:
+            logger.error(f"❌ [Translator worker] Lỗi job {job_id}: {e}")
+            fail_job(redis_conn, job_id, [chunk_id for chunk_id in chunks if chunk_id not in handled] + remaining,
+                     f"Translation failed: {e}")
+
+    # Chờ lần flush dở dang để heartbeat không được ghi lại sau khi đã xóa
+    heartbeat.join()
+    clear_worker_state("translator")
+
+
+# Worker TTS: lấy chunk ưu tiên nhất, tổng hợp song song và báo về queue sự kiện của job
+def tts_worker(redis_config: dict, stop_event, concurrency: int = TTS_CONCURRENCY):
+    redis_conn = get_redis(redis_config)
+    audio_cache = AudioCache(redis_config)
+    slots = threading.BoundedSemaphore(concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    configure_metrics(redis_config)
+    busy = 0
+    busy_lock = threading.Lock()
+
+    def set_busy(delta: int):
+        nonlocal busy
+        with busy_lock:
+            busy += delta
+            set_worker_state("tts", busy=busy, capacity=concurrency)
+
+    def get_tts(voice: str) -> TextToSpeechModule:
+        # Module (và pool synthesizer của nó) dùng chung trong tiến trình theo giọng đọc, giữ qua các job
+        return create_tts_module(voice=voice, output_format="webm")
+
+    def run_task(task: Dict):
+        job_id, chunk_id = task["job_id"], task["chunk_id"]
+        if "queued_at" in task:
+            # Từ lúc dịch xong đến lúc có luồng TTS nhận chunk
+            observe("tts.queue_wait", time.time() - task["queued_at"])
+        try:
+            with span("tts.chunk", job_id=job_id, chunk_id=chunk_id) as current:
+                ok = synthesize_and_store_chunk(redis_conn, chunk_id, get_tts(task["tts_voice"]), audio_cache,
+                                                variant=task["variant"])
+                current.outcome = "ok" if ok else "error"
+            report_chunk(redis_conn, job_id, chunk_id, ok=ok, error=None if ok else "TTS synthesis failed")
+        except Exception as e:
+            logger.error(f"[TTS worker] Lỗi xử lý chunk {chunk_id}: {e}")
+            report_chunk(redis_conn, job_id, chunk_id, ok=False, error=f"TTS synthesis failed: {e}")
+        finally:
+            release_tts_slot(redis_conn, job_id)
+            # Luồng của job vừa rảnh: cho một task đang chờ của job quay lại queue
+            unpark_tts_task(redis_conn, job_id)
+            set_busy(-1)
+            slots.release()
+
+    # Chunk đầu tiên của job không phải chờ tạo synthesizer và bắt tay với Azure
+    for voice in TTS_WARM_VOICES:
+        with span("tts.warm_up", voice=voice):
+            warmed = warm_up_tts(get_tts(voice), concurrency)
+        if warmed:
+            logger.info(f"🔥 [TTS worker {os.getpid()}] Đã mở sẵn {warmed} kết nối cho giọng {voice}.")
+
+    logger.info(f"📗 [TTS worker {os.getpid()}] Sẵn sàng ({concurrency} luồng).")
+    set_busy(0)
+    while not stop_event.is_set():
+        flush_metrics()
+        # Chỉ lấy task khi còn luồng rảnh, để task chờ trong Redis cho worker khác
+        if not slots.acquire(timeout=WORKER_POLL_TIMEOUT):
+            continue
+        result = redis_conn.bzpopmin(TTS_JOBS_KEY, timeout=WORKER_POLL_TIMEOUT)
+        if result is None:
+            slots.release()
+            continue
+        _, member, score = result
+        task = json.loads(member)
+        job_id = task["job_id"]
+
+        if not is_job_active(redis_conn, job_id):
+            take_tts_task(redis_conn, job_id, member)
+            slots.release()
+            continue
+        if not acquire_tts_slot(redis_conn, job_id, TTS_MAX_PER_JOB):
+            # Job đã dùng hết K luồng: task chờ riêng tới khi job trả luồng, worker lấy task tiếp theo trong queue
+            park_tts_task(redis_conn, job_id, member, score)
+            if has_tts_slot(redis_conn, job_id, TTS_MAX_PER_JOB):
+                # Job đã trả luồng trong lúc đang cất task, không để task nằm chờ mãi
+                unpark_tts_task(redis_conn, job_id)
+            slots.release()
+            continue
+        # Task bị cất vẫn ở trong job:{id}:tts để seek_job chấm lại điểm, chỉ bỏ khi bắt đầu xử lý
+        take_tts_task(redis_conn, job_id, member)
+        set_busy(1)
+        executor.submit(run_task, task)
+
+    executor.shutdown(wait=True)
+    clear_worker_state("tts")
+
+
+class WorkerPool:
+    """
+    Nhóm tiến trình dịch và TTS chạy suốt vòng đời ứng dụng, nhận job qua queue Redis.
+    """
+
+    def __init__(self, redis_config: dict, translator_workers: int = TRANSLATOR_WORKERS, tts_workers: int = TTS_WORKERS):
+        self.redis_config = redis_config
+        self.translator_workers = translator_workers
+        self.tts_workers = tts_workers
+        self.stop_event = multiprocessing.Event()
+        self.processes: List[multiprocessing.Process] = []
+
+    def start(self):
+        if self.processes:
+            return
+        self.stop_event.clear()
+        targets = [translator_worker] * self.translator_workers + [tts_worker] * self.tts_workers
+        for target in targets:
+            process = multiprocessing.Process(target=target, args=(self.redis_config, self.stop_event), daemon=True)
+            process.start()
+            self.processes.append(process)
+        logger.info(f"🚀 Đã khởi động worker pool: {self.translator_workers} translator, {self.tts_workers} TTS.")
+
+    def stop(self, timeout: float = WORKER_POLL_TIMEOUT + 3):
+        self.stop_event.set()
+        for process in self.processes:
+            process.join(timeout=timeout)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+        logger.info("🛑 Đã dừng worker pool.")